@@ -0,0 +1,38 @@
+"""Add knowledgechunk.content_hash and the embeddingcache table
+
+Revision ID: add_embedding_cache
+Revises: add_boss_technical_objective
+Create Date: 2025-12-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_embedding_cache'
+down_revision = 'add_boss_technical_objective'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing chunks keep a NULL hash until their source is re-indexed
+    op.add_column('knowledgechunk', sa.Column('content_hash', sa.String(), nullable=True))
+    op.create_index('ix_knowledgechunk_content_hash', 'knowledgechunk', ['content_hash'])
+
+    op.create_table(
+        'embeddingcache',
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('embedding', Vector(768)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash', 'model'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embeddingcache')
+    op.drop_index('ix_knowledgechunk_content_hash', table_name='knowledgechunk')
+    op.drop_column('knowledgechunk', 'content_hash')
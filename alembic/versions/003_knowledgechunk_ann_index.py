@@ -0,0 +1,60 @@
+"""Add HNSW index and search filter columns to knowledgechunk
+
+Revision ID: knowledgechunk_ann_index
+Revises: add_embedding_cache
+Create Date: 2025-12-11
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'knowledgechunk_ann_index'
+down_revision = 'add_embedding_cache'
+branch_labels = None
+depends_on = None
+
+# Build parameters (pgvector defaults); recall at query time is tuned with
+# hnsw.ef_search, see rag_helper.search_knowledge
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+def upgrade() -> None:
+    op.add_column('knowledgechunk', sa.Column('project_id', sa.String(), nullable=True))
+    op.add_column('knowledgechunk', sa.Column('world_id', sa.String(), nullable=True))
+
+    # Backfill: repo chunks are keyed "<project_id>::<path>", codex chunks
+    # carry their world in metadata_json
+    op.execute(
+        "UPDATE knowledgechunk SET project_id = split_part(source_id, '::', 1) "
+        "WHERE source_type = 'repo' AND position('::' in source_id) > 0"
+    )
+    op.execute(
+        "UPDATE knowledgechunk SET world_id = metadata_json->>'world_id' "
+        "WHERE source_type = 'codex' AND metadata_json->>'world_id' IS NOT NULL"
+    )
+
+    op.create_index('ix_knowledgechunk_project_id', 'knowledgechunk', ['project_id'])
+    op.create_index('ix_knowledgechunk_world_id', 'knowledgechunk', ['world_id'])
+    op.create_index('ix_knowledgechunk_source_type', 'knowledgechunk', ['source_type'])
+
+    # CONCURRENTLY so syncs keep writing while the graph builds; it cannot
+    # run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_knowledgechunk_embedding_hnsw "
+            "ON knowledgechunk USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_knowledgechunk_embedding_hnsw")
+    op.drop_index('ix_knowledgechunk_source_type', table_name='knowledgechunk')
+    op.drop_index('ix_knowledgechunk_world_id', table_name='knowledgechunk')
+    op.drop_index('ix_knowledgechunk_project_id', table_name='knowledgechunk')
+    op.drop_column('knowledgechunk', 'world_id')
+    op.drop_column('knowledgechunk', 'project_id')
@@ -0,0 +1,35 @@
+"""Add full-text search column and GIN index to knowledgechunk
+
+Revision ID: knowledgechunk_fulltext
+Revises: knowledgechunk_ann_index
+Create Date: 2025-12-12
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'knowledgechunk_fulltext'
+down_revision = 'knowledgechunk_ann_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated, so every write path (bulk upserts, seed scripts) keeps it in
+    # sync. 'simple' = no stemming or stop words: code identifiers match as written
+    op.execute(
+        "ALTER TABLE knowledgechunk ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_knowledgechunk_content_tsv "
+            "ON knowledgechunk USING gin (content_tsv)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_knowledgechunk_content_tsv")
+    op.execute("ALTER TABLE knowledgechunk DROP COLUMN IF EXISTS content_tsv")
@@ -6,14 +6,15 @@ export function GameToast() {
   const [visible, setVisible] = useState(false);
 
   useEffect(() => {
-    if (event) {
+    // XP progress has its own toast in the XP bar
+    if (event && event.type !== 'progress') {
       setVisible(true);
       const timer = setTimeout(() => setVisible(false), 8000);
       return () => clearTimeout(timer);
     }
   }, [event]);
 
-  if (!visible || !event) return null;
+  if (!visible || !event || event.type === 'progress') return null;
 
   // --- STYLE LOGIC ---
   let styles = "bg-zinc-900 border-zinc-700";
@@ -1,6 +1,7 @@
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import { useBossStore } from '../store/bossStore';
 import { refreshWorldProgress } from '../features/progress/trackProgress';
+import { useGameSocket } from './useGameSocket';
 
 type Grade = {
     weighted_score: number;
@@ -45,6 +46,16 @@ export function useArcadeStream(sessionId: string, user: string = 'test') {
     const [lastProgress, setLastProgress] = useState<ProgressUpdate | null>(null);
     const [isStreaming, setIsStreaming] = useState(false);
     const abortControllerRef = useRef<AbortController | null>(null);
+    // Whether the current stream has sent a grade_partial yet (partials only merge within one stream)
+    const gradeStartedRef = useRef(false);
+    const gameEvent = useGameSocket();
+
+    // Post-grade XP is applied by the background worker and arrives over the game socket
+    useEffect(() => {
+        if (gameEvent?.type === 'progress' && gameEvent.user_id === user && gameEvent.progress) {
+            setLastProgress(gameEvent.progress);
+        }
+    }, [gameEvent, user]);
 
     const sendMessage = async (text: string, mode: string = 'judge', worldId?: string, trackId?: string, codexId?: string) => {
         // 1. Setup UI State
@@ -54,6 +65,7 @@ export function useArcadeStream(sessionId: string, user: string = 'test') {
         setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
 
         abortControllerRef.current = new AbortController();
+        gradeStartedRef.current = false;
 
         try {
             const response = await fetch(
@@ -148,6 +160,19 @@ export function useArcadeStream(sessionId: string, user: string = 'test') {
                 setLatestGrade(gradeData);
             } catch (e) { console.error('Failed to parse grade', e); }
         }
+        else if (eventType === 'grade_partial') {
+            // One rubric dimension at a time; the final 'grade' event replaces it
+            try {
+                const partial = JSON.parse(data);
+                if (!gradeStartedRef.current) {
+                    // First dimension of a new grade: drop the previous submission's scores
+                    gradeStartedRef.current = true;
+                    setLatestGrade(partial as Grade);
+                } else {
+                    setLatestGrade(prev => ({ ...(prev ?? {}), ...partial } as Grade));
+                }
+            } catch (e) { console.error('Failed to parse grade_partial', e); }
+        }
         else if (eventType === 'progress') {
             try {
                 const p = JSON.parse(data);
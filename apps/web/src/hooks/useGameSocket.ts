@@ -1,13 +1,16 @@
 import { useEffect, useState } from 'react';
+import type { ProgressUpdate } from './useArcadeStream';
 
 export type GameEvent = {
-  type: 'boss_spawn' | 'sync_progress' | 'sync_complete' | 'achievement' | 'quest_complete';
+  type: 'boss_spawn' | 'sync_progress' | 'sync_complete' | 'achievement' | 'quest_complete' | 'progress';
+  user_id?: string;
   title?: string;
   message?: string;
   // Sync specific fields
   project_id?: string;
   percent?: number;
   eta_seconds?: number;
+  embed_cache?: { hits: number; misses: number; hit_rate: number };
   xp_bounty?: number;
   // Boss spawn fields
   boss_id?: string;
@@ -16,6 +19,8 @@ export type GameEvent = {
   duration_seconds?: number;
   hp_penalty_on_fail?: number;
   base_xp_reward?: number;
+  // Post-grade XP (pushed by the outbox worker)
+  progress?: ProgressUpdate;
   // Achievement specific fields
   badge?: {
     name: string;
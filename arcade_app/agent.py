@@ -158,97 +158,28 @@ class JudgeAgent(BaseAgent):
             }
             yield {"event": "boss_result", "data": json.dumps(boss_result_payload)}
 
-        # 1. Grade
-        from arcade_app.grading_helper import grade_submission, stream_coach_feedback
-        from arcade_app.gamification import add_xp
+        # 1. Grade (stream each rubric dimension as soon as it is decoded)
+        from arcade_app.grading_helper import stream_grade_submission, stream_coach_feedback
         
-        grade_result = await grade_submission(user_input, track=track_id)
+        grade_result = {}
+        async for update in stream_grade_submission(user_input, track=track_id):
+            if update["type"] == "partial":
+                yield {"event": "grade_partial", "data": json.dumps({update["field"]: update["value"]})}
+            else:
+                grade_result = update["grade"]
         yield {"event": "grade", "data": json.dumps(grade_result)}
         
-        # 2. Award XP (Gamification Hook)
+        # 2. Post-grade bookkeeping (XP, badges, boss trigger) goes through the
+        # outbox; the worker pushes progress/achievement/boss_spawn over game_events
+        from arcade_app.post_grade import enqueue_post_grade
+
         user_id = context.get("user_id", "test")
         world_id = context.get("world_id", "unknown-world")
         score = grade_result.get("weighted_score", 0)
-        
+
         if score > 0:
-            # XP Formula: Score * Difficulty Multiplier (1.0 for now)
-            xp_amount = int(score) 
-            progress = await add_xp(user_id, world_id, xp_amount)
-            
-            # Stream a 'progress' event so the UI can show a notification
-            yield {"event": "progress", "data": json.dumps(progress)}
-
-            # B. Badges (New)
-            # We fire-and-forget this (or await it, it's fast)
-            # If the score is passing (e.g. > 60), count it as a "Completion"
-            if score >= 60:
-                await process_quest_completion(user_id, world_id, score)
-
-                # --- BOSS TRIGGER CHECK ---
-                from arcade_app.boss_triggers import BossTriggerContext, maybe_trigger_boss
-                from arcade_app.boss_helper import create_encounter
-                from arcade_app.models import Profile, QuestProgress, QuestDefinition, QuestState
-                from arcade_app.database import get_session
-                from sqlmodel import select, desc
-
-                # We need the profile and quest details
-                # This is a bit heavy for inside the agent loop, but acceptable for MVP
-                async for session in get_session():
-                    # Get Profile
-                    profile = (await session.exec(select(Profile).where(Profile.user_id == user_id))).first()
-                    if not profile: break
-
-                    # Get the just-completed quest to build context
-                    # We assume the last completed quest for this user/track is the one we just finished
-                    uq_stmt = (
-                        select(QuestProgress)
-                        .join(QuestDefinition)
-                        .where(
-                            QuestProgress.user_id == user_id, 
-                            QuestDefinition.track_id == track_id, 
-                            QuestProgress.state.in_([QuestState.COMPLETED, QuestState.MASTERED])
-                        )
-                        .order_by(desc(QuestProgress.completed_at))
-                    )
-                    last_qp = (await session.exec(uq_stmt)).first()
-                    
-                    if last_qp:
-                        # Count total completed on track
-                        completed_count = len((await session.exec(uq_stmt)).all())
-                        
-                        # Check attempts (read from progress)
-                        attempts = last_qp.attempts
-
-                        ctx = BossTriggerContext(
-                            profile=profile,
-                            world_id=world_id,
-                            track_id=track_id,
-                            quest_id=str(last_qp.quest_id),
-                            was_boss=False, # We are in normal grading flow
-                            passed=True,    # We just checked score >= 60
-                            grade="A" if score >= 90 else "B" if score >= 80 else "C",
-                            attempts_on_track=attempts, # This is attempts on THIS quest, not track total. But acceptable proxy or I can sum.
-                            completed_quests_on_track=completed_count
-                        )
-
-                        boss_def = await maybe_trigger_boss(ctx, session=session)
-                        if boss_def:
-                            encounter = await create_encounter(user_id, boss_def.id)
-                            # Emit Boss Spawn Event
-                            yield {
-                                "event": "boss_spawn", 
-                                "data": json.dumps({
-                                    "boss_id": boss_def.id,
-                                    "name": boss_def.name,
-                                    "difficulty": boss_def.difficulty,
-                                    "duration_seconds": boss_def.time_limit_seconds,
-                                    "hp_penalty_on_fail": 10, # Configurable
-                                    "base_xp_reward": boss_def.base_xp_reward
-                                })
-                            }
-                            yield {"event": "text_delta", "data": f"\n\n🚨 **WARNING: {boss_def.name.upper()} DETECTED** 🚨\nInitiating containment protocols..."}
-                    break
-        
+            await enqueue_post_grade(user_id, world_id, track_id, score)
+
         # 3. Coach (Stream)
         async for token in stream_coach_feedback(user_input, grade_result, track=track_id):
             yield {"event": "text_delta", "data": token}
@@ -388,6 +319,21 @@ async def stream_agent_query(
     # Run
     return StreamingResponse(agent.run(body.message, context={"user_id": user_id}), media_type="text/event-stream")
 
+@app.on_event("startup")
+async def warm_model_registry():
+    """Build the shared Vertex model handles before the first request lands."""
+    _log_vertex_config()
+    if os.getenv("EVALFORGE_MOCK_GRADING") == "1":
+        return
+    from arcade_app.model_registry import model_registry
+    await asyncio.to_thread(model_registry.warmup)
+
+@app.on_event("startup")
+async def warm_rubric_registry():
+    """Compile boss rubrics and ZERO prompts once instead of on every evaluation."""
+    from arcade_app.rubric_registry import rubric_registry
+    await asyncio.to_thread(rubric_registry.warmup)
+
 # --- 4.5 WebSocket Route ---
 from arcade_app.socket_manager import websocket_endpoint
 app.websocket("/ws/game_events")(websocket_endpoint)
@@ -409,7 +355,8 @@ from arcade_app.routers import (
     routes_practice_rounds as practice_rounds,
     routes_ladders as ladders,
     routes_world_progress as world_progress,
-    routes_boss_runs as boss_runs
+    routes_boss_runs as boss_runs,
+    routes_judge as judge
 )
 
 app.include_router(auth.router)
@@ -426,6 +373,7 @@ app.include_router(practice_rounds.router)
 app.include_router(ladders.router)
 app.include_router(world_progress.router)
 app.include_router(boss_runs.router)
+app.include_router(judge.router)
 
 # ... (routes) ...
 
@@ -483,10 +431,14 @@ def metrics():
     Basic Prometheus-style metrics stub.
     """
     # In a real app, use prometheus_client
+    from arcade_app.model_registry import model_registry
+    from arcade_app.rubric_registry import rubric_registry
     return {
         "evalforge_up": 1,
         "boss_runs_total": 0, # TODO: Hook into BossStore
-        "active_sessions": len(AGENTS) # Rough proxy
+        "active_sessions": len(AGENTS), # Rough proxy
+        "llm_models": model_registry.stats(),
+        "boss_rubrics": rubric_registry.stats(),
     }
 
 # --- 6. Static Files (SPA Serving) ---
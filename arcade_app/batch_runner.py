@@ -1,16 +1,20 @@
+import argparse
 import asyncio
 import json
 import os
 import time
 from datetime import datetime
-from typing import List, Dict, Any
-from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional
+from dataclasses import dataclass, asdict
 
 # Import your core logic
-from arcade_app.grading_helper import grade_submission
+from arcade_app import grading_helper
+from arcade_app.benchmark import LatencyStats, format_report
+from arcade_app.cassette import cassette
 
 RUNS_DIR = "runs"
 DATASET_PATH = "data/golden_dataset.jsonl"
+PASS_TOLERANCE = 10  # must be within 10 points of expected
 
 @dataclass
 class EvalResult:
@@ -19,109 +23,329 @@ class EvalResult:
     score: float
     latency_ms: float
     passed: bool
+    error: Optional[str] = None
+    stages: Optional[Dict[str, float]] = None  # per-stage ms (see benchmark.STAGES)
+
+@dataclass
+class RunStats:
+    """Running totals, so a run never has to hold all of its results."""
+    total: int = 0
+    score_sum: float = 0.0
+    passed: int = 0
+    errors: int = 0
+
+    def add(self, result: EvalResult) -> None:
+        self.total += 1
+        self.score_sum += result.score
+        self.passed += int(result.passed)
+        self.errors += int(result.error is not None)
+
+    @property
+    def avg_score(self) -> float:
+        return self.score_sum / self.total if self.total else 0
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.total if self.total else 0
 
 class BatchRunner:
-    def __init__(self, dataset_path: str = DATASET_PATH):
+    """
+    Runs the golden dataset through the judge.
+
+    The dataset is streamed line by line and each result is appended to
+    `runs/<run_id>.results.jsonl` (NDJSON) the moment it finishes, so memory
+    stays flat and a crashed run can be continued with `--resume <run_id>`;
+    cases that already have a result are skipped. A small summary record
+    `runs/<run_id>.json` (meta + totals + results_file) is written at the end,
+    and the finished run is indexed into the run store (see run_store) for
+    cross-run queries. The summary also carries a latency/throughput report
+    (p50/p90/p99 overall, per stage and per track; see benchmark), printed in
+    full with `--benchmark`.
+    """
+
+    def __init__(
+        self,
+        dataset_path: str = DATASET_PATH,
+        concurrency: int = 1,
+        run_id: Optional[str] = None,
+        runs_dir: str = RUNS_DIR,
+        store_path: Optional[str] = None,
+        benchmark: bool = False,
+        fast: bool = False,
+        fast_size: Optional[int] = None,
+        refresh_subset: bool = False,
+    ):
         self.dataset_path = dataset_path
-        self.results: List[EvalResult] = []
-        self.model = None  # Placeholder for real model if needed
+        self.concurrency = max(1, concurrency)
+        self.runs_dir = runs_dir
+        self.resumed = run_id is not None
+        self.run_id = run_id or f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.stats = RunStats()
+        self.benchmark = benchmark
+        self.latency = LatencyStats()
+        # --fast: grade only the stratified subset (see fast_subset)
+        self.fast = fast
+        self.fast_size = fast_size
+        self.refresh_subset = refresh_subset
+        self.subset: Optional[Dict[str, Any]] = None
+        self.case_ids: Optional[set] = None
+        # Default store lives next to the run files; "" disables indexing
+        if store_path is None:
+            store_path = os.getenv("EVALFORGE_RUN_STORE") or os.path.join(runs_dir, "evalforge_runs.db")
+        self.store_path = store_path
 
         # Ensure run directory exists
-        os.makedirs(RUNS_DIR, exist_ok=True)
+        os.makedirs(self.runs_dir, exist_ok=True)
 
         # Log active mode
         is_mock = os.getenv("EVALFORGE_MOCK_GRADING", "0") == "1"
-        print(f"🔧 Batch Runner Initialized. Mode: {'MOCK' if is_mock else 'REAL'}")
+        print(f"🔧 Batch Runner Initialized. Mode: {'MOCK' if is_mock else 'REAL'} | Cassette: {cassette.mode} ({cassette.path}) | Concurrency: {self.concurrency}")
 
-    def load_dataset(self) -> List[Dict]:
-        """Reads the JSONL dataset."""
-        data = []
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.runs_dir, f"{self.run_id}.results.jsonl")
+
+    @property
+    def summary_path(self) -> str:
+        return os.path.join(self.runs_dir, f"{self.run_id}.json")
+
+    @property
+    def subset_path(self) -> str:
+        return os.path.join(self.runs_dir, "fast_subset.json")
+
+    def iter_dataset(self) -> Iterator[Dict]:
+        """Streams the JSONL dataset one case at a time (only the subset with --fast)."""
         if not os.path.exists(self.dataset_path):
             print(f"❌ Dataset not found: {self.dataset_path}")
-            return []
-            
+            return
+
         with open(self.dataset_path, "r") as f:
             for line in f:
                 if line.strip():
-                    data.append(json.loads(line))
-        return data
+                    case = json.loads(line)
+                    if self.case_ids is None or case["id"] in self.case_ids:
+                        yield case
+
+    def dataset_ids(self) -> set:
+        """IDs of the cases this run covers. Results are keyed by id, so duplicates are rejected."""
+        ids: set = set()
+        for case in self.iter_dataset():
+            if case["id"] in ids:
+                raise ValueError(f"Duplicate case id {case['id']!r} in {self.dataset_path}")
+            ids.add(case["id"])
+        return ids
+
+    def prepare_subset(self) -> None:
+        """Loads (or recomputes, if the dataset changed) the --fast subset."""
+        if not self.fast or self.subset is not None or not os.path.exists(self.dataset_path):
+            return
+        from arcade_app.fast_subset import load_or_build, subset_ids
+        self.subset = load_or_build(
+            self.dataset_path, self.subset_path, store_path=self.store_path,
+            size=self.fast_size, refresh=self.refresh_subset,
+        )
+        self.case_ids = set(subset_ids(self.subset))
+        print(f"⚡ Fast mode: {self.subset['size']} of {self.subset['population']} cases across {len(self.subset['strata'])} strata")
+
+    def load_dataset(self) -> List[Dict]:
+        """Reads the whole JSONL dataset (small datasets / tooling)."""
+        return list(self.iter_dataset())
+
+    def iter_results(self) -> Iterator[EvalResult]:
+        """Streams results already written for this run_id."""
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield EvalResult(**json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    continue  # torn last line from a crash; that case is re-run
+
+    def load_completed(self) -> Dict[str, EvalResult]:
+        """Successful results already written for this run_id (empty for a fresh run)."""
+        return {r.case_id: r for r in self.iter_results() if r.error is None}
+
+    async def run(self) -> RunStats:
+        self.prepare_subset()
+        completed = self.load_completed() if self.resumed else {}
+        if self.resumed:
+            print(f"♻️  Resuming {self.run_id}: {len(completed)} case(s) already done")
+
+        # Cheap counting pass for progress/ETA; cases themselves are streamed below
+        dataset_ids = self.dataset_ids()
+        pending_total = len(dataset_ids - set(completed))
+        self.stats = RunStats()
+        self.latency = LatencyStats()
+        for case_id, result in completed.items():
+            if case_id in dataset_ids:
+                self.stats.add(result)
+        completed_ids = set(completed) & dataset_ids
+        del completed, dataset_ids
 
-    async def run(self):
-        cases = self.load_dataset()
-        print(f"🚀 Starting run with {len(cases)} cases...")
-        
+        print(f"🚀 Starting run {self.run_id} with {pending_total} of {pending_total + len(completed_ids)} cases...")
         start_time = time.time()
-        
-        for case in cases:
-            # Timing the execution
-            t0 = time.time()
-            
-            # Call the Grading Helper directly
-            # Note: We pass None as model if using Mock, or real model otherwise
-            result = await grade_submission(
-                model=self.model, 
-                user_input=case["input"], 
-                track=case.get("track", "default")
-            )
-            
-            duration_ms = (time.time() - t0) * 1000
-            
-            # Simple Pass/Fail logic (e.g., must be within 10 points of expected)
-            expected = case.get("expected_score", 0)
-            actual = result["weighted_score"]
-            passed = abs(actual - expected) <= 10  # Tolerance threshold
-
-            print(f"   [{case['id']}] Score: {actual} (Exp: {expected}) | {duration_ms:.0f}ms | {'✅' if passed else '❌'}")
-
-            self.results.append(EvalResult(
-                case_id=case["id"],
-                track=case.get("track", "default"),
-                score=actual,
-                latency_ms=duration_ms,
-                passed=passed
-            ))
+
+        expected: Dict[str, float] = {}
+
+        def _pending() -> Iterator[Dict[str, Any]]:
+            for case in self.iter_dataset():
+                if case["id"] in completed_ids:
+                    continue
+                expected[case["id"]] = case.get("expected_score", 0)
+                yield {"id": case["id"], "input": case["input"], "track": case.get("track", "default")}
+
+        done = 0
+        with open(self.results_path, "a") as out:
+            async for item in grading_helper.grade_many_as_completed(_pending(), concurrency=self.concurrency):
+                case_expected = expected.pop(item["id"])
+                result = self._to_result(item, case_expected)
+                self.stats.add(result)
+                self.latency.add(result.latency_ms, result.track, result.stages, error=result.error is not None)
+                done += 1
+
+                # Persist immediately so a crash loses at most the in-flight cases
+                out.write(json.dumps(asdict(result)) + "\n")
+                out.flush()
+
+                self._print_progress(result, case_expected, done, pending_total, start_time)
 
         total_duration = time.time() - start_time
         self._save_run(total_duration)
+        return self.stats
 
-    def _save_run(self, duration_sec: float):
-        """Serializes the run to a JSON file."""
-        run_id = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        filename = os.path.join(RUNS_DIR, f"{run_id}.json")
-        
-        # Calculate summary stats
-        avg_score = sum(r.score for r in self.results) / len(self.results) if self.results else 0
-        pass_rate = sum(1 for r in self.results if r.passed) / len(self.results) if self.results else 0
+    @staticmethod
+    def _to_result(item: Dict[str, Any], expected: float) -> EvalResult:
+        if not item["ok"]:
+            return EvalResult(
+                case_id=item["id"], track=item["track"], score=0,
+                latency_ms=item["latency_ms"], passed=False, error=item["error"],
+                stages=item.get("stages"),
+            )
+        actual = item["grade"]["weighted_score"]
+        return EvalResult(
+            case_id=item["id"],
+            track=item["track"],
+            score=actual,
+            latency_ms=item["latency_ms"],
+            passed=abs(actual - expected) <= PASS_TOLERANCE,
+            stages=item.get("stages"),
+        )
+
+    @staticmethod
+    def _print_progress(result: EvalResult, expected: float, done: int, total: int, start_time: float):
+        elapsed = max(time.time() - start_time, 1e-6)
+        rate = done / elapsed
+        eta = (total - done) / rate if rate else 0
+        status = f"⚠️ {result.error}" if result.error else ('✅' if result.passed else '❌')
+        print(
+            f"   [{result.case_id}] Score: {result.score} (Exp: {expected}) | {result.latency_ms:.0f}ms | {status}"
+            f" | {done}/{total} | {rate:.2f} cases/s | ETA {eta:.0f}s"
+        )
+
+    def _extra_meta(self) -> Dict[str, Any]:
+        """Subclass hook for additional run meta (see eval_sharding)."""
+        if self.subset is not None:
+            return {"fast_subset": {"size": self.subset["size"], "dataset_fingerprint": self.subset["dataset_fingerprint"]}}
+        return {}
 
+    def _save_run(self, duration_sec: float):
+        """Writes the small summary record next to the NDJSON results."""
+        stats = self.stats
+        # Latency covers the cases graded by this invocation (not earlier, resumed ones)
+        bench = self.latency.report(wall_sec=duration_sec)
+        meta = {
+            "run_id": self.run_id,
+            "timestamp": datetime.now().isoformat(),
+            "duration_sec": round(duration_sec, 2),
+            "mock_mode": os.getenv("EVALFORGE_MOCK_GRADING") == "1",
+            "cassette_mode": cassette.mode,
+            "cassette_stats": dict(cassette.stats),
+            "concurrency": self.concurrency,
+            "resumed": self.resumed,
+            **self._extra_meta(),
+        }
         output = {
-            "meta": {
-                "run_id": run_id,
-                "timestamp": datetime.now().isoformat(),
-                "duration_sec": round(duration_sec, 2),
-                "mock_mode": os.getenv("EVALFORGE_MOCK_GRADING") == "1"
-            },
+            "meta": meta,
             "summary": {
-                "total_cases": len(self.results),
-                "avg_score": round(avg_score, 1),
-                "pass_rate_pct": round(pass_rate * 100, 1)
+                "total_cases": stats.total,
+                "avg_score": round(stats.avg_score, 1),
+                "pass_rate_pct": round(stats.pass_rate * 100, 1),
+                "errors": stats.errors,
             },
-            "results": [
-                {
-                    "id": r.case_id,
-                    "score": r.score,
-                    "latency": round(r.latency_ms, 1),
-                    "passed": r.passed
-                }
-                for r in self.results
-            ]
+            "benchmark": bench,
+            **({"estimate": self._estimate()} if self.subset is not None else {}),
+            # Per-case results live in the NDJSON file (see scripts/compare_runs.py)
+            "results_file": os.path.basename(self.results_path),
         }
 
-        with open(filename, "w") as f:
+        with open(self.summary_path, "w") as f:
             json.dump(output, f, indent=2)
-            
-        print(f"\n💾 Run saved to: {filename}")
-        print(f"📊 Summary: Avg Score: {avg_score:.1f} | Pass Rate: {pass_rate:.0%}")
+
+        print(f"\n💾 Run saved to: {self.summary_path}")
+        print(f"📊 Summary: Avg Score: {stats.avg_score:.1f} | Pass Rate: {stats.pass_rate:.0%} | Errors: {stats.errors}")
+        if self.subset is not None:
+            est = output["estimate"]
+            print(f"🎯 Full-set estimate ({est['graded_cases']}/{est['population']} cases): "
+                  f"Avg Score {est['avg_score']} ± {est['avg_score_ci95']} | "
+                  f"Pass Rate {est['pass_rate_pct']}% ± {est['pass_rate_ci95_pct']}%")
+        lat = bench["latency_ms"]
+        if lat.get("count"):
+            print(f"⏱️  Latency: p50 {lat['p50']}ms | p90 {lat['p90']}ms | p99 {lat['p99']}ms | {bench['throughput_cps']} cases/s")
+        if self.benchmark:
+            print("\n### ⏱️ Benchmark")
+            print(format_report(bench))
+
+        self._index_run(meta)
+
+    def _estimate(self) -> Dict[str, Any]:
+        from arcade_app.fast_subset import estimate_full_set
+        latest = {r.case_id: r for r in self.iter_results()}  # retries supersede errors
+        return estimate_full_set(latest.values(), self.subset)
+
+    def _index_run(self, meta: Dict[str, Any]):
+        """Writes the run's columns into the run store; the JSON files stay authoritative."""
+        if not self.store_path:
+            return
+        try:
+            from arcade_app.run_store import RunStore
+            store = RunStore(self.store_path)
+            try:
+                store.record_run(self.run_id, meta, (asdict(r) for r in self.iter_results()))
+            finally:
+                store.close()
+            print(f"🗄️  Indexed into run store: {self.store_path}")
+        except Exception as e:
+            print(f"⚠️ Run store indexing failed ({e}); run files are intact")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the EvalForge golden dataset through the judge.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Path to the JSONL dataset")
+    parser.add_argument("--concurrency", type=int, default=1, help="Cases graded in parallel")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Continue a previous run, skipping finished cases")
+    parser.add_argument("--store", help="Run store path (default: runs/evalforge_runs.db, '' to disable)")
+    parser.add_argument("--distributed", action="store_true", help="Shard the dataset across ARQ workers (see eval_sharding)")
+    parser.add_argument("--shard-size", type=int, default=50, help="Cases per shard job with --distributed")
+    parser.add_argument("--fast", action="store_true", help="Grade only the stratified fast subset and estimate full-set metrics")
+    parser.add_argument("--fast-size", type=int, help="Fast subset size (default: 10%% of the dataset)")
+    parser.add_argument("--refresh-subset", action="store_true", help="Recompute the fast subset from the run store")
+    parser.add_argument("--benchmark", action="store_true", help="Print the per-stage / per-track latency report")
+    parser.add_argument("--cassette", choices=["passthrough", "record", "replay"], help="Override EVALFORGE_CASSETTE")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    runner = BatchRunner()
+    args = _parse_args()
+    if args.cassette:
+        cassette.configure(args.cassette)
+    kwargs = dict(dataset_path=args.dataset, concurrency=args.concurrency, run_id=args.resume, store_path=args.store, benchmark=args.benchmark,
+                  fast=args.fast, fast_size=args.fast_size, refresh_subset=args.refresh_subset)
+    if args.distributed:
+        from arcade_app.eval_sharding import ShardedBatchRunner
+        runner = ShardedBatchRunner(shard_size=args.shard_size, **kwargs)
+    else:
+        runner = BatchRunner(**kwargs)
     asyncio.run(runner.run())
@@ -0,0 +1,119 @@
+"""
+Latency / throughput accounting for judge benchmark runs.
+
+The grading pipeline wraps each step in `stage(name)`. Outside a batch this
+is a no-op; `grade_many_as_completed` starts a capture per item, so every
+batch result carries a {stage: ms} breakdown next to its total latency_ms.
+Time not covered by a stage (rate-governor queueing, singleflight joins,
+event-loop contention) is reported as "other".
+
+`LatencyStats` accumulates those results into p50/p90/p99 tables overall,
+per stage and per track; BatchRunner stores the report in the run summary
+and compare_runs diffs two of them.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+STAGES = ("cache_lookup", "prompt_build", "model_call", "json_parse", "final_grade", "other")
+PERCENTILES = (50, 90, 99)
+
+_stage_times: ContextVar[Optional[Dict[str, float]]] = ContextVar("evalforge_stage_times", default=None)
+
+
+def start_stage_capture() -> Dict[str, float]:
+    """Begins collecting stage timings for the current task; returns the live dict."""
+    times: Dict[str, float] = {}
+    _stage_times.set(times)
+    return times
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Adds the block's wall time to `name` if a capture is active."""
+    times = _stage_times.get()
+    if times is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[name] = times.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """count / mean / max / p50 / p90 / p99 of a latency series (ms)."""
+    import numpy as np  # only needed for reports, not on the grading hot path
+
+    arr = np.asarray(values if isinstance(values, (array, list)) else list(values), dtype=np.float64)
+    if not arr.size:
+        return {"count": 0}
+    pcts = np.percentile(arr, PERCENTILES)
+    out: Dict[str, float] = {"count": int(arr.size), "mean": round(float(arr.mean()), 1), "max": round(float(arr.max()), 1)}
+    for p, v in zip(PERCENTILES, pcts):
+        out[f"p{p}"] = round(float(v), 1)
+    return out
+
+
+class LatencyStats:
+    """Streaming accumulator; holds one float per case per series."""
+
+    def __init__(self):
+        self.total = array("d")
+        self.by_track: Dict[str, array] = defaultdict(lambda: array("d"))
+        self.by_stage: Dict[str, array] = defaultdict(lambda: array("d"))
+        self.errors = 0
+
+    def add(self, latency_ms: float, track: str = "default", stages: Optional[Dict[str, float]] = None, error: bool = False) -> None:
+        if error:
+            # Failed calls (timeouts) would skew the percentiles either way; count them instead
+            self.errors += 1
+            return
+        self.total.append(latency_ms)
+        self.by_track[track].append(latency_ms)
+        for name, ms in (stages or {}).items():
+            self.by_stage[name].append(ms)
+
+    def add_record(self, rec: Dict[str, Any]) -> None:
+        """Adds a stored result record (NDJSON / legacy JSON shape)."""
+        if "latency_ms" not in rec:
+            return
+        self.add(rec["latency_ms"], rec.get("track", "default"), rec.get("stages"), error=bool(rec.get("error")))
+
+    def report(self, wall_sec: Optional[float] = None) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "latency_ms": summarize(self.total),
+            "stages": {name: summarize(self.by_stage[name]) for name in STAGES if name in self.by_stage},
+            "tracks": {track: summarize(values) for track, values in sorted(self.by_track.items())},
+            "errors": self.errors,
+        }
+        if wall_sec:
+            report["wall_sec"] = round(wall_sec, 2)
+            report["throughput_cps"] = round((len(self.total) + self.errors) / wall_sec, 2)
+        return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Markdown table of a `LatencyStats.report()`."""
+    lines = []
+    if "throughput_cps" in report:
+        lines.append(f"**Throughput:** {report['throughput_cps']} cases/s over {report['wall_sec']}s | **Errors:** {report['errors']}")
+    lines.append("| Series | Count | p50 | p90 | p99 | Max |")
+    lines.append("| :--- | :--- | :--- | :--- | :--- | :--- |")
+
+    def _row(label: str, s: Dict[str, float]) -> None:
+        if s.get("count"):
+            lines.append(f"| {label} | {s['count']} | {s['p50']} | {s['p90']} | {s['p99']} | {s['max']} |")
+
+    _row("**total**", report["latency_ms"])
+    for name, s in report["stages"].items():
+        _row(f"stage:{name}", s)
+    for track, s in report["tracks"].items():
+        _row(f"track:{track}", s)
+    return "\n".join(lines)
@@ -5,25 +5,21 @@ Provides the core logic for converting LLM judge choices into structured scores
 """
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import Dict
-
 from .boss_rubric_models import (
     BossRubric,
     BossEvalLLMChoice,
     BossEvalResult,
     BossEvalDimensionResult,
-    BossRubricDimension,
 )
-
-
-RUBRIC_DIR = Path("rubrics")
+from .rubric_registry import RUBRIC_DIR, rubric_registry  # noqa: F401  (RUBRIC_DIR re-exported)
 
 
 def load_boss_rubric(rubric_id: str) -> BossRubric:
     """
     Load a boss rubric JSON by rubric_id.
+
+    Served from the compiled rubric registry; the file is only re-read
+    when its mtime changes.
     
     Args:
         rubric_id: The rubric identifier (e.g., 'applylens_runtime_boss')
@@ -34,26 +30,7 @@ def load_boss_rubric(rubric_id: str) -> BossRubric:
     Raises:
         FileNotFoundError: If rubric file doesn't exist
     """
-    # Support both direct filename and rubric_id format
-    if rubric_id.endswith('.json'):
-        path = RUBRIC_DIR / rubric_id
-    else:
-        # Try boss-{slug} format first (our actual naming)
-        slug_format = rubric_id.replace('_', '-')
-        if slug_format.startswith("boss-"):
-            path = RUBRIC_DIR / f"{slug_format}.json"
-        else:
-            path = RUBRIC_DIR / f"boss-{slug_format}.json"
-        
-        if not path.exists():
-            # Fallback to direct rubric_id.json
-            path = RUBRIC_DIR / f"{rubric_id}.json"
-    
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    rubric = BossRubric.model_validate(data)
-    return rubric
+    return rubric_registry.get(rubric_id).rubric
 
 
 def score_boss_eval(rubric: BossRubric, choice: BossEvalLLMChoice) -> BossEvalResult:
@@ -68,26 +45,21 @@ def score_boss_eval(rubric: BossRubric, choice: BossEvalLLMChoice) -> BossEvalRe
     Returns:
         Complete evaluation result with score, grade, and breakdown
     """
-    # Index rubric dimensions by key
-    dim_index: Dict[str, BossRubricDimension] = {
-        d.key: d for d in rubric.dimensions
-    }
+    # Precompiled (key, level) -> band table
+    compiled = rubric_registry.compiled_for(rubric)
 
     # Score per dimension
     dim_results: list[BossEvalDimensionResult] = []
     total_score = 0
 
     for dim_choice in choice.dimensions:
-        dim = dim_index.get(dim_choice.key)
+        dim = compiled.dimensions.get(dim_choice.key)
         if dim is None:
             # Ignore unknown dimension keys to keep this robust
             continue
 
-        # Find the band with matching level (fallback: lowest level)
-        band = next(
-            (b for b in dim.bands if b.level == dim_choice.level),
-            min(dim.bands, key=lambda b: b.level),
-        )
+        # Band with matching level (fallback: lowest level)
+        band = compiled.band_for(dim.key, dim_choice.level)
 
         total_score += band.score
 
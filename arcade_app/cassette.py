@@ -0,0 +1,203 @@
+"""
+Record/replay cassettes for LLM calls.
+
+Every Vertex call goes through a `ModelHandle` (see model_registry), which
+consults the process-wide cassette before touching the network:
+
+- passthrough (default): call the model, store nothing
+- record: call the model and append the request hash + response text to
+  the cassette file
+- replay: answer from the cassette only; a request that was never recorded
+  raises CassetteMiss instead of going to the network
+
+The store is a JSONL file (one compact line per call) keyed by
+sha256(model, generation config, request). Prompts are not written, only
+their hash, so cassettes are safe to commit next to the golden dataset.
+
+    EVALFORGE_CASSETTE=record python -m arcade_app.batch_runner
+    EVALFORGE_CASSETTE=replay python -m arcade_app.batch_runner   # offline, deterministic
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("evalforge.cassette")
+
+MODES = ("passthrough", "record", "replay")
+DEFAULT_PATH = "data/cassettes/llm.jsonl"
+
+# Request kwargs that change the response (stream only changes its framing)
+_KEYED_KWARGS = ("generation_config", "safety_settings", "tools", "tool_config", "system_instruction")
+
+
+class CassetteMiss(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class CassetteResponse:
+    """Replayed stand-in for a GenerationResponse (or one stream chunk)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"CassetteResponse({self.text[:40]!r})"
+
+
+def _text_of(response: Any) -> str:
+    # .text raises on blocked / empty candidates; record those as empty
+    try:
+        return response.text or ""
+    except Exception:
+        return ""
+
+
+def request_key(model_name: str, config_key: str, args: tuple, kwargs: dict) -> str:
+    """Stable hash of everything that determines the model's answer."""
+    material = {
+        "model": model_name,
+        "config": config_key,
+        "args": args,
+        "kwargs": {k: kwargs[k] for k in _KEYED_KWARGS if kwargs.get(k) is not None},
+    }
+    blob = json.dumps(material, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, mode: str = "passthrough", path: str = DEFAULT_PATH):
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        self.configure(mode, path)
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            mode=os.getenv("EVALFORGE_CASSETTE", "passthrough"),
+            path=os.getenv("EVALFORGE_CASSETTE_PATH", DEFAULT_PATH),
+        )
+
+    def configure(self, mode: str, path: Optional[str] = None) -> None:
+        """Switch mode (and optionally file). Entries are re-read lazily."""
+        mode = (mode or "passthrough").lower()
+        if mode in ("off", "none", ""):
+            mode = "passthrough"
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {MODES})")
+        with self._lock:
+            self.mode = mode
+            if path is not None:
+                self.path = path
+            self._entries = None
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "passthrough"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # --- Store -------------------------------------------------------------
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+        with self._lock:
+            if self._entries is None:
+                entries: Dict[str, Dict[str, Any]] = {}
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                entries[entry["k"]] = entry  # last recording wins
+                self._entries = entries
+                logger.info(f"Cassette {self.path}: {len(entries)} recorded call(s), mode={self.mode}")
+        return self._entries
+
+    def _store(self, key: str, model_name: str, text: str, chunks: Optional[List[str]] = None) -> None:
+        entry: Dict[str, Any] = {"k": key, "m": model_name, "t": text}
+        if chunks is not None and chunks != [text]:
+            entry["c"] = chunks
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        entries = self._load()
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            entries[key] = entry
+            self.stats["recorded"] += 1
+
+    def lookup(self, key: str) -> Dict[str, Any]:
+        entry = self._load().get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            raise CassetteMiss(f"No recorded LLM response for request {key[:12]} in {self.path}")
+        self.stats["hits"] += 1
+        return entry
+
+    # --- Replay ------------------------------------------------------------
+
+    @staticmethod
+    def _replay_chunks(entry: Dict[str, Any]) -> List[CassetteResponse]:
+        return [CassetteResponse(c) for c in entry.get("c", [entry["t"]])]
+
+    def replay(self, key: str, stream: bool):
+        entry = self.lookup(key)
+        if stream:
+            return iter(self._replay_chunks(entry))
+        return CassetteResponse(entry["t"])
+
+    def replay_async(self, key: str, stream: bool):
+        entry = self.lookup(key)
+        if stream:
+            chunks = self._replay_chunks(entry)
+
+            async def _gen() -> AsyncIterator[CassetteResponse]:
+                for chunk in chunks:
+                    yield chunk
+
+            return _gen()
+        return CassetteResponse(entry["t"])
+
+    # --- Record ------------------------------------------------------------
+
+    def record(self, key: str, model_name: str, response: Any, stream: bool):
+        if not stream:
+            self._store(key, model_name, _text_of(response))
+            return response
+
+        def _tee() -> Iterator[Any]:
+            chunks: List[str] = []
+            for chunk in response:
+                chunks.append(_text_of(chunk))
+                yield chunk
+            self._store(key, model_name, "".join(chunks), chunks)
+
+        return _tee()
+
+    def record_async(self, key: str, model_name: str, response: Any, stream: bool):
+        if not stream:
+            self._store(key, model_name, _text_of(response))
+            return response
+
+        async def _tee() -> AsyncIterator[Any]:
+            chunks: List[str] = []
+            async for chunk in response:
+                chunks.append(_text_of(chunk))
+                yield chunk
+            # Only complete streams are recorded; an abandoned one replays as a miss
+            self._store(key, model_name, "".join(chunks), chunks)
+
+        return _tee()
+
+
+# Singleton instance
+cassette = Cassette.from_env()
@@ -0,0 +1,210 @@
+"""
+Token-budgeted, structure-aware chunking for RAG indexing.
+
+Splitting on blank lines made Python files with few blank lines into a
+handful of huge chunks and markdown into hundreds of tiny ones. Chunking
+now works in two steps:
+
+1. Split the document into structural units:
+   - .py: one unit per top-level statement (`ast`), so a function or class
+     (with its decorators and the comments above it) is never cut in half
+   - markdown (.md/.mdx, codex docs): one unit per heading section,
+     ignoring "#" lines inside fenced code blocks
+   - anything else (or Python that does not parse): paragraphs
+2. Pack consecutive units into chunks of at most CHUNK_MAX_TOKENS. A
+   unit over the budget is cut into line windows that overlap by
+   CHUNK_OVERLAP_TOKENS, so a long function stays searchable end to end.
+
+Token counts use the embedder's estimate (no tokenizer round-trip).
+
+Compare chunking strategies on real files with:
+
+    python -m arcade_app.chunker path/to/file.py docs/*.md
+"""
+from __future__ import annotations
+
+import ast
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+from arcade_app.embedder import estimate_tokens
+
+CHUNK_MAX_TOKENS = int(os.getenv("EVALFORGE_CHUNK_MAX_TOKENS", "512"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("EVALFORGE_CHUNK_OVERLAP_TOKENS", "64"))
+
+MARKDOWN_EXTENSIONS = {".md", ".mdx", ".markdown"}
+_HEADING = re.compile(r"^#{1,6}\s")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def detect_kind(path: Optional[str]) -> str:
+    """Guesses "python" | "markdown" | "text" from a file name (or repo source id)."""
+    ext = os.path.splitext(path or "")[1].lower()
+    if ext == ".py":
+        return "python"
+    if ext in MARKDOWN_EXTENSIONS:
+        return "markdown"
+    return "text"
+
+
+def _python_units(text: str) -> Optional[List[str]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines = text.splitlines(keepends=True)
+    bounds = [0]
+    for prev, node in zip(tree.body, tree.body[1:]):
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+        # Comments directly above a statement belong to it
+        while start - 1 >= prev.end_lineno and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        bounds.append(start)
+    bounds.append(len(lines))
+    units = ["".join(lines[a:b]) for a, b in zip(bounds, bounds[1:])]
+    return [u for u in units if u.strip()]
+
+
+def _markdown_units(text: str) -> List[str]:
+    units: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _HEADING.match(line) and any(l.strip() for l in current):
+            units.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        units.append("".join(current))
+    return [u for u in units if u.strip()]
+
+
+def _paragraph_units(text: str) -> List[str]:
+    return [p + "\n\n" for p in text.split("\n\n") if p.strip()]
+
+
+def _windows(unit: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """Splits an oversized unit into overlapping line windows."""
+    lines: List[str] = []
+    for line in unit.splitlines(keepends=True):
+        # A single line over budget (minified code, data) is cut by characters
+        step = max_tokens * 4
+        lines.extend(line[i:i + step] for i in range(0, len(line), step))
+
+    windows: List[str] = []
+    start = 0
+    while start < len(lines):
+        end, tokens = start, 0
+        while end < len(lines) and (end == start or tokens + estimate_tokens(lines[end]) <= max_tokens):
+            tokens += estimate_tokens(lines[end])
+            end += 1
+        windows.append("".join(lines[start:end]))
+        if end >= len(lines):
+            break
+        # Step back over ~overlap_tokens worth of lines, always moving forward
+        back, carried = end, 0
+        while back - 1 > start and carried + estimate_tokens(lines[back - 1]) <= overlap_tokens:
+            back -= 1
+            carried += estimate_tokens(lines[back])
+        start = back
+    return windows
+
+
+def chunk_document(
+    text: str,
+    path: Optional[str] = None,
+    kind: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    header: str = "",
+) -> List[str]:
+    """
+    Splits `text` into retrieval chunks.
+
+    Args:
+        text: Document content.
+        path: File name or source id, used to pick the splitter.
+        kind: "python" | "markdown" | "text"; overrides the guess from `path`.
+        max_tokens: Chunk budget (default CHUNK_MAX_TOKENS).
+        overlap_tokens: Overlap between windows of an oversized unit
+            (default CHUNK_OVERLAP_TOKENS).
+        header: Context prepended to every chunk (e.g. "File: ..."). It is
+            not parsed, so it cannot break the Python/markdown splitters,
+            and its tokens count against each chunk's budget.
+
+    Returns:
+        Non-empty chunks in document order; without their header, their
+        concatenation covers the whole document (plus overlaps).
+    """
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    if header:
+        max_tokens = max(1, max_tokens - estimate_tokens(header))
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    kind = kind or detect_kind(path)
+
+    units: Optional[List[str]] = None
+    if kind == "python":
+        units = _python_units(text)
+    elif kind == "markdown":
+        units = _markdown_units(text)
+    if units is None:
+        units = _paragraph_units(text)
+
+    chunks: List[str] = []
+    current, current_tokens = "", 0
+    for unit in units:
+        cost = estimate_tokens(unit)
+        if cost > max_tokens:
+            if current.strip():
+                chunks.append(current)
+            current, current_tokens = "", 0
+            chunks.extend(_windows(unit, max_tokens, overlap_tokens))
+            continue
+        if current and current_tokens + cost > max_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current += unit
+        current_tokens += cost
+    if current.strip():
+        chunks.append(current)
+    return [header + c.strip("\n") for c in chunks if c.strip()]
+
+
+def chunk_stats(chunks: Sequence[str]) -> Dict[str, int]:
+    """Embedding volume of one document: chunk count and estimated tokens."""
+    sizes = [estimate_tokens(c) for c in chunks]
+    return {
+        "chunks": len(sizes),
+        "tokens": sum(sizes),
+        "max_tokens": max(sizes, default=0),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("usage: python -m arcade_app.chunker FILE [FILE ...]")
+        sys.exit(1)
+
+    print(f"{'file':<48} {'paragraphs':>18} {'chunker':>18}")
+    totals = {"before": [0, 0], "after": [0, 0]}
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        before = chunk_stats([p for p in content.split("\n\n") if p.strip()])
+        after = chunk_stats(chunk_document(content, path=path))
+        for key, stats in (("before", before), ("after", after)):
+            totals[key][0] += stats["chunks"]
+            totals[key][1] += stats["tokens"]
+        print(
+            f"{path[-48:]:<48} {before['chunks']:>6} / {before['max_tokens']:>5} max"
+            f" {after['chunks']:>6} / {after['max_tokens']:>5} max"
+        )
+    print(
+        f"📦 {totals['before'][0]} -> {totals['after'][0]} chunks,"
+        f" ~{totals['before'][1]} -> ~{totals['after'][1]} tokens"
+    )
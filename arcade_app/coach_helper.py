@@ -20,25 +20,20 @@ async def stream_coach_feedback(
 
     # 2. Real Gemini Execution
     try:
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-        
-        vertexai.init(
-            project=os.getenv("GOOGLE_CLOUD_PROJECT"), 
-            location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-        )
-        
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-        model = GenerativeModel(model_name)
+        from arcade_app.model_registry import get_model, default_model_name
+        from arcade_app.rate_governor import rate_governor
+        model_name = default_model_name()
+        model = get_model(model_name)
         
         # Build prompt
         prompt = _build_socratic_prompt(user_input, grade, track)
         
         # Stream
-        stream = await model.generate_content_async(prompt, stream=True)
-        async for chunk in stream:
-            if chunk.text:
-                yield chunk.text
+        async with rate_governor.slot(model_name, "coach"):
+            stream = await model.generate_content_async(prompt, stream=True)
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
 
     except Exception as e:
         # In production, we stream the error to the UI so the user sees it
@@ -58,20 +53,15 @@ async def generate_coach_feedback(
 
     # 2. Real Gemini Execution
     try:
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-        
-        vertexai.init(
-            project=os.getenv("GOOGLE_CLOUD_PROJECT"), 
-            location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-        )
-        
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-        model = GenerativeModel(model_name)
+        from arcade_app.model_registry import get_model, default_model_name
+        from arcade_app.rate_governor import rate_governor
+        model_name = default_model_name()
+        model = get_model(model_name)
         
         prompt = _build_socratic_prompt(user_input, grade, track)
         
-        response = await model.generate_content_async(prompt)
+        async with rate_governor.slot(model_name, "coach"):
+            response = await model.generate_content_async(prompt)
         return response.text
 
     except Exception as e:
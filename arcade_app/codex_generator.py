@@ -26,11 +26,9 @@ class CodexDocGenerator:
         """Lazy load Vertex AI model."""
         if self._model is None:
             try:
-                import vertexai
-                from vertexai.generative_models import GenerativeModel
+                from arcade_app.model_registry import get_model
                 
-                vertexai.init(project=self.project_id, location=self.location)
-                self._model = GenerativeModel(self.model_version)
+                self._model = get_model(self.model_version, self.location)
             except Exception as e:
                 print(f"Warning: Could not initialize Vertex AI: {e}")
                 self._model = None
@@ -109,17 +107,21 @@ class CodexDocGenerator:
             return self._generate_fallback_doc(user_prompt)
         
         try:
+            from arcade_app.rate_governor import rate_governor
+            
             # Combine system and user prompts
             full_prompt = f"{system_prompt}\n\n{user_prompt}"
             
-            response = model.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": 0.3,  # Lower temperature for consistent, factual output
-                    "max_output_tokens": 2048,
-                    "top_p": 0.8,
-                }
-            )
+            # Background priority: yields quota to interactive judge/coach calls
+            async with rate_governor.slot(self.model_version, "codex"):
+                response = await model.generate_content_async(
+                    full_prompt,
+                    generation_config={
+                        "temperature": 0.3,  # Lower temperature for consistent, factual output
+                        "max_output_tokens": 2048,
+                        "top_p": 0.8,
+                    }
+                )
             
             return response.text
         except Exception as e:
@@ -10,7 +10,8 @@ from sqlalchemy import text
 from arcade_app.models import (
     User, Profile, Project, ProjectCodexDoc, KnowledgeChunk,
     BossDefinition, BossRun, BossProgress, QuestDefinition, QuestProgress,
-    SkillNode, UserSkill, AvatarDefinition, ChatSession, TrackDefinition
+    SkillNode, UserSkill, AvatarDefinition, ChatSession, TrackDefinition,
+    OutboxEvent, EmbeddingCache
 )
 
 # Default to localhost if running outside docker, else use docker service name
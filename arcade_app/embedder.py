@@ -0,0 +1,127 @@
+"""
+Batched text embeddings for RAG indexing.
+
+`TextEmbeddingModel.get_embeddings` takes a list of inputs, but indexing
+used to send one paragraph per request. `BatchEmbedder.embed()` packs texts
+into requests bounded by item count and an estimated token budget, sends a
+few of them concurrently (each through the rate governor as background
+traffic, off the event loop since the SDK call is blocking), and returns
+the vectors in input order.
+
+    vectors = await embedder.embed(chunks)
+
+Search-time query vectors go through `embed_query()` instead, governed as
+interactive traffic so retrieval a user is waiting on is not held back by
+the reserve that bulk indexing has to leave.
+
+    query_vec = await embedder.embed_query(question)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("evalforge.rag")
+
+EMBEDDING_MODEL_NAME = "text-embedding-004"
+EMBEDDING_DIM = 768
+QUERY_AGENT = "embed_query"  # rate-governor agent for single query embeddings
+
+# text-embedding-004 limits: 250 inputs and 20k tokens per request
+MAX_BATCH_ITEMS = int(os.getenv("EVALFORGE_EMBED_BATCH_ITEMS", "250"))
+MAX_BATCH_TOKENS = int(os.getenv("EVALFORGE_EMBED_BATCH_TOKENS", "18000"))  # headroom for the estimate
+MAX_CONCURRENT_BATCHES = int(os.getenv("EVALFORGE_EMBED_CONCURRENCY", "4"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token), no tokenizer round-trip."""
+    return len(text) // 4 + 1
+
+
+def pack_batches(
+    texts: Sequence[str],
+    max_items: int = MAX_BATCH_ITEMS,
+    max_tokens: int = MAX_BATCH_TOKENS,
+) -> List[Tuple[int, int]]:
+    """
+    Splits `texts` into consecutive [start, end) ranges that respect both
+    limits. A single text over the token budget gets a batch of its own
+    (the API truncates it).
+    """
+    batches: List[Tuple[int, int]] = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+class BatchEmbedder:
+    def __init__(
+        self,
+        model: Any = None,
+        max_items: int = MAX_BATCH_ITEMS,
+        max_tokens: int = MAX_BATCH_TOKENS,
+        concurrency: int = MAX_CONCURRENT_BATCHES,
+        agent: Optional[str] = "embed",
+    ):
+        """
+        Args:
+            model: Object with `get_embeddings(list[str])` (Vertex
+                TextEmbeddingModel). None returns zero vectors (mock mode).
+            agent: Rate-governor agent for each request; None disables governing.
+        """
+        self.model = model
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.concurrency = max(1, concurrency)
+        self.agent = agent
+        self.stats = {"texts": 0, "requests": 0}
+
+    async def _embed_batch(self, batch: List[str], agent: Optional[str]) -> List[List[float]]:
+        self.stats["requests"] += 1
+        if agent is None:
+            embeddings = await asyncio.to_thread(self.model.get_embeddings, batch)
+        else:
+            from arcade_app.rate_governor import rate_governor
+            async with rate_governor.slot(EMBEDDING_MODEL_NAME, agent):
+                embeddings = await asyncio.to_thread(self.model.get_embeddings, batch)
+        if len(embeddings) != len(batch):
+            raise RuntimeError(f"Embedding API returned {len(embeddings)} vectors for {len(batch)} inputs")
+        return [list(e.values) for e in embeddings]
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embeds `texts`; result[i] is the vector of texts[i]."""
+        texts = list(texts)
+        self.stats["texts"] += len(texts)
+        if not texts:
+            return []
+        if self.model is None:
+            return [[0.0] * EMBEDDING_DIM for _ in texts]  # Mock fallback
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _run(start: int, end: int) -> None:
+            async with semaphore:
+                vectors = await self._embed_batch(texts[start:end], self.agent)
+            results[start:end] = vectors
+
+        batches = pack_batches(texts, self.max_items, self.max_tokens)
+        await asyncio.gather(*(_run(start, end) for start, end in batches))
+        logger.debug(f"Embedded {len(texts)} text(s) in {len(batches)} request(s)")
+        return results  # type: ignore[return-value]
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embeds one search query as interactive traffic (see QUERY_AGENT)."""
+        self.stats["texts"] += 1
+        if self.model is None:
+            return [0.0] * EMBEDDING_DIM  # Mock fallback
+        return (await self._embed_batch([text], QUERY_AGENT if self.agent is not None else None))[0]
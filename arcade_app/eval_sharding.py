@@ -0,0 +1,196 @@
+"""
+Distributed golden-dataset evals over the ARQ workers.
+
+The coordinator (`ShardedBatchRunner`, i.e. `batch_runner --distributed`)
+streams the dataset into shards of `shard_size` cases and enqueues one
+`grade_eval_shard` job per shard. Each worker grades its shard with the
+usual bounded concurrency and writes the results to Redis in a single
+MULTI (so a retried job replaces, never duplicates, its shard):
+
+    evalforge:eval:<run_id>:shard:<n>   list of EvalResult JSON
+    evalforge:eval:<run_id>:done        hash shard -> result count
+
+The coordinator drains finished shards as they land, appends them to
+runs/<run_id>.results.jsonl and writes the same summary record and run
+store entry as a local run, so compare_runs and --resume work unchanged.
+Wall-clock scales with the number of workers (x per-worker concurrency).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List
+
+from arcade_app.batch_runner import BatchRunner, EvalResult, RunStats
+from arcade_app.benchmark import LatencyStats
+
+logger = logging.getLogger("evalforge.eval_sharding")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+KEY_PREFIX = "evalforge:eval"
+RESULT_TTL_SEC = 24 * 3600
+DEFAULT_SHARD_SIZE = 50
+POLL_INTERVAL_SEC = 1.0
+
+
+def shard_key(run_id: str, shard: int) -> str:
+    return f"{KEY_PREFIX}:{run_id}:shard:{shard}"
+
+
+def done_key(run_id: str) -> str:
+    return f"{KEY_PREFIX}:{run_id}:done"
+
+
+async def grade_eval_shard(redis: Any, run_id: str, shard: int, cases: List[Dict[str, Any]], concurrency: int = 4) -> int:
+    """
+    Worker side: grade one shard and publish its results.
+
+    Args:
+        redis: The worker's Redis connection (ARQ's ctx["redis"]).
+        run_id: Coordinator run id (namespaces the Redis keys).
+        shard: Shard number.
+        cases: Dataset records ({"id", "input", "track", "expected_score"}).
+        concurrency: Cases graded in parallel inside this worker.
+
+    Returns:
+        Number of results written.
+    """
+    from arcade_app import grading_helper
+
+    expected = {c["id"]: c.get("expected_score", 0) for c in cases}
+    items = [{"id": c["id"], "input": c["input"], "track": c.get("track", "default")} for c in cases]
+
+    lines = []
+    async for item in grading_helper.grade_many_as_completed(items, concurrency=concurrency):
+        result = BatchRunner._to_result(item, expected[item["id"]])
+        lines.append(json.dumps(asdict(result)))
+
+    # One transaction: a retried shard overwrites its list instead of appending twice
+    key = shard_key(run_id, shard)
+    pipe = redis.pipeline(transaction=True)
+    pipe.delete(key)
+    if lines:
+        pipe.rpush(key, *lines)
+    pipe.expire(key, RESULT_TTL_SEC)
+    pipe.hset(done_key(run_id), str(shard), len(lines))
+    pipe.expire(done_key(run_id), RESULT_TTL_SEC)
+    await pipe.execute()
+
+    logger.info(f"Eval {run_id} shard {shard}: {len(lines)} result(s)")
+    return len(lines)
+
+
+class ShardedBatchRunner(BatchRunner):
+    """
+    BatchRunner whose cases are graded by ARQ workers instead of this process.
+
+    `concurrency` is the per-worker parallelism passed to each shard job.
+    Shards still missing after `timeout_sec` are left out of the results file;
+    `--resume <run_id>` re-shards exactly those cases.
+    """
+
+    def __init__(
+        self,
+        *args,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        timeout_sec: float = 3600.0,
+        pool: Any = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.shard_size = max(1, shard_size)
+        self.timeout_sec = timeout_sec
+        self._pool = pool
+
+    async def _get_pool(self):
+        if self._pool is None:
+            from arq import create_pool
+            from arq.connections import RedisSettings
+            self._pool = await create_pool(RedisSettings.from_dsn(REDIS_URL))
+        return self._pool
+
+    def _iter_shards(self, completed_ids: set) -> Iterator[List[Dict[str, Any]]]:
+        shard: List[Dict[str, Any]] = []
+        for case in self.iter_dataset():
+            if case["id"] in completed_ids:
+                continue
+            shard.append({
+                "id": case["id"],
+                "input": case["input"],
+                "track": case.get("track", "default"),
+                "expected_score": case.get("expected_score", 0),
+            })
+            if len(shard) >= self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    async def run(self) -> RunStats:
+        self.prepare_subset()
+        completed = self.load_completed() if self.resumed else {}
+        if self.resumed:
+            print(f"♻️  Resuming {self.run_id}: {len(completed)} case(s) already done")
+
+        dataset_ids = self.dataset_ids()
+        self.stats = RunStats()
+        self.latency = LatencyStats()
+        for case_id, result in completed.items():
+            if case_id in dataset_ids:
+                self.stats.add(result)
+        completed_ids = set(completed) & dataset_ids
+        del completed, dataset_ids
+
+        pool = await self._get_pool()
+        start_time = time.time()
+
+        # 1. Fan out (a fresh attempt id keeps resumed shards apart from stale ones)
+        attempt = f"{self.run_id}:{uuid.uuid4().hex[:8]}"
+        n_shards = 0
+        for n, cases in enumerate(self._iter_shards(completed_ids)):
+            await pool.enqueue_job(
+                "grade_eval_shard", attempt, n, cases, self.concurrency,
+                _job_id=f"eval:{attempt}:{n}",
+            )
+            n_shards += 1
+        print(f"🚀 Run {self.run_id}: enqueued {n_shards} shard(s) of ≤{self.shard_size} case(s) for the workers")
+
+        # 2. Drain shards as workers finish them
+        merged: set = set()
+        deadline = start_time + self.timeout_sec
+        with open(self.results_path, "a") as out:
+            while len(merged) < n_shards:
+                finished = await pool.hkeys(done_key(attempt))
+                for raw in finished:
+                    shard = int(raw)
+                    if shard in merged:
+                        continue
+                    key = shard_key(attempt, shard)
+                    for line in await pool.lrange(key, 0, -1):
+                        result = EvalResult(**json.loads(line))
+                        self.stats.add(result)
+                        self.latency.add(result.latency_ms, result.track, result.stages, error=result.error is not None)
+                        out.write(json.dumps(asdict(result)) + "\n")
+                    out.flush()
+                    await pool.delete(key)
+                    merged.add(shard)
+                    print(f"   📦 shard {shard} merged ({len(merged)}/{n_shards}) | {self.stats.total} case(s) | {time.time() - start_time:.0f}s")
+
+                if len(merged) < n_shards:
+                    if time.time() > deadline:
+                        missing = sorted(set(range(n_shards)) - merged)
+                        print(f"⚠️ Timed out waiting for shard(s) {missing}; finish them with --resume {self.run_id}")
+                        break
+                    await asyncio.sleep(POLL_INTERVAL_SEC)
+
+        await pool.delete(done_key(attempt))
+        self._save_run(time.time() - start_time)
+        return self.stats
+
+    def _extra_meta(self) -> Dict[str, Any]:
+        return {**super()._extra_meta(), "distributed": True, "shard_size": self.shard_size}
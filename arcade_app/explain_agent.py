@@ -120,11 +120,15 @@ class ExplainAgent:
                 HumanMessage(content=user_input),
             ]
 
-            async for chunk in llm.astream(messages):
-                # LangChain chunk has .content
-                text = getattr(chunk, "content", None)
-                if text:
-                    yield {"event": "text_delta", "data": text}
+            from arcade_app.model_registry import default_model_name
+            from arcade_app.rate_governor import rate_governor
+
+            async with rate_governor.slot(default_model_name(), "explain"):
+                async for chunk in llm.astream(messages):
+                    # LangChain chunk has .content
+                    text = getattr(chunk, "content", None)
+                    if text:
+                        yield {"event": "text_delta", "data": text}
 
         except Exception as exc:
             logger.exception("ExplainAgent LLM error for user=%s: %s", user_id, exc)
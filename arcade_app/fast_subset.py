@@ -0,0 +1,229 @@
+"""
+Stratified "fast eval" subset of the golden dataset.
+
+`batch_runner --fast` grades only a small, representative slice of the
+dataset and reports the full-set metrics it implies, with error bars.
+
+Strata are (track, expected-score bucket, historical disagreement), where
+disagreement is how often the case failed its expected score across the
+runs in the run store (stable / flaky / hard / new). Each stratum gets a
+proportional share of the budget (at least one case), so rare tracks and
+known-flaky cases are always represented. Picks inside a stratum are
+ordered by a hash of the case id, so the subset only changes when the
+data does.
+
+The subset is persisted to runs/fast_subset.json together with a
+fingerprint of the dataset and is recomputed when the dataset changes
+(or on --refresh-subset).
+
+Estimates use the standard stratified estimator:
+
+    mean = sum_h W_h * mean_h                       W_h = N_h / N
+    var  = sum_h W_h^2 * (1 - n_h / N_h) * s_h^2 / n_h
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("evalforge.fast_subset")
+
+DEFAULT_FRACTION = 0.1
+MIN_SIZE = 20
+SCORE_BUCKET = 20  # expected_score 0-19, 20-39, ... 100
+Z_95 = 1.96
+
+
+def dataset_fingerprint(dataset_path: str) -> str:
+    """sha256 of the dataset bytes (streamed)."""
+    digest = hashlib.sha256()
+    with open(dataset_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _disagreement_bucket(history: Optional[Tuple[int, float]]) -> str:
+    if not history or history[0] == 0:
+        return "new"
+    rate = history[1]
+    if rate == 0:
+        return "stable"
+    return "flaky" if rate < 0.5 else "hard"
+
+
+def stratum_of(case: Dict[str, Any], history: Optional[Tuple[int, float]] = None) -> str:
+    bucket = int(case.get("expected_score", 0)) // SCORE_BUCKET * SCORE_BUCKET
+    return f"{case.get('track', 'default')}|{bucket}|{_disagreement_bucket(history)}"
+
+
+def _pick_order(case_id: str) -> str:
+    return hashlib.sha1(case_id.encode("utf-8")).hexdigest()
+
+
+def select_subset(
+    cases: Iterable[Dict[str, Any]],
+    fail_rates: Dict[str, Tuple[int, float]],
+    size: Optional[int] = None,
+    fraction: float = DEFAULT_FRACTION,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Proportional stratified selection.
+
+    Args:
+        cases: Dataset records (only id / track / expected_score are used).
+        fail_rates: case_id -> (runs seen, fail rate), from RunStore.case_fail_rates.
+        size: Target subset size; defaults to `fraction` of the dataset (min MIN_SIZE).
+        fraction: Used when `size` is not given.
+
+    Returns:
+        stratum -> {"population": N_h, "ids": [selected case ids]}
+    """
+    members: Dict[str, List[str]] = defaultdict(list)
+    for case in cases:
+        members[stratum_of(case, fail_rates.get(case["id"]))].append(case["id"])
+
+    total = sum(len(ids) for ids in members.values())
+    if not total:
+        return {}
+    target = size if size is not None else max(MIN_SIZE, math.ceil(total * fraction))
+    target = min(target, total)
+
+    # Largest-remainder allocation, then at least one pick per stratum
+    quotas = {h: target * len(ids) / total for h, ids in members.items()}
+    alloc = {h: max(1, int(q)) for h, q in quotas.items()}
+    leftover = target - sum(alloc.values())
+    for h in sorted(quotas, key=lambda h: quotas[h] - int(quotas[h]), reverse=True):
+        if leftover <= 0:
+            break
+        if alloc[h] < len(members[h]):
+            alloc[h] += 1
+            leftover -= 1
+
+    strata = {}
+    for h in sorted(members):
+        ids = sorted(members[h], key=_pick_order)
+        strata[h] = {"population": len(ids), "ids": sorted(ids[: min(alloc[h], len(ids))])}
+    return strata
+
+
+def load_or_build(
+    dataset_path: str,
+    subset_path: str,
+    store_path: Optional[str] = None,
+    size: Optional[int] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Returns the persisted subset, rebuilding it when the dataset changed,
+    when a different `size` is requested, or when `refresh` is set.
+    """
+    fingerprint = dataset_fingerprint(dataset_path)
+    if not refresh and os.path.exists(subset_path):
+        with open(subset_path, "r") as f:
+            subset = json.load(f)
+        if subset.get("dataset_fingerprint") == fingerprint and (size is None or subset.get("requested_size") == size):
+            return subset
+
+    fail_rates: Dict[str, Tuple[int, float]] = {}
+    history_runs = 0
+    if store_path and os.path.exists(store_path):
+        from arcade_app.run_store import RunStore
+        store = RunStore(store_path)
+        try:
+            fail_rates = store.case_fail_rates()
+            history_runs = len(store.list_runs(last=100))
+        finally:
+            store.close()
+
+    def _cases():
+        with open(dataset_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    strata = select_subset(_cases(), fail_rates, size=size)
+    subset = {
+        "dataset_path": dataset_path,
+        "dataset_fingerprint": fingerprint,
+        "created_at": datetime.now().isoformat(),
+        "history_runs": history_runs,
+        "requested_size": size,
+        "size": sum(len(s["ids"]) for s in strata.values()),
+        "population": sum(s["population"] for s in strata.values()),
+        "strata": strata,
+    }
+    os.makedirs(os.path.dirname(subset_path) or ".", exist_ok=True)
+    with open(subset_path, "w") as f:
+        json.dump(subset, f, indent=2)
+    logger.info(f"Fast subset rebuilt: {subset['size']}/{subset['population']} cases in {len(strata)} strata")
+    return subset
+
+
+def subset_ids(subset: Dict[str, Any]) -> Dict[str, str]:
+    """case_id -> stratum for every selected case."""
+    return {case_id: h for h, s in subset["strata"].items() for case_id in s["ids"]}
+
+
+def _stratified(values: Dict[str, List[float]], subset: Dict[str, Any]) -> Tuple[float, float]:
+    """Stratified mean and its standard error for per-stratum samples."""
+    N = subset["population"]
+    sampled = {h: v for h, v in values.items() if v}
+    if not N or not sampled:
+        return 0.0, 0.0
+
+    # Strata with a single observation borrow the pooled variance
+    pooled = [x for v in sampled.values() for x in v]
+    pooled_mean = sum(pooled) / len(pooled)
+    pooled_var = sum((x - pooled_mean) ** 2 for x in pooled) / max(1, len(pooled) - 1)
+
+    # Reweight over the strata that were actually graded
+    covered = sum(subset["strata"][h]["population"] for h in sampled)
+    mean, var = 0.0, 0.0
+    for h, v in sampled.items():
+        N_h = subset["strata"][h]["population"]
+        n_h = len(v)
+        W_h = N_h / covered
+        m_h = sum(v) / n_h
+        s2_h = sum((x - m_h) ** 2 for x in v) / (n_h - 1) if n_h > 1 else pooled_var
+        mean += W_h * m_h
+        var += W_h ** 2 * (1 - n_h / N_h) * s2_h / n_h
+    return mean, math.sqrt(var)
+
+
+def estimate_full_set(results: Iterable[Any], subset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Full-dataset avg score / pass rate implied by a subset run, with 95% error bars.
+
+    Args:
+        results: EvalResult objects of the subset run.
+        subset: The subset the run used.
+    """
+    strata = subset_ids(subset)
+    scores: Dict[str, List[float]] = defaultdict(list)
+    passes: Dict[str, List[float]] = defaultdict(list)
+    graded = 0
+    for r in results:
+        h = strata.get(r.case_id)
+        if h is None:
+            continue
+        scores[h].append(float(r.score))
+        passes[h].append(1.0 if r.passed else 0.0)
+        graded += 1
+
+    avg, avg_se = _stratified(scores, subset)
+    rate, rate_se = _stratified(passes, subset)
+    return {
+        "graded_cases": graded,
+        "population": subset["population"],
+        "avg_score": round(avg, 1),
+        "avg_score_ci95": round(Z_95 * avg_se, 1),
+        "pass_rate_pct": round(rate * 100, 1),
+        "pass_rate_ci95_pct": round(Z_95 * rate_se * 100, 1),
+    }
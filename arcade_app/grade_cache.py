@@ -0,0 +1,176 @@
+"""
+Content-addressed cache for Judge grades.
+
+Two tiers:
+- a bounded in-process LRU (per worker, microseconds)
+- a shared Redis tier (across Cloud Run instances), enabled when REDIS_URL is set
+
+Keys are built from the normalized submission hash, the track, the model
+version and the judge prompt version, so a prompt or model bump naturally
+misses. Only the raw LLM grade is cached; rubric weighting is re-applied on
+every hit, and `invalidate()` drops entries explicitly when rubrics change.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .session_state import normalize_for_hash, sha1_of_text
+
+try:
+    from .metrics import JUDGE_GRADE_TOTAL
+except ImportError:  # prometheus_client is optional outside the Cloud Run image
+    JUDGE_GRADE_TOTAL = None
+
+logger = logging.getLogger("evalforge.judge")
+
+KEY_PREFIX = "evalforge:grade"
+DEFAULT_MAX_ENTRIES = int(os.getenv("EVALFORGE_GRADE_CACHE_SIZE", "2048"))
+DEFAULT_LRU_TTL_SEC = int(os.getenv("EVALFORGE_GRADE_CACHE_TTL_SEC", "3600"))
+DEFAULT_REDIS_TTL_SEC = int(os.getenv("EVALFORGE_GRADE_CACHE_REDIS_TTL_SEC", str(7 * 24 * 3600)))
+# After a Redis error, skip the shared tier for this long instead of paying
+# a connect timeout on every grade.
+REDIS_RETRY_AFTER_SEC = 30.0
+
+
+def grade_cache_key(user_input: str, track: str, model_version: str, prompt_version: str) -> str:
+    digest = sha1_of_text(normalize_for_hash(user_input))
+    return f"{KEY_PREFIX}:{track}:{model_version}:{prompt_version}:{digest}"
+
+
+def _count(result: str) -> None:
+    if JUDGE_GRADE_TOTAL is not None:
+        JUDGE_GRADE_TOTAL.labels(result=result).inc()  # type: ignore[attr-defined]
+
+
+class LRUTTLCache:
+    """Bounded LRU with per-entry expiry. Not thread-safe; used from the event loop."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_sec: float = DEFAULT_LRU_TTL_SEC):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_sec, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        doomed = [k for k in self._data if k.startswith(prefix)]
+        for k in doomed:
+            del self._data[k]
+        return len(doomed)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class GradeCache:
+    """LRU in front of Redis, keyed by `grade_cache_key`."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        lru_ttl_sec: float = DEFAULT_LRU_TTL_SEC,
+        redis_ttl_sec: int = DEFAULT_REDIS_TTL_SEC,
+        redis_url: Optional[str] = None,
+    ):
+        self.lru = LRUTTLCache(max_entries, lru_ttl_sec)
+        self.redis_ttl_sec = redis_ttl_sec
+        self.redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            from redis.asyncio import Redis
+            self._redis = Redis.from_url(self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        return self._redis
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Grade cache Redis tier unavailable: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SEC
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        from arcade_app.cassette import cassette
+        if cassette.mode == "record":
+            # A cache hit would keep the LLM call out of the cassette
+            return None
+
+        value = self.lru.get(key)
+        if value is not None:
+            self.stats["lru_hits"] += 1
+            _count("cache_lru")
+            return value
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(key)
+            except Exception as e:
+                self._redis_failed(e)
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.lru.set(key, value)
+                self.stats["redis_hits"] += 1
+                _count("cache_redis")
+                return value
+
+        self.stats["misses"] += 1
+        _count("miss")
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.lru.set(key, value)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, json.dumps(value), ex=self.redis_ttl_sec)
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def invalidate(self, track: Optional[str] = None) -> int:
+        """
+        Drop cached grades for one track (or everything). Call this after
+        editing a rubric or judge prompt without bumping its version.
+        """
+        prefix = f"{KEY_PREFIX}:{track}:" if track else f"{KEY_PREFIX}:"
+        removed = self.lru.delete_prefix(prefix)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                async for k in redis.scan_iter(match=f"{prefix}*", count=500):
+                    removed += await redis.delete(k)
+            except Exception as e:
+                self._redis_failed(e)
+        return removed
+
+    def hit_rate(self) -> float:
+        hits = self.stats["lru_hits"] + self.stats["redis_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+# Singleton instance
+grade_cache = GradeCache()
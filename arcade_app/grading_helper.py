@@ -2,11 +2,18 @@ import os
 import asyncio
 import json
 import logging
-from typing import Dict, Any
+import re
+import time
+from typing import Iterable, Dict, Any, AsyncGenerator, Callable, List, Optional, Sequence, Union
+
+from arcade_app.benchmark import stage, start_stage_capture
 
 # Configure logging
 logger = logging.getLogger("evalforge.judge")
 
+# Bump whenever the judge prompt below changes so cached grades miss.
+JUDGE_PROMPT_VERSION = "v1"
+
 async def grade_submission(user_input: str, track: str = "default") -> Dict[str, Any]:
     """
     Grades submission using Vertex AI. 
@@ -16,57 +23,296 @@ async def grade_submission(user_input: str, track: str = "default") -> Dict[str,
     # 1. Check if we are explicitly in Mock Mode (Dev only)
     if os.getenv("EVALFORGE_MOCK_GRADING") == "1":
         from .mock_grader import mock_grader_instance
-        return await mock_grader_instance.grade(user_input, track)
+        # Same shape as a real grade (weighted_score / rubric_used)
+        with stage("model_call"):
+            raw = await mock_grader_instance.grade(user_input, track)
+        with stage("final_grade"):
+            return _calculate_final_grade(raw, track)
+
+    # 2. Content-addressed cache (identical submissions across users/sessions)
+    from arcade_app.grade_cache import grade_cache, grade_cache_key
+    from arcade_app.model_registry import default_model_name
+    
+    cache_key = grade_cache_key(user_input, track, default_model_name(), JUDGE_PROMPT_VERSION)
+    with stage("cache_lookup"):
+        cached = await grade_cache.get(cache_key)
+    if cached is not None:
+        with stage("final_grade"):
+            return _calculate_final_grade(cached, track)
+
+    # 3. Real Gemini Execution (concurrent identical submissions share one call)
+    from arcade_app.singleflight import judge_flight
+
+    async def _evaluate() -> Dict[str, Any]:
+        data = await _call_judge_model(user_input, track)
+        # Cache the raw LLM grade; weighting is re-applied on every hit
+        await grade_cache.set(cache_key, data)
+        return data
 
-    # 2. Real Gemini Execution
     try:
-        # Lazy imports are still good practice for startup speed
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-        
-        project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-        location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-        
-        # Initialize Vertex
-        vertexai.init(project=project_id, location=location)
-        model = GenerativeModel(model_name)
-        
-        # Construct Prompt (Standardized Judge Prompt)
-        from arcade_app.persona_helper import wrap_prompt_with_persona
-        
-        base_task = f"""
-        TASK: Evaluate the following code based on the '{track}' track.
-        INPUT: {user_input}
-        
-        OUTPUT FORMAT (JSON ONLY):
-        {{
-            "coverage": <int 0-5>,
-            "correctness": <int 0-5>,
-            "clarity": <int 0-5>,
-            "comment": "<string>"
-        }}
-        """
-        
-        prompt = wrap_prompt_with_persona(base_task, "judge")
-        
-        # Call with timeout protection
-        response = await asyncio.wait_for(
-            model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"}),
-            timeout=15.0
-        )
-        
-        # Parse Result
-        data = json.loads(response.text)
+        data = await judge_flight.do(cache_key, _evaluate)
         
         # Add metadata (Weighted Score logic)
-        return _calculate_final_grade(data, track)
+        with stage("final_grade"):
+            return _calculate_final_grade(data, track)
 
     except Exception as e:
         logger.error(f"CRITICAL: Vertex AI Grading Failed: {e}")
         # In Prod, we re-raise. We do NOT fallback to mock.
         raise RuntimeError(f"Judge System Offline: {e}")
 
+GRADE_FIELDS = ("coverage", "correctness", "clarity", "comment")
+_GRADE_FIELD_RE = re.compile(r'"(%s)"\s*:\s*' % "|".join(GRADE_FIELDS))
+_JSON_DECODER = json.JSONDecoder()
+
+class _GradeFieldParser:
+    """
+    Incrementally decodes top-level grade fields from a streamed JSON object.
+    `feed()` returns the (field, value) pairs completed by the new chunk.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[tuple]:
+        self.buffer += chunk
+        completed = []
+        for m in _GRADE_FIELD_RE.finditer(self.buffer):
+            key = m.group(1)
+            if key in self.fields:
+                continue
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, m.end())
+            except ValueError:
+                continue  # value not fully streamed yet
+            if not isinstance(value, str) and end >= len(self.buffer):
+                continue  # a number may still be growing ("4" -> "45")
+            self.fields[key] = value
+            completed.append((key, value))
+        return completed
+
+def _build_judge_prompt(user_input: str, track: str) -> str:
+    from arcade_app.persona_helper import wrap_prompt_with_persona
+    
+    base_task = f"""
+    TASK: Evaluate the following code based on the '{track}' track.
+    INPUT: {user_input}
+    
+    OUTPUT FORMAT (JSON ONLY):
+    {{
+        "coverage": <int 0-5>,
+        "correctness": <int 0-5>,
+        "clarity": <int 0-5>,
+        "comment": "<string>"
+    }}
+    """
+    
+    return wrap_prompt_with_persona(base_task, "judge")
+
+async def _call_judge_model(
+    user_input: str,
+    track: str,
+    on_field: Optional[Callable[[str, Any], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Single Gemini judge call; returns the raw (unweighted) grade.
+    With `on_field`, the response is streamed and each grade field is
+    reported as soon as it has been decoded.
+    """
+    # Warm, process-wide model handle (no per-request vertexai.init)
+    from arcade_app.model_registry import get_model, default_model_name
+    from arcade_app.rate_governor import rate_governor
+    model_name = default_model_name()
+    model = get_model(model_name)
+    
+    # Construct Prompt (Standardized Judge Prompt)
+    with stage("prompt_build"):
+        prompt = _build_judge_prompt(user_input, track)
+    generation_config = {"response_mime_type": "application/json"}
+    
+    async def _stream_text() -> str:
+        parser = _GradeFieldParser()
+        stream = await model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+        async for chunk in stream:
+            for key, value in parser.feed(chunk.text or ""):
+                on_field(key, value)
+        return parser.buffer
+    
+    # Call with timeout protection (cluster-wide quota shared with other instances)
+    # (time spent waiting for a slot lands in the "other" stage)
+    async with rate_governor.slot(model_name, "judge"):
+        with stage("model_call"):
+            if on_field is None:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, generation_config=generation_config),
+                    timeout=15.0
+                )
+                text = response.text
+            else:
+                text = await asyncio.wait_for(_stream_text(), timeout=15.0)
+    
+    # Parse Result
+    with stage("json_parse"):
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Judge returned non-dict JSON")
+    return data
+
+async def stream_grade_submission(user_input: str, track: str = "default") -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Streaming variant of `grade_submission` for the SSE judge path.
+    
+    Yields {"type": "partial", "field": ..., "value": ...} as each of coverage,
+    correctness, clarity and comment is decoded, then exactly one
+    {"type": "grade", "grade": ...} with the weighted result. Cache hits and
+    coalesced requests replay the fields instantly.
+    """
+    emitted: set = set()
+
+    def _partials(data: Dict[str, Any]):
+        for key in GRADE_FIELDS:
+            if key in data and key not in emitted:
+                emitted.add(key)
+                yield {"type": "partial", "field": key, "value": data[key]}
+
+    if os.getenv("EVALFORGE_MOCK_GRADING") == "1":
+        grade = await grade_submission(user_input, track)
+        for partial in _partials(grade):
+            yield partial
+        yield {"type": "grade", "grade": grade}
+        return
+
+    from arcade_app.grade_cache import grade_cache, grade_cache_key
+    from arcade_app.model_registry import default_model_name
+    from arcade_app.singleflight import judge_flight
+    
+    cache_key = grade_cache_key(user_input, track, default_model_name(), JUDGE_PROMPT_VERSION)
+    data = await grade_cache.get(cache_key)
+    
+    if data is None:
+        fields: asyncio.Queue = asyncio.Queue()
+
+        async def _evaluate() -> Dict[str, Any]:
+            raw = await _call_judge_model(
+                user_input, track, on_field=lambda k, v: fields.put_nowait((k, v))
+            )
+            await grade_cache.set(cache_key, raw)
+            return raw
+
+        # If an identical grade is already in flight we join it and simply
+        # receive no partials until it resolves.
+        flight = asyncio.ensure_future(judge_flight.do(cache_key, _evaluate))
+        try:
+            while True:
+                getter = asyncio.ensure_future(fields.get())
+                done, _ = await asyncio.wait({getter, flight}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                key, value = getter.result()
+                if key not in emitted:
+                    emitted.add(key)
+                    yield {"type": "partial", "field": key, "value": value}
+            data = flight.result()
+        except Exception as e:
+            logger.error(f"CRITICAL: Vertex AI Grading Failed: {e}")
+            raise RuntimeError(f"Judge System Offline: {e}")
+        finally:
+            flight.cancel()
+
+    for partial in _partials(data):
+        yield partial
+    yield {"type": "grade", "grade": _calculate_final_grade(data, track)}
+
+BatchItem = Union[str, Dict[str, Any]]
+
+async def grade_many_as_completed(
+    submissions: Iterable[BatchItem],
+    track: str = "default",
+    concurrency: int = 8,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Grade many submissions with at most `concurrency` in flight, yielding each
+    result as soon as it finishes (completion order, not input order).
+    
+    Items are either the raw input string or a dict with "input" and optional
+    "id" / "track" overrides. A failing item yields {"ok": False, "error": ...}
+    instead of aborting the batch. Every result carries `latency_ms` and a
+    per-stage breakdown in `stages` (see benchmark).
+
+    `submissions` may be any iterable (e.g. a generator over a JSONL file);
+    it is consumed lazily, so only `concurrency` items are held at once.
+    """
+    concurrency = max(1, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _grade_one(index: int, item: BatchItem) -> Dict[str, Any]:
+        if isinstance(item, dict):
+            user_input = item.get("input", "")
+            item_track = item.get("track") or track
+            item_id = item.get("id")
+        else:
+            user_input, item_track, item_id = item, track, None
+
+        async with semaphore:
+            stages = start_stage_capture()  # this task's own context
+            t0 = time.perf_counter()
+            try:
+                grade = await grade_submission(user_input, track=item_track)
+                outcome = {"ok": True, "grade": grade, "error": None}
+            except Exception as e:
+                outcome = {"ok": False, "grade": None, "error": str(e)}
+            latency_ms = (time.perf_counter() - t0) * 1000
+        stages["other"] = max(0.0, latency_ms - sum(stages.values()))
+
+        return {
+            "index": index,
+            "id": item_id,
+            "track": item_track,
+            "latency_ms": round(latency_ms, 1),
+            "stages": {name: round(ms, 2) for name, ms in stages.items()},
+            **outcome,
+        }
+
+    source = enumerate(submissions)
+    in_flight: set = set()
+
+    def _fill() -> None:
+        while len(in_flight) < concurrency:
+            try:
+                index, item = next(source)
+            except StopIteration:
+                return
+            in_flight.add(asyncio.ensure_future(_grade_one(index, item)))
+
+    try:
+        _fill()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                in_flight.discard(task)
+            _fill()
+            for task in done:
+                yield task.result()
+    finally:
+        for t in in_flight:
+            t.cancel()
+
+async def grade_many(
+    submissions: Sequence[BatchItem],
+    track: str = "default",
+    concurrency: int = 8,
+) -> List[Dict[str, Any]]:
+    """
+    Grade many submissions with bounded parallelism; results keep input order.
+    See `grade_many_as_completed` for the per-item result shape.
+    """
+    results: List[Dict[str, Any]] = [None] * len(submissions)  # type: ignore[list-item]
+    async for item in grade_many_as_completed(submissions, track=track, concurrency=concurrency):
+        results[item["index"]] = item
+    return results
+
 def _calculate_final_grade(raw_grade: Dict, track: str) -> Dict:
     """Helper to add the weighted_score math."""
     # (Reuse your existing math logic here)
@@ -136,17 +382,13 @@ async def judge_boss_submission(user_id: str, encounter_id: int, code: str) -> i
         """
         
         try:
-            import vertexai
-            from vertexai.generative_models import GenerativeModel
-            
-            project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-            location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-            model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-            
-            vertexai.init(project=project_id, location=location)
-            model = GenerativeModel(model_name)
+            from arcade_app.model_registry import get_model, default_model_name
+            from arcade_app.rate_governor import rate_governor
+            model_name = default_model_name()
+            model = get_model(model_name)
             
-            response = await model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
+            async with rate_governor.slot(model_name, "judge"):
+                response = await model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
             data = json.loads(response.text)
             
             return int(data.get("weighted_score", 0))
@@ -274,11 +516,22 @@ async def judge_boss_with_rubric(
             }
         choice = BossEvalLLMChoice.model_validate(choice_data)
     else:
-        # Real ZERO call via LLM
-        from .llm import call_zero_boss_judge
+        # Real ZERO call via LLM (async: never blocks the event loop).
+        # Identical submissions against the same rubric share one in-flight call.
+        from .llm import call_zero_boss_judge_async
+        from .singleflight import zero_boss_flight
+        from .session_state import normalize_for_hash, sha1_of_text
+        
+        submission_hash = sha1_of_text(
+            normalize_for_hash(json.dumps(submission_context, sort_keys=True, default=str))
+        )
+        flight_key = f"{rubric.id}:{submission_hash}"
         
         try:
-            zero_resp = call_zero_boss_judge(rubric=rubric, payload=zero_payload)
+            zero_resp = await zero_boss_flight.do(
+                flight_key,
+                lambda: call_zero_boss_judge_async(rubric=rubric, payload=zero_payload),
+            )
             choice = BossEvalLLMChoice.model_validate(zero_resp)
         except Exception as e:
             logger.error(f"ZERO boss judge failed: {e}")
@@ -325,22 +578,18 @@ async def stream_coach_feedback(user_input: str, grade_result: Dict[str, Any], t
     Streams constructive feedback based on the grade.
     """
     try:
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-        
-        project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-        location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-        
-        vertexai.init(project=project_id, location=location)
-        model = GenerativeModel(model_name)
+        from arcade_app.model_registry import get_model, default_model_name
+        from arcade_app.rate_governor import rate_governor
+        model_name = default_model_name()
+        model = get_model(model_name)
         
         prompt = f"Provide feedback on code that got coverage={grade_result.get('coverage')}..."
         
-        stream = await model.generate_content_async(prompt, stream=True)
-        async for chunk in stream:
-            if chunk.text:
-                yield chunk.text
+        async with rate_governor.slot(model_name, "coach"):
+            stream = await model.generate_content_async(prompt, stream=True)
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
                 
     except Exception as e:
         logger.error(f"Feedback stream failed: {e}")
@@ -53,6 +53,7 @@ async def ingest_boss_codex():
                         if existing:
                             existing.content = post.content
                             existing.metadata_json = meta
+                            existing.world_id = meta["world_id"]
                             session.add(existing)
                             print(f"  - Updated {slug}")
                         else:
@@ -61,6 +62,7 @@ async def ingest_boss_codex():
                                 source_type="codex",
                                 content=post.content,
                                 metadata_json=meta,
+                                world_id=meta["world_id"],
                                 chunk_index=0,
                                 embedding=[0.0] * 768
                             )
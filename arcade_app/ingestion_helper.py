@@ -8,7 +8,7 @@ from datetime import datetime
 from typing import List, Dict
 from redis.asyncio import Redis
 from sqlmodel import select
-from arcade_app.rag_helper import index_content
+from arcade_app.rag_helper import index_content, index_many
 from arcade_app.database import get_session
 from arcade_app.models import Project, ProjectCodexDoc
 from arcade_app.codex_scanner import RepoScanner
@@ -24,12 +24,27 @@ ALLOWED_EXTENSIONS = {
     ".dockerignore", ".gitignore"
 }
 
+# Files are embedded/committed in groups so chunks from many small files
+# share embedding requests (flush at whichever limit is hit first)
+INDEX_FLUSH_FILES = 50
+INDEX_FLUSH_CHARS = 2_000_000
+
 # Directories to strictly ignore
 IGNORE_DIRS = {
     ".git", "node_modules", "__pycache__", "venv", "env", "dist", "build", ".next", ".idea", ".vscode"
 }
 
-async def publish_progress(project_id: str, message: str, percent: int, eta_seconds: int = None):
+def embed_cache_stats(totals: dict) -> dict:
+    """Hit/miss summary of the embedding cache for sync_progress events."""
+    chunks = totals.get("chunks", 0)
+    hits = totals.get("cache_hits", 0)
+    return {
+        "hits": hits,
+        "misses": chunks - hits,
+        "hit_rate": round(hits / chunks, 3) if chunks else 0.0,
+    }
+
+async def publish_progress(project_id: str, message: str, percent: int, eta_seconds: int = None, extra: dict = None):
     """Helper to send updates to the frontend via Redis Pub/Sub."""
     try:
         redis = Redis.from_url(REDIS_URL)
@@ -40,6 +55,8 @@ async def publish_progress(project_id: str, message: str, percent: int, eta_seco
             "percent": percent,
             "eta_seconds": eta_seconds
         }
+        if extra:
+            event.update(extra)
         await redis.publish("game_events", json.dumps(event))
         await redis.close()
     except Exception as e:
@@ -92,7 +109,9 @@ async def ingest_project_repo(project_id: str, repo_url: str):
             await index_content(
                 source_type="repo",
                 source_id=f"{project_id}::PROJECT_MAP",
-                content=f"File: PROJECT_MAP.md\nProject: {project_id}\n\n{map_content}"
+                content=map_content,
+                project_id=project_id,
+                header=f"File: PROJECT_MAP.md\nProject: {project_id}\n\n",
             )
             # -------------------------------
             
@@ -218,6 +237,30 @@ async def ingest_project_repo(project_id: str, repo_url: str):
             start_time = time.time()  # Start timer for ETA calculation
             
             # 3. Index Loop
+            batch: List[tuple] = []
+            batch_headers: Dict[str, str] = {}
+            batch_chars = 0
+            embed_totals = {"chunks": 0, "cache_hits": 0, "embedded": 0}
+            chunk_report: Dict[str, Dict[str, int]] = {}  # per-file chunk counts / token sizes
+
+            def _cache_progress() -> dict:
+                if not embed_totals["chunks"]:
+                    return {}
+                return {"embed_cache": embed_cache_stats(embed_totals)}
+
+            async def _flush():
+                nonlocal batch, batch_headers, batch_chars
+                if not batch:
+                    return
+                try:
+                    stats = await index_many("repo", batch, project_id=project_id, headers=batch_headers)
+                    for key in embed_totals:
+                        embed_totals[key] += stats.get(key, 0)
+                    chunk_report.update(stats.get("files", {}))
+                except Exception as e:
+                    print(f"⚠️ Failed to index {len(batch)} file(s): {e}")
+                batch, batch_headers, batch_chars = [], {}, 0
+
             for idx, file_path in enumerate(files_to_index):
                 # Calculate progress (50% to 90%) - shifted because of Codex gen
                 progress = 50 + int((idx / total_files) * 40)
@@ -230,7 +273,7 @@ async def ingest_project_repo(project_id: str, repo_url: str):
                     remaining_files = total_files - idx
                     eta = int(remaining_files / rate) if rate > 0 else 0
                     
-                    await publish_progress(project_id, f"Indexing files...", progress, eta)
+                    await publish_progress(project_id, f"Indexing files...", progress, eta, extra=_cache_progress())
                 elif idx == 0:
                     await publish_progress(project_id, f"Indexing files...", progress)
                 
@@ -247,20 +290,24 @@ async def ingest_project_repo(project_id: str, repo_url: str):
                     rel_path = os.path.relpath(file_path, temp_dir)
                     doc_id = f"{project_id}::{rel_path}"
                     
-                    # Add context header
-                    full_text = f"File: {rel_path}\nProject: {project_id}\n\n{content}"
-                    
-                    await index_content(
-                        source_type="repo",
-                        source_id=doc_id,
-                        content=full_text
-                    )
+                    # Context header goes on every chunk, not into the parsed source
+                    batch.append((doc_id, content))
+                    batch_headers[doc_id] = f"File: {rel_path}\nProject: {project_id}\n\n"
+                    batch_chars += len(content)
                     
                 except Exception as e:
                     print(f"⚠️ Failed to read {file_path}: {e}")
 
+                if len(batch) >= INDEX_FLUSH_FILES or batch_chars >= INDEX_FLUSH_CHARS:
+                    await _flush()
+
+            await _flush()
+
             # 4. Done
-            await publish_progress(project_id, "Done", 100, 0)
+            await publish_progress(project_id, "Done", 100, 0, extra=_cache_progress())
+            if embed_totals["chunks"]:
+                cache = embed_cache_stats(embed_totals)
+                print(f"🧠 Embedding cache: {cache['hits']}/{embed_totals['chunks']} chunks reused ({cache['hit_rate']:.0%}), {embed_totals['embedded']} embedded")
             
             # Send specific "Complete" event for the Toast
             redis = Redis.from_url(REDIS_URL)
@@ -272,8 +319,14 @@ async def ingest_project_repo(project_id: str, repo_url: str):
             }))
             await redis.close()
 
+            if chunk_report:
+                total_tokens = sum(f["tokens"] for f in chunk_report.values())
+                print(f"📦 Chunked {len(chunk_report)} files into {embed_totals['chunks']} chunks (~{total_tokens} tokens)")
+                for doc_id, f in sorted(chunk_report.items(), key=lambda kv: -kv[1]["tokens"])[:5]:
+                    print(f"   {doc_id}: {f['chunks']} chunks, ~{f['tokens']} tokens (max {f['max_tokens']})")
+
             print(f"✅ Successfully indexed {total_files} files for {project_id}")
-            return {"status": "ok", "files_indexed": total_files}
+            return {"status": "ok", "files_indexed": total_files, "chunks": chunk_report}
 
         except Exception as e:
             await publish_progress(project_id, f"Error: {str(e)}", 0)
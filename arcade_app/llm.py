@@ -1,6 +1,16 @@
 import os
+import asyncio
+import json
+import logging
 from langchain_google_vertexai import ChatVertexAI
 
+logger = logging.getLogger("evalforge.judge")
+
+# Async ZERO judge tuning (per worker process)
+ZERO_JUDGE_TIMEOUT_SEC = float(os.getenv("EVALFORGE_ZERO_JUDGE_TIMEOUT_SEC", "30"))
+ZERO_JUDGE_MAX_ATTEMPTS = int(os.getenv("EVALFORGE_ZERO_JUDGE_MAX_ATTEMPTS", "3"))
+ZERO_JUDGE_CONCURRENCY = int(os.getenv("EVALFORGE_ZERO_JUDGE_CONCURRENCY", "8"))
+
 def get_chat_model(agent_name: str = "default"):
     """
     Factory for getting a chat model instance.
@@ -15,10 +25,29 @@ def get_chat_model(agent_name: str = "default"):
     return llm
 
 
+def _build_zero_boss_request(rubric, payload: dict) -> tuple[str, dict]:
+    """Build (system_prompt, user_payload) for a ZERO boss evaluation."""
+    from .rubric_registry import rubric_registry
+
+    # Precompiled: specialized (or generic) ZERO prompt + rubric-specific instructions
+    compiled = rubric_registry.compiled_for(rubric)
+    system_prompt = compiled.system_prompt
+
+    user_content = {
+        "rubric": compiled.rubric_dict,
+        "player": payload.get("player"),
+        "run": payload.get("run"),
+        "submission": payload.get("submission"),
+    }
+    return system_prompt, user_content
+
+
 def call_zero_boss_judge(rubric, payload: dict) -> dict:
     """
     Call ZERO (JudgeAgent) to evaluate a boss submission according to the given rubric.
     
+    Blocking: prefer `call_zero_boss_judge_async` from request handlers.
+    
     Args:
         rubric: BossRubric object with dimensions and instructions
         payload: Dictionary with player, run, and submission fields
@@ -26,33 +55,7 @@ def call_zero_boss_judge(rubric, payload: dict) -> dict:
     Returns:
         Dictionary matching BossEvalLLMChoice schema
     """
-    from .prompts.zero_boss_judge import ZERO_BOSS_JUDGE_SYSTEM_PROMPT, ZERO_BOSS_PROMPTS
-    import json
-    
-    # Check if this boss has a specialized system prompt
-    if rubric.boss_slug in ZERO_BOSS_PROMPTS:
-        try:
-            with open(ZERO_BOSS_PROMPTS[rubric.boss_slug], "r", encoding="utf-8") as f:
-                base_prompt = f.read()
-        except Exception:
-            # Fallback if file missing
-            base_prompt = ZERO_BOSS_JUDGE_SYSTEM_PROMPT
-    else:
-        base_prompt = ZERO_BOSS_JUDGE_SYSTEM_PROMPT
-
-    # Combine the base instructions (Generic or Custom) with the rubric-specific instructions
-    system_prompt = (
-        base_prompt.strip()
-        + "\n\n--- RUBRIC-SPECIFIC INSTRUCTIONS ---\n"
-        + rubric.llm_judge_instructions.strip()
-    )
-
-    user_content = {
-        "rubric": rubric.dict(),
-        "player": payload.get("player"),
-        "run": payload.get("run"),
-        "submission": payload.get("submission"),
-    }
+    system_prompt, user_content = _build_zero_boss_request(rubric, payload)
 
     # Call LLM with JSON mode
     response_json = chat_completion_json(
@@ -67,6 +70,46 @@ def call_zero_boss_judge(rubric, payload: dict) -> dict:
     return response_json
 
 
+async def call_zero_boss_judge_async(rubric, payload: dict) -> dict:
+    """
+    Async-native ZERO boss evaluation. Never blocks the event loop; bounded by
+    a per-process semaphore, a hard per-attempt timeout and jittered retries.
+    
+    Args:
+        rubric: BossRubric object with dimensions and instructions
+        payload: Dictionary with player, run, and submission fields
+        
+    Returns:
+        Dictionary matching BossEvalLLMChoice schema
+    """
+    system_prompt, user_content = _build_zero_boss_request(rubric, payload)
+
+    response_json = await chat_completion_json_async(
+        system_prompt=system_prompt,
+        user_payload=user_content,
+    )
+
+    if not isinstance(response_json, dict):
+        raise ValueError("ZERO boss judge returned non-dict JSON")
+
+    return response_json
+
+
+def _build_json_prompt(system_prompt: str, user_payload: dict) -> str:
+    return (
+        f"{system_prompt}\n\n"
+        f"--- INPUT DATA ---\n"
+        f"{json.dumps(user_payload, indent=2)}\n\n"
+        f"--- YOUR RESPONSE (JSON ONLY) ---"
+    )
+
+
+_JSON_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "temperature": 0.1,
+}
+
+
 def chat_completion_json(
     system_prompt: str,
     user_payload: dict,
@@ -83,36 +126,89 @@ def chat_completion_json(
     Returns:
         Parsed JSON response from the LLM
     """
-    import json
-    import vertexai
-    from vertexai.generative_models import GenerativeModel
-    
-    if model_name is None:
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-    
-    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-    location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
+    from arcade_app.model_registry import get_model
     
-    # Initialize Vertex AI
-    vertexai.init(project=project_id, location=location)
-    model = GenerativeModel(model_name)
-    
-    # Construct the full prompt
-    full_prompt = (
-        f"{system_prompt}\n\n"
-        f"--- INPUT DATA ---\n"
-        f"{json.dumps(user_payload, indent=2)}\n\n"
-        f"--- YOUR RESPONSE (JSON ONLY) ---"
-    )
+    model = get_model(model_name)
     
     # Call with JSON response format
     response = model.generate_content(
-        full_prompt,
-        generation_config={
-            "response_mime_type": "application/json",
-            "temperature": 0.1,
-        }
+        _build_json_prompt(system_prompt, user_payload),
+        generation_config=_JSON_GENERATION_CONFIG,
     )
     
     # Parse and return
     return json.loads(response.text)
+
+
+_judge_semaphores: dict = {}
+
+
+def _judge_semaphore() -> asyncio.Semaphore:
+    """One semaphore per event loop (tests and scripts may spin up several)."""
+    loop = asyncio.get_running_loop()
+    sem = _judge_semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(ZERO_JUDGE_CONCURRENCY)
+        _judge_semaphores.clear()
+        _judge_semaphores[loop] = sem
+    return sem
+
+
+def _retryable_errors() -> tuple:
+    errors: tuple = (asyncio.TimeoutError, json.JSONDecodeError)
+    try:
+        from google.api_core import exceptions as gexc
+        errors += (
+            gexc.TooManyRequests,
+            gexc.ServiceUnavailable,
+            gexc.InternalServerError,
+            gexc.DeadlineExceeded,
+        )
+    except ImportError:
+        pass
+    return errors
+
+
+async def chat_completion_json_async(
+    system_prompt: str,
+    user_payload: dict,
+    model_name: str | None = None,
+    timeout: float | None = None,
+    max_attempts: int | None = None,
+) -> dict:
+    """
+    Async counterpart of `chat_completion_json`.
+    
+    Each attempt holds a slot of the judge semaphore and is cut off after
+    `timeout` seconds; timeouts, bad JSON and transient Vertex errors are
+    retried with exponential backoff plus jitter.
+    """
+    from tenacity import (
+        AsyncRetrying,
+        retry_if_exception_type,
+        stop_after_attempt,
+        wait_random_exponential,
+    )
+    from arcade_app.model_registry import get_model, default_model_name
+    from arcade_app.rate_governor import rate_governor
+    
+    model_name = model_name or default_model_name()
+    model = get_model(model_name)
+    prompt = _build_json_prompt(system_prompt, user_payload)
+    timeout = timeout or ZERO_JUDGE_TIMEOUT_SEC
+    
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(max_attempts or ZERO_JUDGE_MAX_ATTEMPTS),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=retry_if_exception_type(_retryable_errors()),
+        reraise=True,
+    ):
+        with attempt:
+            if attempt.retry_state.attempt_number > 1:
+                logger.warning("ZERO judge retry attempt=%d", attempt.retry_state.attempt_number)
+            async with _judge_semaphore(), rate_governor.slot(model_name, "judge"):
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, generation_config=_JSON_GENERATION_CONFIG),
+                    timeout=timeout,
+                )
+            return json.loads(response.text)
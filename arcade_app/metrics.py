@@ -11,7 +11,7 @@ from starlette.routing import Route
 JUDGE_GRADE_TOTAL = Counter(
     "judge_grade_total",
     "Judge grading outcomes",
-    ["result"]  # new|dedupe
+    ["result"]  # cache_lru|cache_redis|miss
 )
 
 JUDGE_GRADE_SEC = Histogram(
@@ -24,6 +24,13 @@ JUDGE_INPUT_BYTES = Summary(
     "Bytes of input graded by Judge"
 )
 
+# LLM request coalescing (singleflight)
+LLM_COALESCED_TOTAL = Counter(
+    "llm_coalesced_total",
+    "LLM evaluations served by joining an identical in-flight call",
+    ["flight"]  # judge_grade|zero_boss
+)
+
 # DevDiag proxy metrics
 DEVDIAG_REQUESTS_TOTAL = Counter(
     "devdiag_requests_total",
@@ -1,40 +1,158 @@
 """
 Mock grader for testing Phase 5 features without Vertex AI dependency.
 Provides deterministic grades based on Golden Dataset matches.
+
+Lookups go through an on-disk hash index instead of an in-memory dict, so
+importing this module costs nothing and RSS does not grow with the dataset:
+
+    data/golden_dataset.jsonl.idx
+        header:  magic(8) | count u64 | dataset size u64 | dataset mtime_ns u64
+        records: sha1(normalized input) 20 bytes | byte offset u64, sorted by sha1
+
+The index is memory-mapped on the first grade and binary-searched (~25
+probes for 10M cases); a hit reads that single line from the dataset. It
+is (re)built automatically when missing or older than the dataset, or
+ahead of time with:
+
+    python -m arcade_app.mock_grader build [dataset.jsonl]
 """
 import json
+import mmap
 import os
 import hashlib
+import struct
+import tempfile
+import threading
 from typing import Dict, Any, Optional
 
 DATASET_PATH = "data/golden_dataset.jsonl"
 
+INDEX_MAGIC = b"EFMGIDX1"
+_HEADER = struct.Struct("<8sQQQ")
+_RECORD = struct.Struct("<20sQ")
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).strip()
+
+def build_index(dataset_path: str, index_path: Optional[str] = None) -> str:
+    """
+    Streams the dataset once and writes the sorted (sha1, offset) index.
+    Duplicate inputs keep the last case, like the old dict did.
+
+    Returns:
+        The path the index was written to.
+    """
+    import numpy as np  # only needed to sort when (re)building
+
+    index_path = index_path or dataset_path + ".idx"
+    keys = bytearray()
+    offsets = []
+    with open(dataset_path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                keys += hashlib.sha1(_normalize(case["input"]).encode("utf-8")).digest()
+                offsets.append(offset)
+            offset += len(line)
+
+    digests = np.frombuffer(bytes(keys), dtype="S20")
+    offs = np.asarray(offsets, dtype="<u8")
+    order = np.argsort(digests, kind="stable")
+    digests, offs = digests[order], offs[order]
+    if len(digests):
+        last = np.append(digests[1:] != digests[:-1], True)  # last record per key wins
+        digests, offs = digests[last], offs[last]
+
+    records = np.empty(len(digests), dtype=[("k", "S20"), ("off", "<u8")])
+    records["k"], records["off"] = digests, offs
+
+    st = os.stat(dataset_path)
+    header = _HEADER.pack(INDEX_MAGIC, len(records), st.st_size, st.st_mtime_ns)
+
+    # Atomic replace so concurrent workers never map a half-written file
+    directory = os.path.dirname(index_path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=".mockidx_", dir=directory)
+    with os.fdopen(fd, "wb") as out:
+        out.write(header)
+        out.write(records.tobytes())
+    os.replace(tmp, index_path)
+    return index_path
+
 class MockGrader:
-    def __init__(self):
-        self.lookup_table = self._load_dataset_lookup()
+    def __init__(self, dataset_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.dataset_path = dataset_path or DATASET_PATH
+        self.index_path = index_path or self.dataset_path + ".idx"
+        self._lock = threading.Lock()
+        self._index: Optional[mmap.mmap] = None
+        self._count = 0
+        self._dataset = None
+        self._opened = False
 
-    def _load_dataset_lookup(self) -> Dict[str, Any]:
-        """
-        Loads the golden dataset and creates a lookup map.
-        Key: SHA1 of normalized input
-        Value: The entire case dict (including expected_score)
-        """
-        lookup = {}
-        if not os.path.exists(DATASET_PATH):
-            return lookup
-
-        with open(DATASET_PATH, "r") as f:
-            for line in f:
-                if line.strip():
-                    case = json.loads(line)
-                    # Normalize input to ensure matches work despite whitespace
-                    key = self._hash_input(case["input"])
-                    lookup[key] = case
-        return lookup
+    def _index_is_fresh(self, path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                magic, _, size, mtime_ns = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        st = os.stat(self.dataset_path)
+        return magic == INDEX_MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns
+
+    def _open(self) -> None:
+        """Maps the index on first use, building it if missing or stale."""
+        if self._opened:
+            return
+        with self._lock:
+            if self._opened:
+                return
+            if os.path.exists(self.dataset_path):
+                path = self.index_path
+                if not self._index_is_fresh(path):
+                    try:
+                        build_index(self.dataset_path, path)
+                    except OSError:
+                        # Read-only image (Cloud Run): keep the index in tmp instead
+                        path = os.path.join(tempfile.gettempdir(), os.path.basename(self.index_path))
+                        if not self._index_is_fresh(path):
+                            build_index(self.dataset_path, path)
+                with open(path, "rb") as f:
+                    self._count = _HEADER.unpack(f.read(_HEADER.size))[1]
+                    if self._count:
+                        self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._dataset = open(self.dataset_path, "rb")
+            self._opened = True
+
+    def _lookup(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Binary search over the mapped records; reads one dataset line on a hit."""
+        self._open()
+        index = self._index
+        if index is None:
+            return None
+
+        lo, hi = 0, self._count
+        base, width = _HEADER.size, _RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = base + mid * width
+            probe = index[pos:pos + 20]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                offset = _RECORD.unpack_from(index, pos)[1]
+                return self._read_case(offset)
+        return None
+
+    def _read_case(self, offset: int) -> Dict[str, Any]:
+        with self._lock:
+            self._dataset.seek(offset)
+            line = self._dataset.readline()
+        return json.loads(line)
 
     def _hash_input(self, text: str) -> str:
         """Create a consistent hash for text inputs."""
-        normalized = " ".join(text.split()).strip()
+        normalized = _normalize(text)
         return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
 
     async def grade(self, user_input: str, track: str) -> Dict[str, Any]:
@@ -43,8 +161,8 @@ class MockGrader:
         1. If input matches a Golden Dataset case -> Return expected_score.
         2. Else -> Return a generic fallback score.
         """
-        key = self._hash_input(user_input)
-        
+        key = bytes.fromhex(self._hash_input(user_input))
+
         # Magic Pass for QA
         if "MAGIC_BOSS_PASS" in user_input:
              return {
@@ -55,7 +173,7 @@ class MockGrader:
                 "mock_lookup_hit": True
             }
 
-        case = self.lookup_table.get(key)
+        case = self._lookup(key)
 
         if case:
             # HIT: We found this exact case in our dataset.
@@ -63,7 +181,7 @@ class MockGrader:
             # (Simplified for mock purposes: give uniform component scores close to expected)
             target = case.get("expected_score", 50)
             component_val = max(1, min(5, int(target / 20))) # Approx scale 0-100 to 0-5
-            
+
             return {
                 "coverage": component_val,
                 "correctness": component_val,
@@ -81,5 +199,14 @@ class MockGrader:
                 "mock_lookup_hit": False
             }
 
-# Singleton instance
+# Singleton instance (nothing is read until the first grade)
 mock_grader_instance = MockGrader()
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        dataset = sys.argv[2] if len(sys.argv) > 2 else DATASET_PATH
+        print(f"🗂️  Mock grader index written to {build_index(dataset)}")
+    else:
+        print("usage: python -m arcade_app.mock_grader build [dataset.jsonl]")
@@ -0,0 +1,233 @@
+"""
+Process-wide registry of warm Vertex AI model handles.
+
+Every LLM call site used to run `vertexai.init(...)` and build a fresh
+`GenerativeModel` per request. The registry does that setup once per
+(model name, location, generation config) and hands out the same handle
+afterwards, while keeping per-model call and latency counters.
+
+Handles also route calls through the record/replay cassette (see
+arcade_app/cassette.py) when EVALFORGE_CASSETTE is set.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger("evalforge.models")
+
+DEFAULT_MODEL = "gemini-2.5-flash-001"
+DEFAULT_LOCATION = "us-central1"
+
+
+def default_model_name() -> str:
+    return os.getenv("EVALFORGE_MODEL_VERSION", DEFAULT_MODEL)
+
+
+def default_location() -> str:
+    return os.getenv("GOOGLE_CLOUD_LOCATION", DEFAULT_LOCATION)
+
+
+@dataclass
+class ModelStats:
+    """Call/latency counters for a single model name."""
+    calls: int = 0
+    errors: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency_ms / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "max_latency_ms": round(self.max_latency_ms, 1),
+        }
+
+
+class ModelHandle:
+    """
+    Thin wrapper around a `GenerativeModel` that records call latency.
+
+    Exposes the same `generate_content` / `generate_content_async` surface as
+    the SDK model; anything else is proxied through untouched.
+    """
+
+    def __init__(self, registry: "ModelRegistry", model_name: str, model: Any, config_key: str = ""):
+        self._registry = registry
+        self.model_name = model_name
+        self.model = model
+        self.config_key = config_key
+
+    def generate_content(self, *args, **kwargs):
+        from arcade_app.cassette import cassette, request_key
+
+        stream = bool(kwargs.get("stream"))
+        key = request_key(self.model_name, self.config_key, args, kwargs) if cassette.active else None
+        if cassette.replaying:
+            return cassette.replay(key, stream)
+
+        t0 = time.perf_counter()
+        try:
+            response = self.model.generate_content(*args, **kwargs)
+        except Exception:
+            self._registry.record(self.model_name, time.perf_counter() - t0, error=True)
+            raise
+        self._registry.record(self.model_name, time.perf_counter() - t0)
+        if key is not None:
+            return cassette.record(key, self.model_name, response, stream)
+        return response
+
+    async def generate_content_async(self, *args, **kwargs):
+        from arcade_app.cassette import cassette, request_key
+
+        stream = bool(kwargs.get("stream"))
+        key = request_key(self.model_name, self.config_key, args, kwargs) if cassette.active else None
+        if cassette.replaying:
+            return cassette.replay_async(key, stream)
+
+        # For stream=True this measures time until the stream is opened.
+        t0 = time.perf_counter()
+        try:
+            response = await self.model.generate_content_async(*args, **kwargs)
+        except Exception:
+            self._registry.record(self.model_name, time.perf_counter() - t0, error=True)
+            raise
+        self._registry.record(self.model_name, time.perf_counter() - t0)
+        if key is not None:
+            return cassette.record_async(key, self.model_name, response, stream)
+        return response
+
+    def __getattr__(self, name: str):
+        return getattr(self.model, name)
+
+
+def _config_key(generation_config: Optional[Dict[str, Any]]) -> str:
+    if not generation_config:
+        return ""
+    return json.dumps(generation_config, sort_keys=True, default=str)
+
+
+class ModelRegistry:
+    """
+    Creates model handles lazily on first use and caches them for the life of
+    the process. Safe to call from request handlers and worker threads.
+    """
+
+    def __init__(self):
+        self._handles: Dict[Tuple[str, str, str], ModelHandle] = {}
+        self._current_init: Optional[Tuple[Optional[str], str]] = None
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model_name: Optional[str] = None,
+        location: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+    ) -> ModelHandle:
+        """Return the warm handle for this (model, location, config), building it if needed."""
+        model_name = model_name or default_model_name()
+        location = location or default_location()
+        key = (model_name, location, _config_key(generation_config))
+
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._build(model_name, location, generation_config)
+                self._handles[key] = handle
+        return handle
+
+    def _build(
+        self,
+        model_name: str,
+        location: str,
+        generation_config: Optional[Dict[str, Any]],
+    ) -> ModelHandle:
+        from arcade_app.cassette import cassette
+
+        config_key = _config_key(generation_config)
+        if cassette.replaying:
+            # Offline replay: never touch Vertex (no credentials / network needed)
+            return ModelHandle(self, model_name, None, config_key)
+
+        import vertexai
+        from vertexai.generative_models import GenerativeModel
+
+        project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
+        # vertexai.init is global; re-run it only when the target project/location
+        # changes so the model below binds to the requested region.
+        init_key = (project_id, location)
+        if self._current_init != init_key:
+            vertexai.init(project=project_id, location=location)
+            self._current_init = init_key
+
+        if generation_config:
+            model = GenerativeModel(model_name, generation_config=generation_config)
+        else:
+            model = GenerativeModel(model_name)
+
+        logger.info("model_registry: built handle model=%s location=%s", model_name, location)
+        return ModelHandle(self, model_name, model, config_key)
+
+    def warmup(self, model_names: Optional[Iterable[str]] = None) -> int:
+        """
+        Eagerly build handles (e.g. at app startup). Returns the number warmed.
+        Failures are logged, not raised, so a bad config never blocks boot.
+        """
+        names = list(model_names) if model_names else [default_model_name()]
+        warmed = 0
+        for name in names:
+            try:
+                self.get(name)
+                warmed += 1
+            except Exception as e:
+                logger.warning("model_registry: warmup failed for %s: %s", name, e)
+        return warmed
+
+    def record(self, model_name: str, latency_sec: float, error: bool = False) -> None:
+        latency_ms = latency_sec * 1000
+        with self._lock:
+            stats = self._stats.setdefault(model_name, ModelStats())
+            stats.calls += 1
+            if error:
+                stats.errors += 1
+            stats.total_latency_ms += latency_ms
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: s.as_dict() for name, s in self._stats.items()}
+
+    def reset(self) -> None:
+        """Drop all handles and counters (tests / credential rotation)."""
+        with self._lock:
+            self._handles.clear()
+            self._current_init = None
+            self._stats.clear()
+
+
+# Singleton instance
+model_registry = ModelRegistry()
+
+
+def get_model(
+    model_name: Optional[str] = None,
+    location: Optional[str] = None,
+    generation_config: Optional[Dict[str, Any]] = None,
+) -> ModelHandle:
+    """Shortcut for `model_registry.get(...)`."""
+    return model_registry.get(model_name, location, generation_config)
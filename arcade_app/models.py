@@ -1,8 +1,9 @@
 from typing import Optional, List, Dict
 from sqlmodel import SQLModel, Field, Relationship, JSON, Column
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 from pgvector.sqlalchemy import Vector
+from sqlalchemy import DateTime, func
 from enum import Enum
 
 # --- ENUMS ---
@@ -186,19 +187,36 @@ class KnowledgeChunk(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Metadata
-    source_type: str  # "codex" | "repo"
+    source_type: str = Field(index=True)  # "codex" | "repo"
     source_id: str    # filename or project_id
     chunk_index: int
+    # Search filters (see rag_helper.search_knowledge)
+    project_id: Optional[str] = Field(default=None, index=True)
+    world_id: Optional[str] = Field(default=None, index=True)
     
     metadata_json: Dict = Field(default={}, sa_type=JSON)
     
     # The Content
     content: str
+    # sha256 of `content`; key into EmbeddingCache
+    content_hash: Optional[str] = Field(default=None, index=True)
     
     # The Vector (768 dimensions is standard for Vertex/Gecko)
     embedding: List[float] = Field(sa_column=Column(Vector(768)))
 
 
+class EmbeddingCache(SQLModel, table=True):
+    """
+    Embedding vectors keyed by (content hash, embedding model), so re-syncs
+    only send new or changed text to Vertex.
+    """
+    content_hash: str = Field(primary_key=True)
+    model: str = Field(primary_key=True)
+    embedding: List[float] = Field(sa_column=Column(Vector(768)))
+    # Filled by the database: rows are written with bulk INSERT ... ON CONFLICT
+    created_at: Optional[datetime] = Field(default=None, sa_column_kwargs={"server_default": func.now()})
+
+
 # --- BOSS MODELS ---
 
 class BossDefinition(SQLModel, table=True):
@@ -358,5 +376,26 @@ class QuestProgress(SQLModel, table=True):
     user: "User" = Relationship()
     quest: "QuestDefinition" = Relationship()
 
+# --- OUTBOX ---
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    Transactional outbox for side effects that must not block a response.
+
+    The request path only inserts a row; the ARQ worker claims it, runs the
+    work and pushes results to the client over the game_events channel.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(index=True)                      # e.g. "post_grade"
+    payload: Dict = Field(default_factory=dict, sa_type=JSON)
+
+    status: str = Field(default="pending", index=True)  # "pending" | "processing" | "done" | "failed"
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
+    locked_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    processed_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+
 # Deprecated but kept for migration safety if needed (or remove if bold)
 # class UserQuest(SQLModel, table=True): ...
@@ -0,0 +1,308 @@
+"""
+Post-grade bookkeeping, moved off the JudgeAgent critical path.
+
+After a grade is streamed, the agent only writes an OutboxEvent row (the
+transactional outbox) and nudges the ARQ worker. The worker then runs the
+slow side effects -- XP, badge rules, the boss-trigger check and encounter
+creation -- and pushes each result to the browser over the game_events
+channel as soon as it is ready:
+
+    {"type": "progress", "user_id": ..., "progress": {...}}
+    {"type": "achievement", ...}          (published by gamification)
+    {"type": "boss_spawn", "user_id": ..., "boss_id": ..., ...}
+
+If the worker is not reachable the row simply stays pending and the
+`sweep_outbox` cron picks it up, so no bookkeeping is lost.
+"""
+import asyncio
+import logging
+import os
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlmodel import select
+
+logger = logging.getLogger("evalforge.outbox")
+
+POST_GRADE_KIND = "post_grade"
+PASS_SCORE = 60
+MAX_ATTEMPTS = int(os.getenv("EVALFORGE_OUTBOX_MAX_ATTEMPTS", "5"))
+# A row stuck in "processing" longer than this is assumed orphaned (worker died)
+CLAIM_TIMEOUT = timedelta(seconds=int(os.getenv("EVALFORGE_OUTBOX_CLAIM_TIMEOUT_SEC", "300")))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_RETRY_AFTER_SEC = 30.0
+
+_arq_pool = None
+_arq_down_until = 0.0
+_pending_jobs: set = set()
+
+
+async def _enqueue_job(event_id: int) -> bool:
+    """Best-effort ARQ enqueue. The cron sweep covers us when this fails."""
+    global _arq_pool, _arq_down_until
+    if time.monotonic() < _arq_down_until:
+        return False
+    try:
+        from arq import create_pool
+        from arq.connections import RedisSettings
+
+        if _arq_pool is None:
+            settings = RedisSettings.from_dsn(REDIS_URL)
+            settings.conn_timeout = 1
+            settings.conn_retries = 0
+            _arq_pool = await create_pool(settings)
+        await _arq_pool.enqueue_job("process_outbox", event_id, _job_id=f"outbox:{event_id}")
+        return True
+    except Exception as e:
+        _arq_pool = None
+        _arq_down_until = time.monotonic() + REDIS_RETRY_AFTER_SEC
+        logger.warning(f"Outbox enqueue failed for event {event_id}, leaving it for the sweep: {e}")
+        return False
+
+
+async def enqueue_post_grade(
+    user_id: str,
+    world_id: str,
+    track_id: str,
+    score: float,
+) -> Optional[int]:
+    """
+    Record post-grade bookkeeping in the outbox and hand it to the worker.
+
+    If the row cannot be written, the bookkeeping runs inline instead so the
+    grade still earns its XP.
+
+    Returns:
+        The OutboxEvent id, or None if the row could not be written.
+    """
+    from arcade_app.database import get_session
+    from arcade_app.models import OutboxEvent
+
+    event_id = None
+    try:
+        async for session in get_session():
+            event = OutboxEvent(
+                kind=POST_GRADE_KIND,
+                payload={
+                    "user_id": user_id,
+                    "world_id": world_id,
+                    "track_id": track_id,
+                    "score": score,
+                },
+            )
+            session.add(event)
+            await session.commit()
+            event_id = event.id
+            break
+    except Exception as e:
+        logger.error(f"Could not write post-grade outbox row for {user_id}, running inline: {e}", exc_info=True)
+        await run_post_grade(user_id, world_id, track_id, score)
+        return None
+
+    if event_id is not None:
+        # Don't make the SSE stream wait on the Redis round-trip
+        task = asyncio.create_task(_enqueue_job(event_id))
+        _pending_jobs.add(task)
+        task.add_done_callback(_pending_jobs.discard)
+    return event_id
+
+
+async def _check_boss_trigger(user_id: str, world_id: str, track_id: str, score: float) -> Optional[Dict]:
+    """Run the boss-trigger rules for a passing grade. Returns a boss_spawn payload or None."""
+    from sqlmodel import desc
+
+    from arcade_app.boss_helper import create_encounter
+    from arcade_app.boss_triggers import BossTriggerContext, maybe_trigger_boss
+    from arcade_app.database import get_session
+    from arcade_app.models import Profile, QuestDefinition, QuestProgress, QuestState
+
+    async for session in get_session():
+        profile = (await session.exec(select(Profile).where(Profile.user_id == user_id))).first()
+        if not profile:
+            return None
+
+        track_filter = (
+            QuestProgress.user_id == user_id,
+            QuestDefinition.track_id == track_id,
+            QuestProgress.state.in_([QuestState.COMPLETED, QuestState.MASTERED]),
+        )
+
+        # The most recently completed quest on this track is the one just graded
+        last_qp = (await session.exec(
+            select(QuestProgress)
+            .join(QuestDefinition)
+            .where(*track_filter)
+            .order_by(desc(QuestProgress.completed_at))
+            .limit(1)
+        )).first()
+        if not last_qp:
+            return None
+
+        completed_count = (await session.exec(
+            select(func.count(QuestProgress.id)).join(QuestDefinition).where(*track_filter)
+        )).one()
+
+        ctx = BossTriggerContext(
+            profile=profile,
+            world_id=world_id,
+            track_id=track_id,
+            quest_id=str(last_qp.quest_id),
+            was_boss=False,
+            passed=True,
+            grade="A" if score >= 90 else "B" if score >= 80 else "C",
+            attempts_on_track=last_qp.attempts,
+            completed_quests_on_track=completed_count,
+        )
+
+        boss_def = await maybe_trigger_boss(ctx, session=session)
+        if not boss_def:
+            return None
+
+        await create_encounter(user_id, boss_def.id)
+        return {
+            "type": "boss_spawn",
+            "title": f"🚨 {boss_def.name.upper()} DETECTED",
+            "message": "Initiating containment protocols...",
+            "world_id": world_id,
+            "boss_id": boss_def.id,
+            "name": boss_def.name,
+            "difficulty": boss_def.difficulty,
+            "duration_seconds": boss_def.time_limit_seconds,
+            "hp_penalty_on_fail": 10,
+            "base_xp_reward": boss_def.base_xp_reward,
+        }
+    return None
+
+
+async def run_post_grade(user_id: str, world_id: str, track_id: str, score: float) -> List[Dict]:
+    """
+    Apply XP, badges and the boss-trigger check for one grade.
+
+    Each result is published to game_events as soon as it is known.
+
+    Returns:
+        The events that were published (badge toasts are published by
+        `process_quest_completion` itself and are not included).
+    """
+    from arcade_app import gamification
+    from arcade_app.socket_manager import emit_fx_event
+
+    emitted: List[Dict] = []
+    if score <= 0:
+        return emitted
+
+    # 1. XP (Score * Difficulty Multiplier, 1.0 for now)
+    progress = await gamification.add_xp(user_id, world_id, int(score))
+    event = {"type": "progress", "progress": progress}
+    await emit_fx_event(user_id, event)
+    emitted.append(event)
+
+    if score < PASS_SCORE:
+        return emitted
+
+    # 2. Badges (publishes its own achievement events)
+    await gamification.process_quest_completion(user_id, world_id, score)
+
+    # 3. Boss trigger
+    spawn = await _check_boss_trigger(user_id, world_id, track_id, score)
+    if spawn:
+        await emit_fx_event(user_id, spawn)
+        emitted.append(spawn)
+    return emitted
+
+
+HANDLERS = {
+    POST_GRADE_KIND: lambda payload: run_post_grade(
+        payload["user_id"], payload["world_id"], payload["track_id"], payload["score"]
+    ),
+}
+
+
+async def process_outbox_event(event_id: int) -> bool:
+    """
+    Claim and run one outbox row.
+
+    The claim is a conditional UPDATE, so the direct ARQ job and the cron
+    sweep never run the same row twice.
+
+    Returns:
+        True if this call claimed and completed the row.
+    """
+    from arcade_app.database import get_session
+    from arcade_app.models import OutboxEvent
+
+    async for session in get_session():
+        now = datetime.now(timezone.utc)
+        claim = await session.execute(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.id == event_id,
+                or_(
+                    OutboxEvent.status == "pending",
+                    (OutboxEvent.status == "processing") & (OutboxEvent.locked_at < now - CLAIM_TIMEOUT),
+                ),
+            )
+            .values(status="processing", locked_at=now, attempts=OutboxEvent.attempts + 1)
+        )
+        await session.commit()
+        if claim.rowcount != 1:
+            return False
+
+        event = await session.get(OutboxEvent, event_id)
+        await session.refresh(event)
+        handler = HANDLERS.get(event.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown outbox kind: {event.kind}")
+            await handler(event.payload)
+        except Exception as e:
+            logger.error(f"Outbox event {event_id} ({event.kind}) failed: {e}")
+            event.last_error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            event.status = "failed" if event.attempts >= MAX_ATTEMPTS else "pending"
+            event.locked_at = None
+            session.add(event)
+            await session.commit()
+            return False
+
+        event.status = "done"
+        event.processed_at = datetime.now(timezone.utc)
+        event.last_error = None
+        session.add(event)
+        await session.commit()
+        return True
+    return False
+
+
+async def sweep_outbox(limit: int = 100) -> int:
+    """
+    Process rows that were never picked up (enqueue failed, worker restarted).
+
+    Returns:
+        Number of rows completed.
+    """
+    from arcade_app.database import get_session
+    from arcade_app.models import OutboxEvent
+
+    stale = datetime.now(timezone.utc) - CLAIM_TIMEOUT
+    event_ids: List[int] = []
+    async for session in get_session():
+        rows = await session.exec(
+            select(OutboxEvent.id)
+            .where(or_(
+                OutboxEvent.status == "pending",
+                (OutboxEvent.status == "processing") & (OutboxEvent.locked_at < stale),
+            ))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        event_ids = list(rows.all())
+        break
+
+    done = 0
+    for event_id in event_ids:
+        if await process_outbox_event(event_id):
+            done += 1
+    return done
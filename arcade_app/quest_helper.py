@@ -137,15 +137,8 @@ async def stream_quest_generator(
 
     # --- SHARED: GENERATE FLAVOR TEXT ---
     try:
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-        
-        project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-        location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-        model_name = os.getenv("EVALFORGE_MODEL_VERSION", "gemini-2.5-flash-001")
-        
-        vertexai.init(project=project_id, location=location)
-        model = GenerativeModel(model_name)
+        from arcade_app.model_registry import get_model
+        model = get_model()
 
         # Narrative Config
         world_id = track.get("world_id", "world-python")
@@ -1,9 +1,19 @@
 import os
-from typing import List, Dict
+import re
+import asyncio
+import hashlib
+import logging
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 from sqlmodel import select
-from sqlalchemy import text
+from sqlalchemy import delete, func, insert, literal_column, or_, text, update
+from sqlalchemy.exc import ProgrammingError
 from arcade_app.database import get_session
-from arcade_app.models import KnowledgeChunk
+from arcade_app.embedder import BatchEmbedder, EMBEDDING_MODEL_NAME
+from arcade_app.models import KnowledgeChunk, EmbeddingCache
+from arcade_app import vector_index
+from arcade_app.chunker import chunk_document, chunk_stats
+
+logger = logging.getLogger("evalforge.rag")
 
 # Vertex AI Imports (Lazy)
 # import vertexai
@@ -32,61 +42,414 @@ except Exception as e:
     # print(f"⚠️ Vertex AI Embeddings not available: {e}")
     embedding_model = None
 
+# Packs chunks into multi-input requests (mock zero vectors without Vertex)
+embedder = BatchEmbedder(embedding_model)
+
+# ANN search knobs (pgvector): recall vs latency of the HNSW / IVFFlat scan
+RAG_EF_SEARCH = int(os.getenv("EVALFORGE_RAG_EF_SEARCH", "40"))
+RAG_PROBES = int(os.getenv("EVALFORGE_RAG_PROBES", "10"))
+# pgvector >= 0.8: keep scanning until `limit` rows pass the filters ("relaxed_order")
+RAG_ITERATIVE_SCAN = os.getenv("EVALFORGE_RAG_ITERATIVE_SCAN", "")
+
+# Hybrid retrieval: vector + full-text rankings merged with reciprocal rank fusion
+RAG_SEARCH_MODE = os.getenv("EVALFORGE_RAG_SEARCH_MODE", "hybrid")
+RRF_K = 60  # standard RRF constant; damps the weight of top ranks
+RRF_DEPTH_FACTOR = 4
+RRF_MIN_DEPTH = 20
+_LEXICAL_SCAN_LIMIT = 5000
+_MAX_TERMS = 16
+_STOPWORDS = {
+    "a", "an", "and", "are", "can", "do", "does", "for", "how", "in", "is", "it",
+    "of", "on", "or", "the", "to", "what", "where", "which", "why", "with",
+}
+
+# "auto": pgvector on Postgres, the in-process index (vector_index.py) elsewhere
+VECTOR_BACKEND = os.getenv("EVALFORGE_VECTOR_BACKEND", "auto")
+
+def _uses_local_index(session: Any) -> bool:
+    if VECTOR_BACKEND in ("local", "pgvector"):
+        return VECTOR_BACKEND == "local"
+    return session.bind.dialect.name != "postgresql"
+
 async def generate_embedding(text_chunk: str) -> List[float]:
-    """Generates a 768-dim vector for the input text."""
-    if not embedding_model: 
-        # print("⚠️ Using mock embeddings (Vertex AI not configured)")
-        return [0.0] * 768 # Mock fallback
-    
-    # Vertex API call
-    embeddings = embedding_model.get_embeddings([text_chunk])
-    return embeddings[0].values
+    """Generates a 768-dim vector for a search query (interactive priority)."""
+    return await embedder.embed_query(text_chunk)
+
+def content_hash(text_chunk: str) -> str:
+    return hashlib.sha256(text_chunk.encode("utf-8")).hexdigest()
 
-async def index_content(source_type: str, source_id: str, content: str):
+# Keeps IN (...) lists well under driver parameter limits
+_LOOKUP_BATCH = 500
+
+async def _cached_embeddings(session: Any, hashes: Sequence[str]) -> Dict[str, List[float]]:
+    """Vectors already in EmbeddingCache for the current embedding model."""
+    found: Dict[str, List[float]] = {}
+    if embedder.model is None or not hashes:
+        return found  # mock vectors are never cached
+    for start in range(0, len(hashes), _LOOKUP_BATCH):
+        rows = await session.execute(
+            select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(
+                EmbeddingCache.model == EMBEDDING_MODEL_NAME,
+                EmbeddingCache.content_hash.in_(hashes[start:start + _LOOKUP_BATCH]),
+            )
+        )
+        found.update({h: list(vec) for h, vec in rows.all()})
+    return found
+
+async def _stored_chunks(session: Any, source_type: str, source_ids: Sequence[str]) -> Tuple[Dict[Tuple[str, int], Tuple], List[int]]:
     """
-    Splits content into chunks, embeds them, and saves to DB.
+    Returns:
+        ({(source_id, chunk_index): (row id, content_hash, project_id, world_id)},
+        ids of duplicate rows)
     """
-    # 1. Simple Chunking (Split by paragraphs or chars)
-    # For MVP, we'll split by double newline to grab paragraphs
-    chunks = content.split("\n\n")
-    
-    async for session in get_session():
-        # Clean up old entries for this source (Naive re-indexing)
-        delete_stmt = text(
-            "DELETE FROM knowledgechunk WHERE source_type = :stype AND source_id = :sid"
-        )
-        await session.execute(delete_stmt, {"stype": source_type, "sid": source_id})
-        
-        for i, chunk_text in enumerate(chunks):
-            if not chunk_text.strip(): continue
-            
-            vector = await generate_embedding(chunk_text)
-            
-            entry = KnowledgeChunk(
-                source_type=source_type,
-                source_id=source_id,
-                chunk_index=i,
-                content=chunk_text,
-                embedding=vector
+    stored: Dict[Tuple[str, int], Tuple] = {}
+    duplicates: List[int] = []
+    for start in range(0, len(source_ids), _LOOKUP_BATCH):
+        rows = await session.execute(
+            select(
+                KnowledgeChunk.id, KnowledgeChunk.source_id, KnowledgeChunk.chunk_index,
+                KnowledgeChunk.content_hash, KnowledgeChunk.project_id, KnowledgeChunk.world_id,
             )
-            session.add(entry)
-        
-        await session.commit()
-        # print(f"✅ Indexed {len(chunks)} chunks for {source_id}")
+            .where(
+                KnowledgeChunk.source_type == source_type,
+                KnowledgeChunk.source_id.in_(source_ids[start:start + _LOOKUP_BATCH]),
+            )
+            .order_by(KnowledgeChunk.id)
+        )
+        for row_id, source_id, chunk_index, *rest in rows.all():
+            if (source_id, chunk_index) in stored:
+                duplicates.append(row_id)  # left over from the old delete-and-insert races
+            else:
+                stored[(source_id, chunk_index)] = (row_id, *rest)
+    return stored, duplicates
+
+async def _store_embeddings(session: Any, fresh: Dict[str, List[float]]) -> None:
+    if embedder.model is None or not fresh:
+        return
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    # Concurrent syncs may embed the same text; first writer wins
+    await session.execute(
+        dialect_insert(EmbeddingCache)
+        .values([{"content_hash": h, "model": EMBEDDING_MODEL_NAME, "embedding": v} for h, v in fresh.items()])
+        .on_conflict_do_nothing()
+    )
+
+async def index_content(
+    source_type: str,
+    source_id: str,
+    content: str,
+    project_id: Optional[str] = None,
+    world_id: Optional[str] = None,
+    header: str = "",
+) -> Dict[str, Any]:
+    """
+    Splits content into chunks, embeds them, and saves to DB.
+    """
+    return await index_many(
+        source_type, [(source_id, content)], project_id=project_id, world_id=world_id,
+        headers={source_id: header} if header else None,
+    )
 
-async def search_knowledge(query: str, limit: int = 3) -> List[str]:
+async def index_many(
+    source_type: str,
+    documents: Sequence[Tuple[str, str]],
+    project_id: Optional[str] = None,
+    world_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
     """
-    Vector Search: Finds the most relevant text chunks for the query.
+    Indexes several (source_id, content) documents at once, incrementally.
+
+    New chunks are diffed against the stored ones by (source_id,
+    chunk_index) and content hash; only changed positions are written, as
+    one bulk INSERT, one bulk UPDATE and one DELETE in a single transaction,
+    so unchanged chunks keep their rows and searches never see a file
+    disappear mid-sync.
+
+    `project_id` / `world_id` tag every chunk of the call so
+    search_knowledge can filter on them; unchanged chunks whose tags differ
+    are re-tagged without re-embedding. `headers` maps a source id to
+    context (file path, project) prepended to each of its chunks; keep it
+    out of `content` so it does not get in the way of the chunker.
+
+    Vectors for changed text come from EmbeddingCache (same text, same
+    embedding model) when possible; the rest are embedded in a few batched
+    requests.
+
+    Returns:
+        {"chunks", "cache_hits", "embedded", "inserted", "updated",
+        "deleted", "unchanged", "files"}. Unchanged chunks count as cache
+        hits since their stored vector is reused; "files" maps each source
+        id to its chunk_stats (chunk count and estimated tokens).
     """
+    # 1. Chunking: token-budgeted, split at code / heading boundaries
+    # (the source id carries the file extension; codex docs are markdown)
+    kind = "markdown" if source_type == "codex" else None
+    wanted: Dict[Tuple[str, int], Tuple[str, str]] = {}  # (source_id, chunk_index) -> (text, hash)
+    files: Dict[str, Dict[str, int]] = {}
+    for source_id, content in documents:
+        chunks = chunk_document(content, path=source_id, kind=kind, header=(headers or {}).get(source_id, ""))
+        files[source_id] = chunk_stats(chunks)
+        for i, chunk_text in enumerate(chunks):
+            wanted[(source_id, i)] = (chunk_text, content_hash(chunk_text))
+
+    stats: Dict[str, Any] = {"chunks": len(wanted), "cache_hits": 0, "embedded": 0,
+             "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "files": files}
+
+    async for session in get_session():
+        # 2. Diff against what is stored
+        stored, stale_ids = await _stored_chunks(session, source_type, list(dict.fromkeys(sid for sid, _ in documents)))
+        tags = {"project_id": project_id, "world_id": world_id}
+        changed = [key for key, (_, h) in wanted.items() if key not in stored or stored[key][1] != h]
+        retag = [
+            {"id": stored[key][0], **tags}
+            for key, (_, h) in wanted.items()
+            if key in stored and stored[key][1] == h and stored[key][2:] != (project_id, world_id)
+        ]
+        stale_ids += [row[0] for key, row in stored.items() if key not in wanted]
+        stats["unchanged"] = len(wanted) - len(changed)
+
+        # 3. Vectors for changed chunks: cache first, then the embedder
+        unique = {wanted[key][1]: wanted[key][0] for key in changed}  # same text embeds once
+        cached = await _cached_embeddings(session, list(unique))
+        missing = [h for h in unique if h not in cached]
+        fresh = dict(zip(missing, await embedder.embed([unique[h] for h in missing])))
+        stats["cache_hits"] = stats["unchanged"] + sum(1 for key in changed if wanted[key][1] in cached)
+        stats["embedded"] = len(missing)
+
+        # 4. Bulk write the delta
+        inserts, updates = [], []
+        for key in changed:
+            chunk_text, chunk_hash = wanted[key]
+            values = {
+                "content": chunk_text,
+                "content_hash": chunk_hash,
+                "embedding": cached[chunk_hash] if chunk_hash in cached else fresh[chunk_hash],
+            }
+            if key in stored:
+                updates.append({"id": stored[key][0], **tags, **values})
+            else:
+                inserts.append({"source_type": source_type, "source_id": key[0], "chunk_index": key[1], "metadata_json": {}, **tags, **values})
+
+        if stale_ids:
+            await session.execute(delete(KnowledgeChunk).where(KnowledgeChunk.id.in_(stale_ids)))
+        if updates:
+            await session.execute(update(KnowledgeChunk), updates)  # executemany by primary key
+        if retag:
+            await session.execute(update(KnowledgeChunk), retag)
+        # Mirror into the in-process index once it exists (a first search builds it from the DB)
+        mirror = _uses_local_index(session) and vector_index.local_index.exists()
+        if inserts:
+            if mirror:
+                result = await session.execute(
+                    insert(KnowledgeChunk).returning(KnowledgeChunk.id, sort_by_parameter_order=True), inserts
+                )
+                for row, chunk_id in zip(inserts, result.scalars().all()):
+                    row["id"] = chunk_id
+            else:
+                await session.execute(insert(KnowledgeChunk), inserts)
+        await _store_embeddings(session, fresh)
+
+        await session.commit()
+        if mirror:
+            vector_index.local_index.remove(stale_ids)
+            vector_index.local_index.upsert(
+                {"source_type": source_type, "embedding": None, **row} for row in updates + inserts + retag
+            )
+        stats.update(inserted=len(inserts), updated=len(updates), deleted=len(stale_ids))
+        break
+    return stats
+
+async def rebuild_local_index(session: Any = None) -> int:
+    """Reloads every stored chunk vector into the in-process index."""
+    if session is None:
+        async for session in get_session():
+            return await rebuild_local_index(session)
+
+    chunks: List[Dict[str, Any]] = []
+    last_id = 0
+    while True:
+        rows = (await session.execute(
+            select(
+                KnowledgeChunk.id, KnowledgeChunk.project_id, KnowledgeChunk.source_type,
+                KnowledgeChunk.world_id, KnowledgeChunk.embedding,
+            )
+            .where(KnowledgeChunk.id > last_id)
+            .order_by(KnowledgeChunk.id)
+            .limit(1000)
+        )).all()
+        if not rows:
+            break
+        chunks.extend(row._asdict() for row in rows)
+        last_id = rows[-1].id
+    return await asyncio.to_thread(vector_index.local_index.rebuild, chunks)
+
+Ranked = List[Tuple[int, str]]  # (chunk id, content), best first
+
+def _filtered(statement: Any, filters: Dict[str, Optional[str]]) -> Any:
+    for column, value in filters.items():
+        if value is not None:
+            statement = statement.where(getattr(KnowledgeChunk, column) == value)
+    return statement
+
+_local_build_lock = asyncio.Lock()  # concurrent first searches build the index once
+
+async def _search_local(session: Any, query_vec: List[float], limit: int, filters: Dict[str, Optional[str]]) -> Ranked:
+    if not vector_index.local_index.exists():
+        async with _local_build_lock:
+            if not vector_index.local_index.exists():
+                await rebuild_local_index(session)
+    hits = await asyncio.to_thread(vector_index.local_index.search, query_vec, limit, **filters)
+    if not hits:
+        return []
+    rows = await session.execute(
+        select(KnowledgeChunk.id, KnowledgeChunk.content).where(KnowledgeChunk.id.in_([i for i, _ in hits]))
+    )
+    content = dict(rows.all())
+    return [(i, content[i]) for i, _ in hits if i in content]
+
+async def _tune_ann_scan(session: Any, ef_search: Optional[int], probes: Optional[int]) -> None:
+    """Per-transaction pgvector scan settings (SET LOCAL; no-op off Postgres)."""
+    if session.bind.dialect.name != "postgresql":
+        return
+    # SET takes no bind parameters; values are coerced to int / a fixed vocabulary
+    await session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search or RAG_EF_SEARCH)}"))
+    await session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes or RAG_PROBES)}"))
+    if RAG_ITERATIVE_SCAN in ("strict_order", "relaxed_order"):
+        await session.execute(text(f"SET LOCAL hnsw.iterative_scan = {RAG_ITERATIVE_SCAN}"))
+
+async def _vector_ranked(
+    query: str,
+    depth: int,
+    filters: Dict[str, Optional[str]],
+    ef_search: Optional[int],
+    probes: Optional[int],
+) -> Ranked:
     query_vec = await generate_embedding(query)
-    
+
     async for session in get_session():
+        if _uses_local_index(session):
+            return await _search_local(session, query_vec, depth, filters)
+        await _tune_ann_scan(session, ef_search, probes)
+
         # pgvector L2 distance operator (<->) or Cosine (<=>)
-        # We generally use Cosine distance (<=>) for text embeddings
-        statement = select(KnowledgeChunk).order_by(
+        # We generally use Cosine distance (<=>) for text embeddings;
+        # the HNSW index is built with vector_cosine_ops to match
+        statement = _filtered(select(KnowledgeChunk.id, KnowledgeChunk.content), filters).order_by(
             KnowledgeChunk.embedding.cosine_distance(query_vec)
-        ).limit(limit)
-        
+        ).limit(depth)
+
         result = await session.execute(statement)
-        chunks = result.scalars().all()
-        return [r.content for r in chunks]
+        return [tuple(row) for row in result.all()]
+    return []
+
+def lexical_terms(query: str) -> List[str]:
+    """
+    Search terms of a question: lowercase alphanumeric runs, so identifiers
+    like `ingest_project_repo` or `grade_many()` become their parts (which
+    is also how Postgres' parser tokenizes them), minus filler words.
+    """
+    terms = []
+    for term in re.findall(r"[a-z0-9]+", query.lower()):
+        if len(term) > 1 and term not in _STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms[:_MAX_TERMS]
+
+async def _lexical_ranked(query: str, depth: int, filters: Dict[str, Optional[str]]) -> Ranked:
+    terms = lexical_terms(query)
+    if not terms:
+        return []
+
+    async for session in get_session():
+        if session.bind.dialect.name == "postgresql":
+            # OR of the terms; ts_rank_cd rewards chunks matching more of them, close together.
+            # 'simple' config: no stemming or stop words, identifiers stay as written
+            tsquery = func.to_tsquery("simple", " | ".join(terms))
+            tsv = literal_column("content_tsv")
+            statement = _filtered(select(KnowledgeChunk.id, KnowledgeChunk.content), filters).where(
+                tsv.op("@@")(tsquery)
+            ).order_by(func.ts_rank_cd(tsv, tsquery).desc()).limit(depth)
+            try:
+                result = await session.execute(statement)
+            except ProgrammingError:
+                # Schema created by init_db without migration 004: vector-only
+                logger.warning("knowledgechunk.content_tsv is missing; run alembic upgrade for hybrid search")
+                return []
+            return [tuple(row) for row in result.all()]
+
+        # No full-text index off Postgres: score LIKE matches in Python (dev-sized tables)
+        statement = _filtered(select(KnowledgeChunk.id, KnowledgeChunk.content), filters).where(
+            or_(*[KnowledgeChunk.content.ilike(f"%{term}%") for term in terms])
+        ).limit(_LEXICAL_SCAN_LIMIT)
+        rows = (await session.execute(statement)).all()
+        scored = []
+        for chunk_id, content in rows:
+            lowered = content.lower()
+            counts = [lowered.count(term) for term in terms]
+            scored.append(((sum(1 for c in counts if c), sum(counts)), chunk_id, content))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(chunk_id, content) for _, chunk_id, content in scored[:depth]]
+    return []
+
+def reciprocal_rank_fusion(rankings: Sequence[Ranked], k: int = RRF_K) -> Ranked:
+    """
+    Merges ranked lists: score(d) = sum over lists of 1 / (k + rank of d).
+    Ties keep first-seen order.
+    """
+    scores: Dict[int, float] = {}
+    content: Dict[int, str] = {}
+    for ranking in rankings:
+        for rank, (chunk_id, text_chunk) in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            content.setdefault(chunk_id, text_chunk)
+    order = sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)
+    return [(chunk_id, content[chunk_id]) for chunk_id in order]
+
+async def search_knowledge(
+    query: str,
+    limit: int = 3,
+    source_type: Optional[str] = None,
+    project_id: Optional[str] = None,
+    world_id: Optional[str] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[str]:
+    """
+    Hybrid Search: Finds the most relevant text chunks for the query.
+
+    The vector ranking (pgvector on Postgres, the in-process index in
+    vector_index.py elsewhere) and a full-text ranking (tsvector + GIN) run
+    concurrently, each on its own connection, and are merged with
+    reciprocal rank fusion, so questions naming an exact identifier find it
+    even when its embedding neighbourhood is crowded.
+
+    Args:
+        query: Free-text question.
+        limit: Number of chunks to return.
+        source_type, project_id, world_id: Optional filters, applied inside
+            both rankings so the planner can use the btree indexes on them
+            (or filter inside the HNSW scan).
+        ef_search: HNSW candidate list size (default EVALFORGE_RAG_EF_SEARCH);
+            raise it when filters are selective.
+        probes: IVFFlat lists to scan (default EVALFORGE_RAG_PROBES).
+        mode: "hybrid" | "vector" | "lexical" (default EVALFORGE_RAG_SEARCH_MODE).
+    """
+    mode = mode or RAG_SEARCH_MODE
+    filters = {"source_type": source_type, "project_id": project_id, "world_id": world_id}
+
+    if mode == "vector":
+        rankings = [await _vector_ranked(query, limit, filters, ef_search, probes)]
+    elif mode == "lexical":
+        rankings = [await _lexical_ranked(query, limit, filters)]
+    else:
+        # Fuse over deeper candidate lists than we return
+        depth = max(limit * RRF_DEPTH_FACTOR, RRF_MIN_DEPTH)
+        rankings = list(await asyncio.gather(
+            _vector_ranked(query, depth, filters, ef_search, probes),
+            _lexical_ranked(query, depth, filters),
+        ))
+    return [text_chunk for _, text_chunk in reciprocal_rank_fusion(rankings)[:limit]]
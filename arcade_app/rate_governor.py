@@ -0,0 +1,257 @@
+"""
+Cluster-wide adaptive rate governor for Vertex AI calls.
+
+One token bucket per model is shared by every Cloud Run instance through
+Redis (falls back to an in-process bucket when Redis is unavailable). The
+refill rate adapts AIMD-style: it grows additively after each successful
+call and is cut multiplicatively whenever Vertex answers 429/503.
+
+Agent types are mapped to priority classes. Interactive traffic (judge,
+coach, explain) may drain the bucket completely; background traffic
+(codex generation, bulk RAG embedding) may only take a token while a
+reserve is left, so it backs off first when quota gets tight.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("evalforge.rate")
+
+KEY_PREFIX = "evalforge:rate"
+
+DEFAULT_RATE = float(os.getenv("EVALFORGE_RATE_DEFAULT_QPS", "5"))
+MIN_RATE = float(os.getenv("EVALFORGE_RATE_MIN_QPS", "0.5"))
+MAX_RATE = float(os.getenv("EVALFORGE_RATE_MAX_QPS", "50"))
+ADDITIVE_STEP = float(os.getenv("EVALFORGE_RATE_ADD_STEP", "0.1"))
+DECREASE_FACTOR = float(os.getenv("EVALFORGE_RATE_DECREASE_FACTOR", "0.5"))
+BURST_SEC = float(os.getenv("EVALFORGE_RATE_BURST_SEC", "2"))
+MAX_WAIT_SEC = float(os.getenv("EVALFORGE_RATE_MAX_WAIT_SEC", "30"))
+REDIS_RETRY_AFTER_SEC = 30.0
+
+# Fraction of bucket capacity each priority class must leave untouched.
+PRIORITY_RESERVE = {
+    "interactive": 0.0,
+    "background": 0.5,
+}
+
+AGENT_PRIORITY = {
+    "judge": "interactive",
+    "coach": "interactive",
+    "explain": "interactive",
+    "quest": "interactive",
+    "codex": "background",
+    "embed": "background",        # bulk RAG indexing
+    "embed_query": "interactive",  # search-time query vectors (retrieve_docs)
+}
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when no token became available within the wait budget."""
+
+
+def _replaying() -> bool:
+    # Cassette replay never reaches Vertex, so there is no quota to protect
+    from .cassette import cassette
+    return cassette.replaying
+
+
+# Untyped errors (raw HTTP / gRPC text): a status code only counts next to
+# its reason phrase, so token counts, request ids or line numbers that
+# happen to contain 429/503 don't halve the rate
+_THROTTLE_TEXT = re.compile(
+    r"RESOURCE_EXHAUSTED"
+    r"|\b429\b[\s:-]*(?:Too Many Requests|Resource (?:has been )?exhausted)"
+    r"|\b503\b[\s:-]*(?:Service Unavailable|UNAVAILABLE)",
+    re.IGNORECASE,
+)
+
+
+def is_throttle_error(e: BaseException) -> bool:
+    """True for Vertex quota / overload responses (HTTP 429 or 503)."""
+    try:
+        from google.api_core import exceptions as gexc
+        if isinstance(e, (gexc.TooManyRequests, gexc.ResourceExhausted, gexc.ServiceUnavailable)):
+            return True
+    except ImportError:
+        pass
+    code = getattr(e, "code", None)
+    if code in (429, 503):
+        return True
+    return _THROTTLE_TEXT.search(str(e)) is not None
+
+
+
+# KEYS[1] = bucket hash. ARGV = reserve_fraction, default_rate, burst_sec
+# Returns {allowed (0/1), wait_seconds (string)}
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local reserve = tonumber(ARGV[1])
+local s = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local rate = tonumber(s[3]) or tonumber(ARGV[2])
+local cap = math.max(1, rate * tonumber(ARGV[3]))
+local tokens = tonumber(s[1]) or cap
+local ts = tonumber(s[2]) or now
+tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+local floor = reserve * cap
+local allowed = 0
+local wait = 0
+if tokens - 1 >= floor then
+  tokens = tokens - 1
+  allowed = 1
+else
+  wait = (floor + 1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 3600)
+return {allowed, tostring(wait)}
+"""
+
+# KEYS[1] = bucket hash. ARGV = throttled (0/1), default_rate, min, max, step, factor
+_ADJUST_LUA = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[2])
+if ARGV[1] == '1' then
+  rate = math.max(tonumber(ARGV[3]), rate * tonumber(ARGV[6]))
+else
+  rate = math.min(tonumber(ARGV[4]), rate + tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(rate)
+"""
+
+
+@dataclass
+class _LocalBucket:
+    """In-process twin of the Redis bucket, used when Redis is down."""
+    rate: float = DEFAULT_RATE
+    tokens: Optional[float] = None
+    ts: float = 0.0
+
+    def try_take(self, reserve: float, now: float) -> Tuple[bool, float]:
+        cap = max(1.0, self.rate * BURST_SEC)
+        if self.tokens is None:
+            self.tokens, self.ts = cap, now
+        self.tokens = min(cap, self.tokens + max(0.0, now - self.ts) * self.rate)
+        self.ts = now
+        floor = reserve * cap
+        if self.tokens - 1 >= floor:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (floor + 1 - self.tokens) / self.rate
+
+    def adjust(self, throttled: bool) -> float:
+        if throttled:
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+        else:
+            self.rate = min(MAX_RATE, self.rate + ADDITIVE_STEP)
+        return self.rate
+
+
+class RateGovernor:
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self.enabled = os.getenv("EVALFORGE_RATE_GOVERNOR", "1") != "0"
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._acquire_script = None
+        self._adjust_script = None
+        self._local: Dict[str, _LocalBucket] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            from redis.asyncio import Redis
+            self._redis = Redis.from_url(self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+            self._acquire_script = self._redis.register_script(_ACQUIRE_LUA)
+            self._adjust_script = self._redis.register_script(_ADJUST_LUA)
+        return self._redis
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Rate governor Redis tier unavailable, using local buckets: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SEC
+
+    def _bump(self, agent: str, field: str) -> None:
+        agent_stats = self.stats.setdefault(agent, {"granted": 0, "waited": 0, "throttled": 0})
+        agent_stats[field] += 1
+
+    async def _try_take(self, model: str, reserve: float) -> Tuple[bool, float]:
+        if self._get_redis() is not None:
+            try:
+                allowed, wait = await self._acquire_script(
+                    keys=[f"{KEY_PREFIX}:{model}"],
+                    args=[reserve, DEFAULT_RATE, BURST_SEC],
+                )
+                return bool(int(allowed)), float(wait)
+            except Exception as e:
+                self._redis_failed(e)
+        bucket = self._local.setdefault(model, _LocalBucket())
+        return bucket.try_take(reserve, time.monotonic())
+
+    async def acquire(self, model: str, agent: str, max_wait: float = MAX_WAIT_SEC) -> None:
+        """Wait for a token for `model` on behalf of `agent` (judge, coach, codex, ...)."""
+        if not self.enabled or _replaying():
+            return
+        reserve = PRIORITY_RESERVE[AGENT_PRIORITY.get(agent, "interactive")]
+        deadline = time.monotonic() + max_wait
+        waited = False
+        while True:
+            allowed, wait = await self._try_take(model, reserve)
+            if allowed:
+                self._bump(agent, "granted")
+                return
+            if not waited:
+                self._bump(agent, "waited")
+                waited = True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitExceeded(f"No Vertex quota for {model} ({agent}) within {max_wait:.0f}s")
+            await asyncio.sleep(min(max(wait, 0.01), remaining))
+
+    async def report(self, model: str, agent: str, throttled: bool) -> None:
+        """Feed a call outcome back into the AIMD controller."""
+        if not self.enabled or _replaying():
+            return
+        if throttled:
+            self._bump(agent, "throttled")
+        if self._get_redis() is not None:
+            try:
+                await self._adjust_script(
+                    keys=[f"{KEY_PREFIX}:{model}"],
+                    args=[1 if throttled else 0, DEFAULT_RATE, MIN_RATE, MAX_RATE, ADDITIVE_STEP, DECREASE_FACTOR],
+                )
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        self._local.setdefault(model, _LocalBucket()).adjust(throttled)
+
+    @asynccontextmanager
+    async def slot(self, model: str, agent: str):
+        """
+        Acquire a token, run the block, and report success or throttling.
+
+            async with rate_governor.slot(model_name, "judge"):
+                response = await model.generate_content_async(...)
+        """
+        await self.acquire(model, agent)
+        try:
+            yield
+        except Exception as e:
+            if is_throttle_error(e):
+                await self.report(model, agent, throttled=True)
+            raise
+        else:
+            await self.report(model, agent, throttled=False)
+
+
+# Singleton instance
+rate_governor = RateGovernor()
@@ -0,0 +1,60 @@
+# arcade_app/routers/routes_judge.py
+"""
+Judge API routes.
+POST /api/judge/batch grades many submissions in one call and streams the
+results back as NDJSON, one line per submission, as each one completes.
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from arcade_app.auth_helper import get_current_user
+from arcade_app.grading_helper import grade_many_as_completed
+
+MAX_BATCH_SIZE = 500
+
+router = APIRouter(prefix="/api/judge", tags=["judge"])
+
+
+class JudgeBatchItem(BaseModel):
+    input: str
+    id: Optional[str] = None
+    track: Optional[str] = None
+
+
+class JudgeBatchRequest(BaseModel):
+    submissions: List[Union[str, JudgeBatchItem]] = Field(..., max_length=MAX_BATCH_SIZE)
+    track: str = "default"
+    concurrency: int = Field(default=8, ge=1, le=32)
+
+
+@router.post("/batch")
+async def judge_batch(
+    body: JudgeBatchRequest,
+    current_user: Dict = Depends(get_current_user),
+):
+    """
+    Stream NDJSON lines of the form
+    {"index", "id", "track", "ok", "grade", "error", "latency_ms"}
+    in completion order; use "index" to map back to the request.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    submissions = [
+        s.model_dump() if isinstance(s, JudgeBatchItem) else s
+        for s in body.submissions
+    ]
+
+    async def _stream():
+        async for result in grade_many_as_completed(
+            submissions, track=body.track, concurrency=body.concurrency
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
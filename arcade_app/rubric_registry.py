@@ -0,0 +1,238 @@
+"""
+Compiled registry of boss rubrics and ZERO judge prompts.
+
+Every `rubrics/*.json` file and every ZERO prompt listed in
+ZERO_BOSS_PROMPTS (`rubrics/zero_boss_judge_*.md`) is read and validated
+once. For each rubric the registry precomputes everything a boss
+evaluation needs on the hot path:
+
+- the validated BossRubric and its `dict()` form (sent to ZERO as JSON)
+- the final ZERO system prompt (base prompt + rubric-specific instructions)
+- a (dimension key, level) -> band lookup table for `score_boss_eval`
+
+Files are re-checked at most every EVALFORGE_RUBRIC_RELOAD_SEC seconds and
+only the ones whose mtime changed are re-read, so editing a rubric in dev
+takes effect without a restart.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .boss_rubric_models import BossRubric, BossRubricBand, BossRubricDimension
+
+logger = logging.getLogger("evalforge.rubrics")
+
+RUBRIC_DIR = Path("rubrics")
+RELOAD_INTERVAL_SEC = float(os.getenv("EVALFORGE_RUBRIC_RELOAD_SEC", "2"))
+
+RUBRIC_SEPARATOR = "\n\n--- RUBRIC-SPECIFIC INSTRUCTIONS ---\n"
+
+
+@dataclass
+class CompiledRubric:
+    """A validated rubric plus everything precomputed from it."""
+    rubric: BossRubric
+    path: Path
+    mtime: float
+    rubric_dict: dict
+    system_prompt: str = ""
+    dimensions: Dict[str, BossRubricDimension] = field(default_factory=dict)
+    bands: Dict[Tuple[str, int], BossRubricBand] = field(default_factory=dict)
+    lowest_band: Dict[str, BossRubricBand] = field(default_factory=dict)
+
+    def band_for(self, key: str, level: int) -> Optional[BossRubricBand]:
+        """Band for a ZERO choice; unknown levels fall back to the lowest band."""
+        band = self.bands.get((key, level))
+        if band is None:
+            band = self.lowest_band.get(key)
+        return band
+
+
+def compile_rubric(rubric: BossRubric, path: Path = Path(""), mtime: float = 0.0) -> CompiledRubric:
+    """Build the lookup tables for a rubric (system prompt is filled in by the registry)."""
+    compiled = CompiledRubric(rubric=rubric, path=path, mtime=mtime, rubric_dict=rubric.dict())
+    for dim in rubric.dimensions:
+        compiled.dimensions[dim.key] = dim
+        for band in dim.bands:
+            compiled.bands.setdefault((dim.key, band.level), band)
+        if dim.bands:
+            compiled.lowest_band[dim.key] = min(dim.bands, key=lambda b: b.level)
+    return compiled
+
+
+def _resolve_candidates(rubric_id: str) -> Tuple[str, ...]:
+    """File names `load_boss_rubric` has always accepted, in priority order."""
+    if rubric_id.endswith(".json"):
+        return (rubric_id,)
+    slug_format = rubric_id.replace("_", "-")
+    if slug_format.startswith("boss-"):
+        return (f"{slug_format}.json", f"{rubric_id}.json")
+    return (f"boss-{slug_format}.json", f"{rubric_id}.json")
+
+
+class RubricRegistry:
+    def __init__(self, rubric_dir: Path = RUBRIC_DIR, reload_interval: float = RELOAD_INTERVAL_SEC):
+        self.rubric_dir = Path(rubric_dir)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._by_file: Dict[str, CompiledRubric] = {}
+        self._by_id: Dict[str, CompiledRubric] = {}
+        self._by_object: Dict[int, CompiledRubric] = {}
+        # boss_slug -> (path, mtime, text)
+        self._prompts: Dict[str, Tuple[Path, float, str]] = {}
+        # file name -> (mtime, validation error) for files that failed to load
+        self._errors: Dict[str, Tuple[float, Exception]] = {}
+        self._last_check = 0.0
+        self.loads = 0
+
+    # --- Loading -----------------------------------------------------------
+
+    def _prompt_paths(self) -> Dict[str, Path]:
+        from .prompts.zero_boss_judge import ZERO_BOSS_PROMPTS
+
+        # Only bosses listed in ZERO_BOSS_PROMPTS get a specialized prompt; other
+        # zero_boss_judge_*.md files are drafts and must not change judge behavior
+        return {slug: Path(p) for slug, p in ZERO_BOSS_PROMPTS.items()}
+
+    def _base_prompt(self, boss_slug: str) -> str:
+        from .prompts.zero_boss_judge import ZERO_BOSS_JUDGE_SYSTEM_PROMPT
+
+        entry = self._prompts.get(boss_slug)
+        return entry[2] if entry else ZERO_BOSS_JUDGE_SYSTEM_PROMPT
+
+    def _finish(self, compiled: CompiledRubric) -> None:
+        compiled.system_prompt = (
+            self._base_prompt(compiled.rubric.boss_slug).strip()
+            + RUBRIC_SEPARATOR
+            + compiled.rubric.llm_judge_instructions.strip()
+        )
+
+    def _scan(self) -> None:
+        changed_slugs = set()
+
+        # 1. Judge prompts
+        seen_slugs = set()
+        for slug, path in self._prompt_paths().items():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            seen_slugs.add(slug)
+            cached = self._prompts.get(slug)
+            if cached and cached[0] == path and cached[1] == mtime:
+                continue
+            try:
+                text = path.read_text(encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Could not read judge prompt {path}: {e}")
+                continue
+            self._prompts[slug] = (path, mtime, text)
+            changed_slugs.add(slug)
+        for slug in set(self._prompts) - seen_slugs:
+            del self._prompts[slug]
+            changed_slugs.add(slug)
+
+        # 2. Rubrics
+        seen_files = set()
+        for path in self.rubric_dir.glob("*.json"):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            seen_files.add(path.name)
+            cached = self._by_file.get(path.name)
+            if cached and cached.mtime == mtime:
+                if cached.rubric.boss_slug in changed_slugs:
+                    self._finish(cached)
+                continue
+            if path.name in self._errors and self._errors[path.name][0] == mtime:
+                continue
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    rubric = BossRubric.model_validate(json.load(f))
+            except Exception as e:
+                # Not every JSON file in rubrics/ is a boss rubric; remember why for get()
+                logger.debug(f"Skipping {path}: {e}")
+                self._errors[path.name] = (mtime, e)
+                self._by_file.pop(path.name, None)
+                continue
+            self._errors.pop(path.name, None)
+            compiled = compile_rubric(rubric, path, mtime)
+            self._finish(compiled)
+            self._by_file[path.name] = compiled
+            self.loads += 1
+            if cached:
+                logger.info(f"Reloaded rubric {path.name}")
+        for name in set(self._by_file) - seen_files:
+            del self._by_file[name]
+        for name in set(self._errors) - seen_files:
+            del self._errors[name]
+
+        self._by_id = {c.rubric.id: c for c in self._by_file.values()}
+        self._by_object = {id(c.rubric): c for c in self._by_file.values()}
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-stat the rubric directory (throttled unless `force`)."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if not force and now - self._last_check < self.reload_interval:
+                return
+            self._scan()
+            self._last_check = time.monotonic()
+
+    def warmup(self) -> int:
+        """Load everything up front. Returns the number of rubrics compiled."""
+        self.refresh(force=True)
+        return len(self._by_file)
+
+    # --- Lookups -----------------------------------------------------------
+
+    def get(self, rubric_id: str) -> CompiledRubric:
+        """
+        Compiled rubric by rubric_id or file name.
+
+        Raises:
+            FileNotFoundError: If no rubric file matches
+            ValidationError / JSONDecodeError: If the matching file is not a valid rubric
+        """
+        self.refresh()
+        for name in _resolve_candidates(rubric_id):
+            compiled = self._by_file.get(name)
+            if compiled:
+                return compiled
+            if name in self._errors:
+                raise self._errors[name][1]
+        compiled = self._by_id.get(rubric_id)
+        if compiled:
+            return compiled
+        raise FileNotFoundError(f"No boss rubric found for '{rubric_id}' in {self.rubric_dir}")
+
+    def compiled_for(self, rubric: BossRubric) -> CompiledRubric:
+        """Compiled tables for a rubric object, compiling ad-hoc rubrics on the fly."""
+        self.refresh()
+        compiled = self._by_object.get(id(rubric))
+        if compiled is not None and compiled.rubric is rubric:
+            return compiled
+        compiled = compile_rubric(rubric)
+        self._finish(compiled)
+        return compiled
+
+    def stats(self) -> dict:
+        return {
+            "rubrics": len(self._by_file),
+            "prompts": len(self._prompts),
+            "loads": self.loads,
+        }
+
+
+# Singleton instance
+rubric_registry = RubricRegistry()
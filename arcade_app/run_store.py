@@ -0,0 +1,366 @@
+"""
+Embedded store for BatchRunner runs, built for cross-run analytics.
+
+The runs/<run_id>.json + .results.jsonl files stay as the per-run artifact;
+this store is the index over all of them. It is a single SQLite file
+(stdlib, no server) with three tables:
+
+- cases:    case_id -> small integer (interned once, shared by every run)
+- tracks:   track name -> small integer
+- runs:     one row per run; meta + totals plus the per-case results as
+            packed typed columns, sorted by case index:
+              case_idx int32, track_idx int16, score float32,
+              latency_ms float32, passed uint8, errored uint8
+
+A 10k-case run is ~150 KB of columns instead of a few MB of JSON, and a
+query never parses JSON: it loads the blobs with np.frombuffer and works on
+whole arrays (searchsorted for a case, bincount for per-track rates).
+
+    python -m arcade_app.run_store import runs/*.json
+    python -m arcade_app.run_store trend case-42 --last 100
+    python -m arcade_app.run_store tracks run_A run_B
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("evalforge.run_store")
+
+DEFAULT_PATH = os.getenv("EVALFORGE_RUN_STORE", "runs/evalforge_runs.db")
+
+# name -> dtype of each packed column (little-endian, fixed width)
+COLUMNS: Dict[str, str] = {
+    "case_idx": "<i4",
+    "track_idx": "<i2",
+    "score": "<f4",
+    "latency_ms": "<f4",
+    "passed": "u1",
+    "errored": "u1",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    idx INTEGER PRIMARY KEY,
+    case_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    idx INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    total_cases INTEGER NOT NULL,
+    avg_score REAL NOT NULL,
+    pass_rate REAL NOT NULL,
+    errors INTEGER NOT NULL,
+    case_idx BLOB NOT NULL,
+    track_idx BLOB NOT NULL,
+    score BLOB NOT NULL,
+    latency_ms BLOB NOT NULL,
+    passed BLOB NOT NULL,
+    errored BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_timestamp ON runs(timestamp);
+"""
+
+
+@dataclass
+class RunColumns:
+    """One run's results as parallel arrays, sorted by case_idx."""
+    run_id: str
+    timestamp: str
+    case_idx: np.ndarray
+    track_idx: np.ndarray
+    score: np.ndarray
+    latency_ms: np.ndarray
+    passed: np.ndarray
+    errored: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.case_idx)
+
+
+class RunStore:
+    """SQLite-backed run index. Safe to share across threads (one lock, short transactions)."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # --- Interning -----------------------------------------------------------
+
+    def _intern(self, table: str, column: str, values: Iterable[str]) -> Dict[str, int]:
+        values = set(values)
+        known = dict(self._conn.execute(f"SELECT {column}, idx FROM {table}"))
+        missing = sorted(values - known.keys())
+        if missing:
+            self._conn.executemany(f"INSERT INTO {table} ({column}) VALUES (?)", [(v,) for v in missing])
+            known = dict(self._conn.execute(f"SELECT {column}, idx FROM {table}"))
+        return known
+
+    def _names(self, table: str, column: str) -> Dict[int, str]:
+        return {idx: name for name, idx in self._conn.execute(f"SELECT {column}, idx FROM {table}")}
+
+    # --- Writes ----------------------------------------------------------------
+
+    def record_run(self, run_id: str, meta: Dict[str, Any], results: Iterable[Dict[str, Any]]) -> RunColumns:
+        """
+        Stores (or replaces) a run.
+
+        Args:
+            run_id: Unique run id (BatchRunner's run_<timestamp>).
+            meta: The run's meta block; `timestamp` orders runs for trends.
+            results: Dicts with case_id, track, score, latency_ms, passed, error.
+                A case seen more than once keeps its last record (resumed retries).
+
+        Returns:
+            The packed columns that were written.
+        """
+        latest: Dict[str, Dict[str, Any]] = {}
+        for rec in results:
+            latest[str(rec.get("case_id", rec.get("id")))] = rec
+
+        with self._lock:
+            case_map = self._intern("cases", "case_id", latest.keys())
+            track_map = self._intern("tracks", "name", (r.get("track", "default") for r in latest.values()))
+
+            n = len(latest)
+            cols = {name: np.empty(n, dtype=dt) for name, dt in COLUMNS.items()}
+            for i, (case_id, rec) in enumerate(latest.items()):
+                cols["case_idx"][i] = case_map[case_id]
+                cols["track_idx"][i] = track_map[rec.get("track", "default")]
+                cols["score"][i] = rec.get("score", 0)
+                cols["latency_ms"][i] = rec.get("latency_ms", 0)
+                cols["passed"][i] = bool(rec.get("passed"))
+                cols["errored"][i] = rec.get("error") is not None
+
+            order = np.argsort(cols["case_idx"], kind="stable")
+            cols = {name: arr[order] for name, arr in cols.items()}
+
+            timestamp = meta.get("timestamp", "")
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO runs (run_id, timestamp, meta, total_cases, avg_score, pass_rate, errors, "
+                f"{', '.join(COLUMNS)}) VALUES ({', '.join('?' * (7 + len(COLUMNS)))})",
+                (
+                    run_id, timestamp, json.dumps(meta), n,
+                    float(cols["score"].mean()) if n else 0.0,
+                    float(cols["passed"].mean()) if n else 0.0,
+                    int(cols["errored"].sum()),
+                    *(cols[name].tobytes() for name in COLUMNS),
+                ),
+            )
+            self._conn.commit()
+
+        return RunColumns(run_id=run_id, timestamp=timestamp, **cols)
+
+    def import_run_file(self, path: str) -> Optional[str]:
+        """Backfills a runs/<run_id>.json file (legacy results list or summary + NDJSON)."""
+        with open(path, "r") as f:
+            doc = json.load(f)
+        meta = doc.get("meta", {})
+        run_id = meta.get("run_id") or os.path.splitext(os.path.basename(path))[0]
+
+        if "results_file" in doc:
+            results_path = os.path.join(os.path.dirname(path), doc["results_file"])
+            results = _iter_ndjson(results_path) if os.path.exists(results_path) else iter(())
+        else:
+            results = doc.get("results", [])
+        self.record_run(run_id, meta, results)
+        return run_id
+
+    # --- Reads -----------------------------------------------------------------
+
+    def list_runs(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run totals, oldest first (the most recent `last` runs if given)."""
+        sql = "SELECT run_id, timestamp, total_cases, avg_score, pass_rate, errors FROM runs ORDER BY timestamp DESC, run_id DESC"
+        params: Tuple = ()
+        if last is not None:
+            sql += " LIMIT ?"
+            params = (last,)
+        keys = ("run_id", "timestamp", "total_cases", "avg_score", "pass_rate", "errors")
+        rows = [dict(zip(keys, row)) for row in self._conn.execute(sql, params)]
+        return rows[::-1]
+
+    def load(self, run_id: str) -> RunColumns:
+        row = self._conn.execute(
+            f"SELECT timestamp, {', '.join(COLUMNS)} FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Run '{run_id}' is not in {self.path}")
+        arrays = {name: np.frombuffer(blob, dtype=dt) for (name, dt), blob in zip(COLUMNS.items(), row[1:])}
+        return RunColumns(run_id=run_id, timestamp=row[0], **arrays)
+
+    def iter_results(self, run_id: str):
+        """Yields a run's results as dicts (compare_runs reads runs from the store this way)."""
+        cols = self.load(run_id)
+        case_names = self._names("cases", "case_id")
+        track_names = self._names("tracks", "name")
+        for i in range(len(cols)):
+            yield {
+                "case_id": case_names[int(cols.case_idx[i])],
+                "track": track_names[int(cols.track_idx[i])],
+                "score": float(cols.score[i]),
+                "latency_ms": float(cols.latency_ms[i]),
+                "passed": bool(cols.passed[i]),
+                "error": "error" if cols.errored[i] else None,
+            }
+
+    def case_trend(self, case_id: str, last: int = 100) -> List[Dict[str, Any]]:
+        """
+        Score history of one case across the most recent `last` runs.
+
+        Returns:
+            Oldest-first list of {run_id, timestamp, score, passed}; runs that
+            did not include the case are skipped.
+        """
+        row = self._conn.execute("SELECT idx FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+        if row is None:
+            return []
+        target = row[0]
+
+        trend = []
+        for run in self.list_runs(last=last):
+            cols = self.load(run["run_id"])
+            pos = int(np.searchsorted(cols.case_idx, target))
+            if pos < len(cols) and cols.case_idx[pos] == target:
+                trend.append({
+                    "run_id": run["run_id"],
+                    "timestamp": run["timestamp"],
+                    "score": float(cols.score[pos]),
+                    "passed": bool(cols.passed[pos]),
+                })
+        return trend
+
+    def case_fail_rates(self, last: int = 100) -> Dict[str, Tuple[int, float]]:
+        """
+        How often each case disagreed with its expected score (passed == 0)
+        over the most recent `last` runs.
+
+        Returns:
+            case_id -> (runs the case appeared in, fraction of those it failed)
+        """
+        runs = self.list_runs(last=last)
+        if not runs:
+            return {}
+        n_cases = self._conn.execute("SELECT COALESCE(MAX(idx), 0) FROM cases").fetchone()[0] + 1
+        seen = np.zeros(n_cases, dtype=np.int64)
+        failed = np.zeros(n_cases, dtype=np.int64)
+        for run in runs:
+            cols = self.load(run["run_id"])
+            seen[cols.case_idx] += 1  # case_idx is unique within a run
+            failed[cols.case_idx] += 1 - cols.passed.astype(np.int64)
+
+        names = self._names("cases", "case_id")
+        return {
+            names[int(idx)]: (int(seen[idx]), float(failed[idx] / seen[idx]))
+            for idx in np.nonzero(seen)[0]
+        }
+
+    def track_pass_rates(self, run_id: str) -> Dict[str, Dict[str, float]]:
+        """Per-track case count, pass rate, mean score and p50 latency for one run."""
+        cols = self.load(run_id)
+        if not len(cols):
+            return {}
+        n_tracks = int(cols.track_idx.max()) + 1
+        counts = np.bincount(cols.track_idx, minlength=n_tracks)
+        passed = np.bincount(cols.track_idx, weights=cols.passed, minlength=n_tracks)
+        scores = np.bincount(cols.track_idx, weights=cols.score, minlength=n_tracks)
+        names = self._names("tracks", "name")
+
+        rates = {}
+        for idx in np.nonzero(counts)[0]:
+            latency = cols.latency_ms[cols.track_idx == idx]
+            rates[names[int(idx)]] = {
+                "cases": int(counts[idx]),
+                "pass_rate": float(passed[idx] / counts[idx]),
+                "avg_score": float(scores[idx] / counts[idx]),
+                "p50_latency_ms": float(np.median(latency)),
+            }
+        return rates
+
+    def track_regressions(self, baseline: str, candidate: str, min_drop: float = 0.0) -> List[Dict[str, Any]]:
+        """Tracks whose pass rate dropped by more than `min_drop` (0..1) between two runs, worst first."""
+        before = self.track_pass_rates(baseline)
+        after = self.track_pass_rates(candidate)
+        drops = []
+        for track, stats in after.items():
+            if track not in before:
+                continue
+            drop = before[track]["pass_rate"] - stats["pass_rate"]
+            if drop > min_drop:
+                drops.append({
+                    "track": track,
+                    "baseline_pass_rate": before[track]["pass_rate"],
+                    "candidate_pass_rate": stats["pass_rate"],
+                    "drop": drop,
+                })
+        return sorted(drops, key=lambda d: d["drop"], reverse=True)
+
+
+def _iter_ndjson(path: str):
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line of an interrupted run
+
+
+def _main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the EvalForge run store.")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Run store path (EVALFORGE_RUN_STORE)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_import = sub.add_parser("import", help="Backfill runs/<run_id>.json files")
+    p_import.add_argument("paths", nargs="+")
+    sub.add_parser("runs", help="List stored runs")
+    p_trend = sub.add_parser("trend", help="Score trend of one case")
+    p_trend.add_argument("case_id")
+    p_trend.add_argument("--last", type=int, default=100)
+    p_tracks = sub.add_parser("tracks", help="Tracks whose pass rate dropped between two runs")
+    p_tracks.add_argument("baseline")
+    p_tracks.add_argument("candidate")
+    p_tracks.add_argument("--min-drop", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    store = RunStore(args.db)
+    if args.cmd == "import":
+        for path in args.paths:
+            print(f"📥 {store.import_run_file(path)} <- {path}")
+    elif args.cmd == "runs":
+        for run in store.list_runs():
+            print(f"{run['run_id']} | {run['timestamp']} | cases={run['total_cases']} | avg={run['avg_score']:.1f} | pass={run['pass_rate']:.0%}")
+    elif args.cmd == "trend":
+        for point in store.case_trend(args.case_id, last=args.last):
+            print(f"{point['run_id']} | {point['score']:.1f} | {'✅' if point['passed'] else '❌'}")
+    elif args.cmd == "tracks":
+        drops = store.track_regressions(args.baseline, args.candidate, min_drop=args.min_drop)
+        if not drops:
+            print("🎉 No track pass-rate drops.")
+        for d in drops:
+            print(f"🔴 {d['track']}: {d['baseline_pass_rate']:.0%} -> {d['candidate_pass_rate']:.0%}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,125 @@
+"""
+Paired significance tests for run comparisons (see scripts/compare_runs.py).
+
+Both tests work on per-case score deltas (candidate - baseline):
+
+- bootstrap CI of the mean delta (resample cases with replacement)
+- sign-flip permutation test (under H0 each delta is as likely to be
+  negated), one-sided towards "candidate is worse"
+
+Judge scores are coarse: three 0-5 rubric points give 26 possible
+weighted_scores, so deltas take at most 51 distinct values. Both tests
+are therefore computed on (value, count) pairs instead of on cases: a
+bootstrap resample is a multinomial draw over the distinct values and a
+sign-flip resample is a binomial draw per distinct |delta|. 10k resamples
+then cost O(resamples x distinct values), ~0.1 s for 10k x 10k cases.
+Continuous deltas (custom graders) fall back to chunked index resampling,
+which gives the same distribution but takes ~1 s at that size.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_ALPHA = 0.05
+
+# Above this many distinct deltas the (value, count) trick stops paying off
+MAX_DISTINCT = 128
+# Elements per chunk for the index-resampling fallback (~16 MB of int32 indices)
+CHUNK_ELEMENTS = 1 << 22
+
+
+@dataclass
+class PairedTest:
+    n: int
+    mean_delta: float
+    ci_low: float
+    ci_high: float
+    p_value: float  # one-sided: P(mean delta this low | no real change)
+
+    def significant_regression(self, alpha: float = DEFAULT_ALPHA) -> bool:
+        return self.n > 0 and self.p_value < alpha and self.ci_high < 0
+
+
+def _bootstrap_means(deltas: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    n = deltas.size
+    values, counts = np.unique(deltas, return_counts=True)
+    if values.size <= MAX_DISTINCT:
+        draws = rng.multinomial(n, counts / n, size=n_resamples)
+        return draws @ values / n
+
+    means = np.empty(n_resamples)
+    block = max(1, CHUNK_ELEMENTS // n)
+    for start in range(0, n_resamples, block):
+        stop = min(start + block, n_resamples)
+        idx = rng.integers(0, n, size=(stop - start, n), dtype=np.int32)
+        means[start:stop] = deltas.take(idx).sum(axis=1) / n
+    return means
+
+
+def _sign_flip_means(deltas: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    n = deltas.size
+    magnitudes, counts = np.unique(np.abs(deltas[deltas != 0]), return_counts=True)
+    if magnitudes.size == 0:
+        return np.zeros(n_resamples)
+    if magnitudes.size <= MAX_DISTINCT:
+        # Sum of c random signs = 2 * Binomial(c, 1/2) - c
+        positives = rng.binomial(counts, 0.5, size=(n_resamples, counts.size))
+        return (2 * positives - counts) @ magnitudes / n
+
+    means = np.empty(n_resamples)
+    nonzero = deltas[deltas != 0]
+    block = max(1, CHUNK_ELEMENTS // nonzero.size)
+    for start in range(0, n_resamples, block):
+        stop = min(start + block, n_resamples)
+        # One random bit per case and resample
+        bits = rng.integers(0, 256, size=(stop - start, (nonzero.size + 7) // 8), dtype=np.uint8)
+        signs = np.unpackbits(bits, axis=1, count=nonzero.size).astype(np.float64) * 2 - 1
+        means[start:stop] = signs @ nonzero / n
+    return means
+
+
+def paired_test(
+    deltas: Sequence[float],
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = 0,
+) -> PairedTest:
+    """
+    Bootstrap CI + sign-flip p-value for the mean of paired score deltas.
+
+    Args:
+        deltas: candidate - baseline score per case.
+        n_resamples: Resamples for both the bootstrap and the permutation test.
+        confidence: Two-sided CI level.
+        seed: RNG seed; fixed by default so a report is reproducible.
+
+    Returns:
+        PairedTest (all NaN-free; an empty input gives n=0, p=1).
+    """
+    arr = np.asarray(deltas, dtype=np.float64)
+    if arr.size == 0:
+        return PairedTest(0, 0.0, 0.0, 0.0, 1.0)
+
+    rng = np.random.default_rng(seed)
+    observed = float(arr.mean())
+
+    boot = _bootstrap_means(arr, n_resamples, rng)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(boot, [tail, 1 - tail])
+
+    null = _sign_flip_means(arr, n_resamples, rng)
+    # Small tolerance so float noise in the matmul doesn't drop exact ties
+    p_value = (1 + np.count_nonzero(null <= observed + 1e-9)) / (n_resamples + 1)
+
+    return PairedTest(
+        n=int(arr.size),
+        mean_delta=observed,
+        ci_low=float(low),
+        ci_high=float(high),
+        p_value=float(p_value),
+    )
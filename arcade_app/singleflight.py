@@ -0,0 +1,62 @@
+"""
+Singleflight request coalescing for LLM evaluations.
+
+When many players submit the same starter solution at once, the first
+request (the "leader") runs the evaluation and every concurrent identical
+request awaits that same in-flight call instead of firing its own.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+try:
+    from .metrics import LLM_COALESCED_TOTAL
+except ImportError:  # prometheus_client is optional outside the Cloud Run image
+    LLM_COALESCED_TOTAL = None
+
+logger = logging.getLogger("evalforge.judge")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key. Nothing is remembered after the
+    call finishes; pair with a cache for that.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.stats["coalesced"] += 1
+            if LLM_COALESCED_TOTAL is not None:
+                LLM_COALESCED_TOTAL.labels(flight=self.name).inc()  # type: ignore[attr-defined]
+            return await asyncio.shield(task)
+
+        self.stats["leaders"] += 1
+        # Run in its own task so a disconnecting leader doesn't cancel
+        # the evaluation for everyone waiting on it.
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away.
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("singleflight[%s] %s failed: %s", self.name, key, task.exception())
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+
+# Shared flights
+judge_flight = SingleFlight("judge_grade")
+zero_boss_flight = SingleFlight("zero_boss")
@@ -2,6 +2,22 @@ from langchain_core.tools import tool
 from arcade_app.rag_helper import search_knowledge
 from arcade_app.project_helper import list_projects, create_project, sync_project
 
+@tool
+async def retrieve_docs(query: str):
+    """
+    Searches the Codex and the user's synced codebases for passages relevant to the query.
+    Exact identifiers (function, class or file names) work well: retrieval is hybrid
+    (full-text + semantic), so include them verbatim instead of paraphrasing.
+    """
+    docs = await search_knowledge(query, limit=3)
+    if not docs:
+        return "No relevant documentation found in Codex."
+
+    report = f"Found {len(docs)} relevant documents:\n"
+    for i, doc in enumerate(docs, start=1):
+        report += f"\n--- Document {i} ---\n{doc}\n"
+    return report
+
 @tool
 async def list_my_projects(user_id: str):
     """
@@ -0,0 +1,442 @@
+"""
+In-process vector index for deployments without pgvector.
+
+SQLite dev/test databases (and offline demos) store KnowledgeChunk vectors
+but cannot rank them. `LocalVectorIndex` keeps a copy of the vectors on
+disk, one shard per project, and answers top-k cosine queries with NumPy:
+
+    data/vector_index/
+        MANIFEST.json                  dim, dtype
+        <project>-<hash>/vectors.bin   L2-normalized rows, float32 or float16
+        <project>-<hash>/rows.jsonl    append-only log: row -> chunk id + filters
+
+Vectors are appended, never rewritten: an update appends a new row and
+the log marks the old one dead; a shard is compacted once half its rows
+are dead. Several processes (uvicorn workers, the ARQ worker, the rebuild
+CLI) can share one index: writes take an exclusive `flock` on the shard,
+scans a shared one, and each process replays log lines written by the
+others before touching a shard. The matrix is memory-mapped and scanned in blocks
+(matmul + argpartition per block), so RSS stays flat as shards grow.
+
+rag_helper.search_knowledge picks this backend automatically when the
+database is not Postgres (EVALFORGE_VECTOR_BACKEND=local|pgvector forces
+one). The index is rebuilt from the database on first use, or with:
+
+    python -m arcade_app.vector_index rebuild
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single process, the thread lock is enough
+    fcntl = None
+
+from arcade_app.embedder import EMBEDDING_DIM
+
+logger = logging.getLogger("evalforge.rag")
+
+INDEX_DIR = os.getenv("EVALFORGE_VECTOR_INDEX_DIR", "data/vector_index")
+INDEX_DTYPE = os.getenv("EVALFORGE_VECTOR_INDEX_DTYPE", "float32")  # or float16 (half the disk/RAM)
+
+SHARED_SHARD = "_shared"  # chunks without a project (codex)
+SEARCH_BLOCK_ROWS = 65536  # rows scored per matmul
+COMPACT_MIN_DEAD = 1024
+
+Hit = Tuple[int, float]  # (chunk id, cosine similarity)
+
+
+def shard_name(project_id: Optional[str]) -> str:
+    """Filesystem-safe, collision-free directory name for a project."""
+    if not project_id:
+        return SHARED_SHARD
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", project_id)[:40]
+    return f"{safe}-{hashlib.sha1(project_id.encode('utf-8')).hexdigest()[:8]}"
+
+
+@contextmanager
+def _flock(path: str, exclusive: bool) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _normalize(vectors: Any) -> np.ndarray:
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat[None, :]
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.where(norms == 0, 1, norms)  # zero (mock) vectors stay zero
+
+
+class _Shard:
+    def __init__(self, path: str, dim: int, dtype: str):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.vectors_path = os.path.join(path, "vectors.bin")
+        self.log_path = os.path.join(path, "rows.jsonl")
+        self.lock_path = os.path.join(path, ".lock")
+        self._matrix: Optional[np.memmap] = None
+        self._reset()
+        with self.locked():
+            self.refresh()
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def _reset(self) -> None:
+        self.live: Dict[int, int] = {}  # chunk id -> row
+        self.labels: Dict[int, Tuple[Optional[str], Optional[str]]] = {}  # row -> (source_type, world_id)
+        self.rows = 0
+        self._log_pos = 0  # bytes of rows.jsonl replayed so far
+        self._log_inode: Optional[int] = None  # changes when the shard is compacted
+        self._matrix = None
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]], List[Optional[str]]]] = None
+
+    @contextmanager
+    def locked(self, exclusive: bool = False) -> Iterator[None]:
+        """Cross-process lock on the shard (shared for scans, exclusive for writes)."""
+        if fcntl is None or not (exclusive or os.path.isdir(self.path)):
+            yield
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with _flock(self.lock_path, exclusive):
+            yield
+
+    def refresh(self) -> None:
+        """Replays log lines this process has not seen yet (call under `locked`)."""
+        try:
+            log_stat = os.stat(self.log_path)
+        except OSError:
+            if self._log_inode is not None:
+                self._reset()  # shard removed
+            return
+        if log_stat.st_ino != self._log_inode or log_stat.st_size < self._log_pos:
+            self._reset()  # compacted by us or another process: replay from scratch
+            self._log_inode = log_stat.st_ino
+        if os.path.exists(self.vectors_path):
+            # Rows written without a log line (crash mid-append) just stay dead
+            self.rows = os.path.getsize(self.vectors_path) // self.row_bytes
+        if log_stat.st_size == self._log_pos:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_pos)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # torn or still being written; picked up next time
+                self._log_pos += len(raw)
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                if entry.get("deleted"):
+                    row = self.live.pop(entry["id"], None)
+                    self.labels.pop(row, None)
+                elif entry["row"] < self.rows:
+                    old = self.live.get(entry["id"])
+                    self.labels.pop(old, None)
+                    self.live[entry["id"]] = entry["row"]
+                    self.labels[entry["row"]] = (entry.get("source_type"), entry.get("world_id"))
+        self._arrays = None
+
+    def matrix(self) -> Optional[np.memmap]:
+        if self.rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.rows, self.dim))
+        return self._matrix
+
+    def vector(self, chunk_id: int) -> Optional[np.ndarray]:
+        row = self.live.get(chunk_id)
+        return None if row is None else np.array(self.matrix()[row], dtype=np.float32)
+
+    def add(self, items: Sequence[Tuple[int, np.ndarray, Optional[str], Optional[str]]]) -> None:
+        if not items:
+            return
+        mat = np.stack([vec for _, vec, _, _ in items]).astype(self.dtype)
+        with self.locked(exclusive=True):
+            self.refresh()  # rows other processes appended since we last looked
+            # Vectors first: a crash before the log write leaves dead rows, never bad ones
+            with open(self.vectors_path, "ab") as f:
+                if f.tell() != self.rows * self.row_bytes:
+                    # Only a torn partial row from a crashed writer can sit past `rows`
+                    f.truncate(self.rows * self.row_bytes)
+                    f.seek(0, os.SEEK_END)
+                f.write(mat.tobytes())
+            with open(self.log_path, "a") as f:
+                for offset, (chunk_id, _, source_type, world_id) in enumerate(items):
+                    f.write(json.dumps({"id": chunk_id, "row": self.rows + offset, "source_type": source_type, "world_id": world_id}) + "\n")
+            self.refresh()
+            self._maybe_compact()
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return
+        with self.locked(exclusive=True):
+            self.refresh()
+            gone = [chunk_id for chunk_id in chunk_ids if chunk_id in self.live]
+            if not gone:
+                return
+            with open(self.log_path, "a") as f:
+                for chunk_id in gone:
+                    f.write(json.dumps({"id": chunk_id, "deleted": True}) + "\n")
+            self.refresh()
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        dead = self.rows - len(self.live)
+        if dead >= COMPACT_MIN_DEAD and dead >= len(self.live):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrites the shard with live rows only (call under an exclusive `locked`)."""
+        order = sorted(self.live.items(), key=lambda item: item[1])
+        mat = self.matrix()
+        tmp_vectors, tmp_log = self.vectors_path + ".tmp", self.log_path + ".tmp"
+        with open(tmp_vectors, "wb") as vf, open(tmp_log, "w") as lf:
+            for new_row, (chunk_id, row) in enumerate(order):
+                vf.write(np.asarray(mat[row]).tobytes())
+                source_type, world_id = self.labels[row]
+                lf.write(json.dumps({"id": chunk_id, "row": new_row, "source_type": source_type, "world_id": world_id}) + "\n")
+        self._matrix = None  # release the mapping before replacing the file
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_log, self.log_path)
+        self.refresh()  # new log inode: replays the compacted shard
+
+    def _row_arrays(self):
+        """Per-row chunk id (-1 = dead) and integer codes for the filters."""
+        if self._arrays is None:
+            ids = np.full(self.rows, -1, dtype=np.int64)
+            for chunk_id, row in self.live.items():
+                ids[row] = chunk_id
+            source_vocab = sorted({s for s, _ in self.labels.values()}, key=str)
+            world_vocab = sorted({w for _, w in self.labels.values()}, key=str)
+            source_code = np.full(self.rows, -1, dtype=np.int32)
+            world_code = np.full(self.rows, -1, dtype=np.int32)
+            s_index = {s: i for i, s in enumerate(source_vocab)}
+            w_index = {w: i for i, w in enumerate(world_vocab)}
+            for row, (source_type, world_id) in self.labels.items():
+                source_code[row] = s_index[source_type]
+                world_code[row] = w_index[world_id]
+            self._arrays = (ids, source_code, world_code, source_vocab, world_vocab)
+        return self._arrays
+
+    def mask(self, source_type: Optional[str], world_id: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask of rows that are live and match the filters (None if none do)."""
+        ids, source_code, world_code, source_vocab, world_vocab = self._row_arrays()
+        keep = ids >= 0
+        if source_type is not None:
+            if source_type not in source_vocab:
+                return None
+            keep &= source_code == source_vocab.index(source_type)
+        if world_id is not None:
+            if world_id not in world_vocab:
+                return None
+            keep &= world_code == world_vocab.index(world_id)
+        return keep if keep.any() else None
+
+    def search(self, queries: np.ndarray, k: int, keep: np.ndarray) -> List[List[Hit]]:
+        """Block-wise top-k over the rows in `keep` for each query row."""
+        ids = self._row_arrays()[0]
+        mat = self.matrix()
+        best_scores = np.full((queries.shape[0], 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((queries.shape[0], 0), dtype=np.int64)
+        for start in range(0, self.rows, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self.rows)
+            block_keep = keep[start:stop]
+            if not block_keep.any():
+                continue
+            scores = queries @ np.asarray(mat[start:stop], dtype=np.float32).T  # (nq, block)
+            scores[:, ~block_keep] = -np.inf
+            take = min(k, stop - start)
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_ids = np.concatenate([best_ids, ids[start + top]], axis=1)
+            if best_scores.shape[1] > k:
+                keep_top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep_top, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep_top, axis=1)
+        return [
+            [(int(i), float(s)) for s, i in zip(srow, irow) if s > -np.inf]
+            for srow, irow in zip(best_scores, best_ids)
+        ]
+
+
+class LocalVectorIndex:
+    def __init__(self, root: Optional[str] = None, dim: int = EMBEDDING_DIM, dtype: Optional[str] = None):
+        self.root = os.path.normpath(root or INDEX_DIR)
+        self.dim = dim
+        self.dtype = dtype or INDEX_DTYPE
+        self._shards: Dict[str, _Shard] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, "MANIFEST.json")
+
+    def exists(self) -> bool:
+        """True once the index was built (or rebuilt) for the current dim/dtype."""
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return manifest.get("dim") == self.dim and manifest.get("dtype") == self.dtype
+
+    def _shard(self, name: str) -> _Shard:
+        if name not in self._shards:
+            self._shards[name] = _Shard(os.path.join(self.root, name), self.dim, self.dtype)
+        return self._shards[name]
+
+    def _all_shards(self) -> List[_Shard]:
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if os.path.isdir(os.path.join(self.root, name)):
+                    self._shard(name)
+        return list(self._shards.values())
+
+    def upsert(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Adds or replaces chunks.
+
+        Args:
+            chunks: Dicts with id, project_id, source_type, world_id and
+                embedding. embedding=None keeps the stored vector (re-tag only).
+        """
+        with self._lock:
+            shards = self._all_shards()
+            for shard in shards:
+                with shard.locked():
+                    shard.refresh()
+            by_shard: Dict[str, List[Tuple[int, np.ndarray, Optional[str], Optional[str]]]] = {}
+            for chunk in chunks:
+                chunk_id = int(chunk["id"])
+                vector = chunk.get("embedding")
+                if vector is None:
+                    vector = next((v for v in (s.vector(chunk_id) for s in shards) if v is not None), None)
+                    if vector is None:
+                        continue
+                by_shard.setdefault(shard_name(chunk.get("project_id")), []).append(
+                    (chunk_id, _normalize(vector)[0], chunk.get("source_type"), chunk.get("world_id"))
+                )
+            for name, items in by_shard.items():
+                moved = {chunk_id for chunk_id, _, _, _ in items}
+                for shard in shards:
+                    if shard is not self._shards.get(name):
+                        shard.remove(moved)  # project changed: drop the old copy
+                self._shard(name).add(items)
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        chunk_ids = {int(i) for i in chunk_ids}
+        if not chunk_ids:
+            return
+        with self._lock:
+            for shard in self._all_shards():
+                shard.remove(chunk_ids)
+
+    def rebuild(self, chunks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replaces the whole index with `chunks` (see upsert). Returns the count.
+
+        The new index is built in a staging directory and swapped in at the
+        end, so searches keep using the old one meanwhile; concurrent
+        rebuilds (any process) run one at a time.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.root)), exist_ok=True)
+        with _flock(f"{self.root}.lock", exclusive=True):
+            staging = LocalVectorIndex(f"{self.root}.building", self.dim, self.dtype)
+            shutil.rmtree(staging.root, ignore_errors=True)  # left over from a crashed rebuild
+            os.makedirs(staging.root)
+            count = 0
+            batch: List[Dict[str, Any]] = []
+            for chunk in chunks:
+                if chunk.get("embedding") is None:
+                    continue
+                batch.append(chunk)
+                if len(batch) >= 1000:
+                    staging.upsert(batch)
+                    count, batch = count + len(batch), []
+            staging.upsert(batch)
+            count += len(batch)
+            with open(staging.manifest_path, "w") as f:
+                json.dump({"dim": self.dim, "dtype": self.dtype}, f)
+
+            old = f"{self.root}.old"
+            with self._lock:
+                shutil.rmtree(old, ignore_errors=True)
+                if os.path.exists(self.root):
+                    os.rename(self.root, old)
+                os.rename(staging.root, self.root)
+                self._shards = {}
+            shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"Local vector index rebuilt: {count} chunk(s) in {self.root}")
+        return count
+
+    def search_many(
+        self,
+        queries: Sequence[Sequence[float]],
+        k: int,
+        project_id: Optional[str] = None,
+        source_type: Optional[str] = None,
+        world_id: Optional[str] = None,
+    ) -> List[List[Hit]]:
+        """
+        Top-k chunks by cosine similarity for each query, best first.
+
+        A project_id restricts the scan to that project's shard.
+        """
+        q = _normalize(queries)
+        results: List[List[Hit]] = [[] for _ in range(q.shape[0])]
+        if k <= 0:
+            return results
+        with self._lock:
+            shards = [self._shard(shard_name(project_id))] if project_id else self._all_shards()
+            for shard in shards:
+                with shard.locked():
+                    shard.refresh()
+                    keep = shard.mask(source_type, world_id) if shard.rows else None
+                    if keep is None:
+                        continue
+                    for merged, hits in zip(results, shard.search(q, k, keep)):
+                        merged.extend(hits)
+        return [sorted(hits, key=lambda h: -h[1])[:k] for hits in results]
+
+    def search(self, query: Sequence[float], k: int, **filters: Optional[str]) -> List[Hit]:
+        return self.search_many([query], k, **filters)[0]
+
+
+# Singleton instance (nothing is read until the first search or write)
+local_index = LocalVectorIndex()
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    async def _rebuild() -> None:
+        from arcade_app.rag_helper import rebuild_local_index
+        print(f"🗂️  Indexed {await rebuild_local_index()} chunk(s) into {local_index.root}")
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild":
+        asyncio.run(_rebuild())
+    else:
+        print("usage: python -m arcade_app.vector_index rebuild")
@@ -26,9 +26,37 @@ async def spawn_boss(ctx):
         await redis.close()
         print(f"🔥 Boss Spawned: {event['title']}")
 
+async def process_outbox(ctx, event_id: int):
+    """
+    Job: Run one outbox row (post-grade XP, badges, boss trigger).
+    Enqueued by the JudgeAgent right after it streams a grade.
+    """
+    from arcade_app.post_grade import process_outbox_event
+    return await process_outbox_event(event_id)
+
+async def sweep_outbox(ctx):
+    """
+    Cron job: Picks up outbox rows whose direct job was never enqueued
+    (Redis blip) or whose worker died mid-run.
+    """
+    from arcade_app.post_grade import sweep_outbox as _sweep
+    done = await _sweep()
+    if done:
+        print(f"📬 Outbox sweep processed {done} event(s)")
+    return done
+
+async def grade_eval_shard(ctx, run_id: str, shard: int, cases: list, concurrency: int = 4):
+    """
+    Job: Grade one shard of a distributed golden-dataset eval.
+    Enqueued by `batch_runner --distributed`; results go back through Redis.
+    """
+    from arcade_app.eval_sharding import grade_eval_shard as _grade
+    return await _grade(ctx["redis"], run_id, shard, cases, concurrency)
+
 class WorkerSettings:
-    functions = [spawn_boss]
+    functions = [spawn_boss, process_outbox, grade_eval_shard]
     cron_jobs = [
-        cron(spawn_boss, minute=None, second=0) # Run every minute at :00
+        cron(spawn_boss, minute=None, second=0), # Run every minute at :00
+        cron(sweep_outbox, minute=None, second=30), # Run every minute at :30
     ]
     redis_settings = REDIS_SETTINGS
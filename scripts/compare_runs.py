@@ -1,8 +1,23 @@
 import argparse
+import heapq
 import json
+import os
 import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, List
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Records sorted in memory before spilling to a temp file during the external sort
+SORT_CHUNK = 100_000
+
+# A latency percentile regresses when it grows by more than this fraction...
+LATENCY_THRESHOLD = 0.20
+# ...and by at least this many ms (ignores noise on sub-ms stages)
+LATENCY_MIN_MS = 25.0
 
 def load_run(path: str) -> Dict:
     with open(path, "r") as f:
@@ -13,65 +28,317 @@ def get_emoji(diff: float) -> str:
     if diff < 0: return "🔴" # Regression
     return "⚪" # Neutral
 
-def compare_runs(baseline_path: str, candidate_path: str):
-    base = load_run(baseline_path)
-    cand = load_run(candidate_path)
+# --- Run formats -----------------------------------------------------------
+#
+# 1. Legacy: one JSON document {"meta", "summary", "results": [...]}
+# 2. Streaming: summary record runs/<id>.json {"meta", "summary", "results_file"}
+#    plus NDJSON results runs/<id>.results.jsonl (one {"case_id", "score", ...} per line)
+# 3. A bare .results.jsonl / .ndjson file
+# 4. A run id looked up in the run store (--store, see arcade_app.run_store)
+
+def _normalize(rec: Dict) -> Dict:
+    """Legacy results use "id"; NDJSON results use "case_id"."""
+    if "id" not in rec and "case_id" in rec:
+        rec = {**rec, "id": rec["case_id"]}
+    return rec
+
+def open_run(path: str, store=None) -> Tuple[Optional[Dict], Iterator[Dict]]:
+    """Returns (summary or None, iterator over result records)."""
+    if store is not None and not os.path.exists(path):
+        summary = next((r for r in store.list_runs() if r["run_id"] == path), None)
+        if summary is None:
+            raise FileNotFoundError(f"'{path}' is neither a run file nor a run id in {store.path}")
+        return summary, (_normalize(r) for r in store.iter_results(path))
+    if path.endswith((".jsonl", ".ndjson")):
+        return None, _iter_ndjson(path)
+
+    with open(path, "r") as f:
+        doc = json.load(f)
+    if "results_file" in doc:
+        results_path = os.path.join(os.path.dirname(path), doc["results_file"])
+        return doc.get("summary"), _iter_ndjson(results_path)
+    return doc.get("summary"), (_normalize(r) for r in doc.get("results", []))
+
+def _iter_ndjson(path: str) -> Iterator[Dict]:
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield _normalize(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # torn last line of an interrupted run
+
+def _sorted_by_id(records: Iterator[Dict], chunk_size: int = SORT_CHUNK) -> Iterator[Dict]:
+    """
+    External sort by case id. The last record for an id wins (a resumed run may
+    append a retry after an error). Memory is bounded by `chunk_size`.
+    """
+    spills: List[str] = []
+    chunk: List[Tuple[str, int, Dict]] = []
+    seq = 0
+
+    def _spill():
+        chunk.sort(key=lambda t: (t[0], t[1]))
+        fd, tmp = tempfile.mkstemp(prefix="evalforge_cmp_", suffix=".jsonl")
+        with os.fdopen(fd, "w") as out:
+            for kid, n, rec in chunk:
+                out.write(json.dumps([kid, n, rec]) + "\n")
+        spills.append(tmp)
+        chunk.clear()
+
+    for rec in records:
+        chunk.append((str(rec["id"]), seq, rec))
+        seq += 1
+        if len(chunk) >= chunk_size:
+            _spill()
+
+    if spills and chunk:
+        _spill()
 
-    base_map = {r["id"]: r for r in base["results"]}
-    cand_map = {r["id"]: r for r in cand["results"]}
-    
-    # Calculate Summary Diffs
-    base_avg = base["summary"]["avg_score"]
-    cand_avg = cand["summary"]["avg_score"]
+    if spills:
+        def _read(tmp):
+            with open(tmp, "r") as f:
+                for line in f:
+                    yield tuple(json.loads(line))
+        merged = heapq.merge(*(_read(t) for t in spills), key=lambda t: (t[0], t[1]))
+    else:
+        chunk.sort(key=lambda t: (t[0], t[1]))
+        merged = iter(chunk)
+
+    try:
+        pending = None
+        for item in merged:
+            if pending is not None and pending[0] != item[0]:
+                yield pending[2]
+            pending = item
+        if pending is not None:
+            yield pending[2]
+    finally:
+        for tmp in spills:
+            os.unlink(tmp)
+
+def merge_join(base: Iterator[Dict], cand: Iterator[Dict]) -> Iterator[Tuple[str, Optional[Dict], Optional[Dict]]]:
+    """Full outer join of two id-sorted streams: yields (id, base or None, cand or None)."""
+    b = next(base, None)
+    c = next(cand, None)
+    while b is not None or c is not None:
+        if c is None or (b is not None and str(b["id"]) < str(c["id"])):
+            yield str(b["id"]), b, None
+            b = next(base, None)
+        elif b is None or str(c["id"]) < str(b["id"]):
+            yield str(c["id"]), None, c
+            c = next(cand, None)
+        else:
+            yield str(b["id"]), b, c
+            b = next(base, None)
+            c = next(cand, None)
+
+def _print_metrics(base_avg: float, cand_avg: float):
     avg_diff = cand_avg - base_avg
-    
-    print(f"# ⚖️ EvalForge Regression Report")
-    print(f"\n**Baseline:** `{Path(baseline_path).name}` | **Candidate:** `{Path(candidate_path).name}`")
-    
-    # 1. Summary Table
     print("\n### 📈 Top-Level Metrics")
     print("| Metric | Baseline | Candidate | Diff |")
     print("| :--- | :--- | :--- | :--- |")
     print(f"| **Avg Score** | {base_avg:.1f} | {cand_avg:.1f} | {get_emoji(avg_diff)} `{avg_diff:+.1f}` |")
-    
-    # 2. Detailed Breakdown
+
+def latency_regressions(
+    base: Dict, cand: Dict, threshold: float = LATENCY_THRESHOLD, min_ms: float = LATENCY_MIN_MS
+) -> List[Tuple[str, str, float, float]]:
+    """
+    Compares two `LatencyStats.report()` dicts.
+
+    Returns:
+        (series, percentile, baseline ms, candidate ms) for every p50/p90/p99
+        of the total, each stage and each track that got slower.
+    """
+    from arcade_app.benchmark import PERCENTILES
+
+    series = [("total", base["latency_ms"], cand["latency_ms"])]
+    for group, prefix in (("stages", "stage"), ("tracks", "track")):
+        for name, c in cand[group].items():
+            if name in base[group]:
+                series.append((f"{prefix}:{name}", base[group][name], c))
+
+    flagged = []
+    for label, b, c in series:
+        if not b.get("count") or not c.get("count"):
+            continue
+        for p in PERCENTILES:
+            key = f"p{p}"
+            if c[key] > b[key] * (1 + threshold) and c[key] - b[key] >= min_ms:
+                flagged.append((label, key, b[key], c[key]))
+    return flagged
+
+def _print_latency(base: Dict, cand: Dict, flagged: List[Tuple[str, str, float, float]]):
+    print("\n### ⏱️ Latency")
+    print("| Series | Baseline p50/p90/p99 | Candidate p50/p90/p99 |")
+    print("| :--- | :--- | :--- |")
+    b, c = base["latency_ms"], cand["latency_ms"]
+    print(f"| **total** | {b['p50']} / {b['p90']} / {b['p99']} | {c['p50']} / {c['p90']} / {c['p99']} |")
+    for label, key, old, new in flagged:
+        print(f"| 🔴 {label} {key} | {old}ms | {new}ms (`{new - old:+.1f}`) |")
+
+def significance_tests(deltas_by_track: Dict[str, array], resamples: int, alpha: float) -> List[Tuple[str, Any, bool]]:
+    """
+    Paired bootstrap CI + sign-flip test over all cases, then per track.
+    Track-level verdicts use a Bonferroni-corrected alpha.
+
+    Returns:
+        (scope, PairedTest, significant regression?) rows, "all" first.
+    """
+    import numpy as np
+    from arcade_app.significance import paired_test
+
+    all_deltas = np.concatenate([np.frombuffer(d, dtype=np.float64) for d in deltas_by_track.values()]) if deltas_by_track else []
+    overall = paired_test(all_deltas, n_resamples=resamples)
+    rows = [("all", overall, overall.significant_regression(alpha))]
+
+    track_alpha = alpha / max(1, len(deltas_by_track))
+    for track in sorted(deltas_by_track):
+        test = paired_test(deltas_by_track[track], n_resamples=resamples)
+        rows.append((f"track:{track}", test, test.significant_regression(track_alpha)))
+    return rows
+
+def _print_significance(rows: List[Tuple[str, Any, bool]], resamples: int):
+    print(f"\n### 📐 Significance ({resamples} resamples, paired)")
+    print("| Scope | Cases | Mean Δ | 95% CI | p (regression) | Verdict |")
+    print("| :--- | :--- | :--- | :--- | :--- | :--- |")
+    for scope, t, significant in rows:
+        if significant:
+            verdict = "🔴 Significant regression"
+        elif t.ci_low > 0:
+            verdict = "🟢 Improvement"
+        else:
+            verdict = "⚪ Within noise"
+        print(f"| {scope} | {t.n} | `{t.mean_delta:+.2f}` | [{t.ci_low:+.2f}, {t.ci_high:+.2f}] | {t.p_value:.4f} | {verdict} |")
+
+def compare_runs(
+    baseline_path: str,
+    candidate_path: str,
+    changes_only: bool = False,
+    store=None,
+    latency_threshold: float = LATENCY_THRESHOLD,
+    latency_min_ms: float = LATENCY_MIN_MS,
+    resamples: int = 10_000,
+    alpha: float = 0.05,
+) -> Dict[str, Any]:
+    """
+    Prints the regression report.
+
+    Returns:
+        {"regressions": cases whose score dropped,
+         "latency_regressions": slower (series, percentile, old, new) rows,
+         "significant": scopes ("all", "track:<name>") that regressed beyond noise}
+    """
+    from arcade_app.benchmark import LatencyStats
+
+    base_summary, base_iter = open_run(baseline_path, store)
+    cand_summary, cand_iter = open_run(candidate_path, store)
+
+    print(f"# ⚖️ EvalForge Regression Report")
+    print(f"\n**Baseline:** `{Path(baseline_path).name}` | **Candidate:** `{Path(candidate_path).name}`")
+
+    # Top-level metrics come from the summary records; a bare NDJSON run has
+    # none, so its average is accumulated during the join and printed after.
+    upfront = all(s and "avg_score" in s for s in (base_summary, cand_summary))
+    if upfront:
+        _print_metrics(base_summary["avg_score"], cand_summary["avg_score"])
+
     print("\n### 🔍 Case-by-Case Analysis")
     print("| Case ID | Old Score | New Score | Delta | Status |")
     print("| :--- | :--- | :--- | :--- | :--- |")
 
     regressions = 0
-    
-    # Union of all keys to handle added/removed cases
-    all_keys = sorted(set(base_map.keys()) | set(cand_map.keys()))
-    
-    for kid in all_keys:
-        b_res = base_map.get(kid)
-        c_res = cand_map.get(kid)
-        
+    totals = {"base": [0, 0.0], "cand": [0, 0.0]}
+    base_lat, cand_lat = LatencyStats(), LatencyStats()
+    deltas: Dict[str, array] = defaultdict(lambda: array("d"))
+
+    for kid, b_res, c_res in merge_join(_sorted_by_id(base_iter), _sorted_by_id(cand_iter)):
+        if b_res:
+            totals["base"][0] += 1
+            totals["base"][1] += b_res["score"]
+            base_lat.add_record(b_res)
+        if c_res:
+            totals["cand"][0] += 1
+            totals["cand"][1] += c_res["score"]
+            cand_lat.add_record(c_res)
+
         if not b_res:
             print(f"| `{kid}` | *N/A* | {c_res['score']} | 🆕 | New Case |")
             continue
         if not c_res:
             print(f"| `{kid}` | {b_res['score']} | *N/A* | ❌ | Removed |")
             continue
-            
+
         score_diff = c_res['score'] - b_res['score']
         status_emoji = get_emoji(score_diff)
-        
+        deltas[c_res.get("track") or b_res.get("track") or "default"].append(score_diff)
+
         if score_diff < 0:
             regressions += 1
-            
+
+        if changes_only and score_diff == 0:
+            continue
         print(f"| `{kid}` | {b_res['score']} | {c_res['score']} | `{score_diff:+.1f}` | {status_emoji} |")
 
-    if regressions == 0:
+    if not upfront:
+        def _avg(summary: Optional[Dict], key: str) -> float:
+            if summary and "avg_score" in summary:
+                return summary["avg_score"]
+            n, total = totals[key]
+            return round(total / n, 1) if n else 0.0
+
+        _print_metrics(_avg(base_summary, "base"), _avg(cand_summary, "cand"))
+
+    # Percentiles come from the per-case records, so every run format works
+    slow = []
+    base_report, cand_report = base_lat.report(), cand_lat.report()
+    if base_report["latency_ms"].get("count") and cand_report["latency_ms"].get("count"):
+        slow = latency_regressions(base_report, cand_report, latency_threshold, latency_min_ms)
+        _print_latency(base_report, cand_report, slow)
+
+    # Per-case drops on a noisy judge are expected; only the paired tests decide
+    significant = []
+    if deltas:
+        rows = significance_tests(deltas, resamples, alpha)
+        _print_significance(rows, resamples)
+        significant = [scope for scope, _, sig in rows if sig]
+
+    if regressions == 0 and not slow:
         print("\n> 🎉 **Success:** No regressions detected.")
     else:
-        print(f"\n> ⚠️ **Warning:** Detected {regressions} regression(s).")
+        if regressions:
+            print(f"\n> ⚠️ **Warning:** Detected {regressions} regression(s).")
+        if slow:
+            print(f"\n> 🐢 **Warning:** Detected {len(slow)} latency regression(s).")
+    if significant:
+        print(f"\n> 🚨 **Failure:** Statistically significant score regression in {', '.join(significant)} (α={alpha}).")
+    elif regressions:
+        print("\n> ℹ️ Score drops are within grader noise.")
+
+    return {"regressions": regressions, "latency_regressions": slow, "significant": significant}
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Compare two EvalForge run files.")
-    parser.add_argument("baseline", help="Path to baseline JSON file")
-    parser.add_argument("candidate", help="Path to candidate JSON file")
+    parser = argparse.ArgumentParser(description="Compare two EvalForge runs (legacy JSON, summary + NDJSON, or bare NDJSON).")
+    parser.add_argument("baseline", help="Path to baseline run file")
+    parser.add_argument("candidate", help="Path to candidate run file")
+    parser.add_argument("--changes-only", action="store_true", help="Only list cases whose score changed")
+    parser.add_argument("--latency-threshold", type=float, default=LATENCY_THRESHOLD, help="Relative slowdown that counts as a latency regression")
+    parser.add_argument("--latency-min-ms", type=float, default=LATENCY_MIN_MS, help="Absolute slowdown (ms) below which latency changes are ignored")
+    parser.add_argument("--resamples", type=int, default=10_000, help="Bootstrap / permutation resamples")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level for the regression tests")
+    parser.add_argument("--store", metavar="DB", help="Run store; lets baseline/candidate be run ids")
     args = parser.parse_args()
-    
-    compare_runs(args.baseline, args.candidate)
+
+    store = None
+    if args.store:
+        from arcade_app.run_store import RunStore
+        store = RunStore(args.store)
+
+    report = compare_runs(
+        args.baseline, args.candidate, changes_only=args.changes_only, store=store,
+        latency_threshold=args.latency_threshold, latency_min_ms=args.latency_min_ms,
+        resamples=args.resamples, alpha=args.alpha,
+    )
+    # Non-zero only for significant score regressions (latency is advisory)
+    sys.exit(1 if report["significant"] else 0)
@@ -36,7 +36,8 @@ async def run_ingestion():
                     full_text = f"Title: {title}\nTags: {', '.join(tags) if tags else 'None'}\n\n{post.content}"
                     
                     doc_id = post.metadata.get("id", file.replace('.md', ''))
-                    await index_content("codex", doc_id, full_text)
+                    world_id = post.metadata.get("world_id") or post.metadata.get("world")
+                    await index_content("codex", doc_id, full_text, world_id=world_id)
                     count += 1
                 except Exception as e:
                     print(f"❌ Failed to index {file}: {e}")
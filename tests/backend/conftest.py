@@ -1,9 +1,12 @@
 import pytest
 import pytest_asyncio
+from types import SimpleNamespace
 from unittest.mock import MagicMock, AsyncMock, patch
 from httpx import AsyncClient, ASGITransport
 from arcade_app.models import User, Profile, QuestDefinition, QuestProgress, QuestState
 from arcade_app.agent import app
+from arcade_app import rag_helper
+from arcade_app.embedder import BatchEmbedder
 
 # Import the shared Vertex AI mock helpers
 # We use absolute import assuming correct pythonpath or pytest root
@@ -214,3 +217,36 @@ async def explain_smoke_session(quest_smoke_session):
     Reuse quest session for explain.
     """
     yield quest_smoke_session
+
+
+# ---------- RAG helpers ----------
+
+@pytest.fixture
+def paragraph_chunks(monkeypatch):
+    """
+    One chunk per paragraph keeps RAG indexing cases readable
+    (chunking itself is tested in test_chunker.py).
+
+    Opt in per module with `pytestmark = pytest.mark.usefixtures("paragraph_chunks")`.
+    """
+    monkeypatch.setattr(rag_helper, "chunk_document", lambda text, **_: [p for p in text.split("\n\n") if p.strip()])
+
+
+@pytest.fixture
+def rag_db(monkeypatch, db_session):
+    """
+    Points rag_helper at the test DB with the mock (zero-vector) embedder.
+
+    Returns a namespace with `session` (the test session) and `sessions`
+    (one entry per get_session() call). Swap in a fake model with
+    `monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(FakeEmbeddingModel(), agent=None))`.
+    """
+    sessions = []
+
+    async def _get_session():
+        sessions.append(db_session)
+        yield db_session
+
+    monkeypatch.setattr(rag_helper, "get_session", _get_session)
+    monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(None))
+    return SimpleNamespace(session=db_session, sessions=sessions)
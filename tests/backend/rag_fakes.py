@@ -0,0 +1,54 @@
+# tests/backend/rag_fakes.py
+
+"""
+Fake Vertex embedding model shared by the RAG tests.
+
+`FakeEmbeddingModel.get_embeddings` is sync like the Vertex SDK's
+TextEmbeddingModel and records every request, so tests can check what was
+(re-)embedded, how it was batched and how many batches ran at once.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+__all__ = ["FakeEmbedding", "FakeEmbeddingModel"]
+
+
+class FakeEmbedding:
+    def __init__(self, values: List[float]):
+        self.values = values
+
+
+class FakeEmbeddingModel:
+    def __init__(
+        self,
+        vector: Callable[[str], List[float]] = lambda text: [float(len(text))],
+        delay: Optional[Callable[[], float]] = None,
+    ):
+        """
+        Args:
+            vector: Maps an input text to its embedding (default: its length).
+            delay: Seconds each request sleeps (e.g. random, so batches finish out of order).
+        """
+        self.vector = vector
+        self.delay = delay
+        self.texts: List[str] = []  # every text embedded, in request order
+        self.calls: List[int] = []  # batch size of each request
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_embeddings(self, texts: List[str]) -> List[FakeEmbedding]:
+        with self._lock:
+            self.calls.append(len(texts))
+            self.texts.extend(texts)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        if self.delay is not None:
+            time.sleep(self.delay())
+        with self._lock:
+            self.active -= 1
+        return [FakeEmbedding(self.vector(t)) for t in texts]
@@ -0,0 +1,114 @@
+"""
+Tests for the concurrent, resumable BatchRunner.
+"""
+import asyncio
+import json
+
+import pytest
+
+from arcade_app import grading_helper
+from arcade_app.batch_runner import BatchRunner
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "golden.jsonl"
+    cases = [{"id": f"case-{i}", "track": "default", "input": "x" * i, "expected_score": i} for i in range(1, 7)]
+    path.write_text("\n".join(json.dumps(c) for c in cases) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def fake_grader(monkeypatch):
+    state = {"seen": [], "active": 0, "peak": 0, "fail": set()}
+
+    async def _fake(user_input, track="default"):
+        state["seen"].append(len(user_input))
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if len(user_input) in state["fail"]:
+            raise RuntimeError("Judge System Offline")
+        return {"weighted_score": len(user_input)}
+
+    monkeypatch.setattr(grading_helper, "grade_submission", _fake)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_concurrent_run_streams_results_to_disk(dataset, fake_grader, tmp_path):
+    runner = BatchRunner(dataset, concurrency=3, runs_dir=str(tmp_path / "runs"))
+    stats = await runner.run()
+
+    assert fake_grader["peak"] == 3
+    assert stats.total == 6 and stats.passed == 6
+    results = list(runner.iter_results())
+    assert sorted(r.case_id for r in results) == [f"case-{i}" for i in range(1, 7)]
+
+    lines = open(runner.results_path).read().splitlines()
+    assert len(lines) == 6
+    summary = json.load(open(runner.summary_path))
+    assert summary["summary"]["total_cases"] == 6
+    assert summary["meta"]["concurrency"] == 3
+    assert summary["results_file"] == f"{runner.run_id}.results.jsonl"
+    assert "results" not in summary
+
+    from arcade_app.run_store import RunStore
+    store = RunStore(runner.store_path)
+    assert store.list_runs()[0]["run_id"] == runner.run_id
+    assert len(store.load(runner.run_id)) == 6
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_finished_cases_and_retries_errors(dataset, fake_grader, tmp_path):
+    runs_dir = str(tmp_path / "runs")
+    fake_grader["fail"] = {2, 5}
+    first = BatchRunner(dataset, concurrency=2, runs_dir=runs_dir)
+    assert (await first.run()).errors == 2
+
+    # Simulate a crash that tore the last line
+    with open(first.results_path, "a") as f:
+        f.write('{"case_id": "case-')
+
+    fake_grader["fail"] = set()
+    fake_grader["seen"].clear()
+    resumed = BatchRunner(dataset, concurrency=2, run_id=first.run_id, runs_dir=runs_dir)
+    stats = await resumed.run()
+
+    assert sorted(fake_grader["seen"]) == [2, 5]
+    assert stats.total == 6
+    assert stats.errors == 0
+    summary = json.load(open(resumed.summary_path))
+    assert summary["meta"]["resumed"] is True
+    assert summary["summary"]["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_summary_carries_latency_report(dataset, fake_grader, tmp_path, capsys):
+    runner = BatchRunner(dataset, concurrency=2, runs_dir=str(tmp_path / "runs"), benchmark=True)
+    await runner.run()
+
+    bench = json.load(open(runner.summary_path))["benchmark"]
+    assert bench["latency_ms"]["count"] == 6
+    assert bench["latency_ms"]["p50"] <= bench["latency_ms"]["p99"]
+    assert bench["throughput_cps"] > 0
+    assert set(bench["tracks"]) == {"default"}
+    # The fake grader bypasses every instrumented stage, so all time is "other"
+    assert set(bench["stages"]) == {"other"}
+
+    record = next(runner.iter_results())
+    assert "other" in record.stages
+    assert "### ⏱️ Benchmark" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_duplicate_case_ids_are_rejected(tmp_path, fake_grader):
+    path = tmp_path / "dupes.jsonl"
+    path.write_text("\n".join(json.dumps({"id": "case-1", "input": "x" * i}) for i in (1, 2)) + "\n")
+    runner = BatchRunner(str(path), runs_dir=str(tmp_path / "runs"))
+
+    with pytest.raises(ValueError, match="Duplicate case id 'case-1'"):
+        await runner.run()
+    assert fake_grader["seen"] == []  # rejected before anything was graded
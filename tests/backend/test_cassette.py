@@ -0,0 +1,91 @@
+"""
+Tests for the LLM record/replay cassette.
+"""
+import pytest
+
+from arcade_app import cassette as cassette_mod
+from arcade_app.cassette import Cassette, CassetteMiss
+from arcade_app.model_registry import ModelRegistry
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _LiveModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return _Chunk(f"live:{prompt}")
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            return _Chunk(f"live:{prompt}")
+
+        async def _gen():
+            for piece in ("a", "b", "c"):
+                yield _Chunk(piece)
+
+        return _gen()
+
+
+@pytest.fixture
+def tape(tmp_path, monkeypatch):
+    tape = Cassette("record", str(tmp_path / "llm.jsonl"))
+    monkeypatch.setattr(cassette_mod, "cassette", tape)
+    return tape
+
+
+def _handle(registry, model, config=None):
+    from arcade_app.model_registry import ModelHandle, _config_key
+    return ModelHandle(registry, "gemini-test", model, _config_key(config))
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tape):
+    live = _LiveModel()
+    handle = _handle(ModelRegistry(), live)
+
+    assert handle.generate_content("p1").text == "live:p1"
+    assert (await handle.generate_content_async("p2")).text == "live:p2"
+    stream = await handle.generate_content_async("p3", stream=True)
+    assert [c.text async for c in stream] == ["a", "b", "c"]
+    assert tape.stats["recorded"] == 3
+
+    # Replay from disk with no model at all
+    tape.configure("replay")
+    offline = _handle(ModelRegistry(), None)
+    assert offline.generate_content("p1").text == "live:p1"
+    assert (await offline.generate_content_async("p2")).text == "live:p2"
+    stream = await offline.generate_content_async("p3", stream=True)
+    assert [c.text async for c in stream] == ["a", "b", "c"]
+    assert live.calls == 3
+
+    with pytest.raises(CassetteMiss):
+        offline.generate_content("never recorded")
+
+
+def test_key_depends_on_model_config_and_prompt(tape):
+    registry = ModelRegistry()
+    _handle(registry, _LiveModel(), {"temperature": 0}).generate_content("p")
+
+    tape.configure("replay")
+    assert _handle(registry, None, {"temperature": 0}).generate_content("p").text == "live:p"
+    with pytest.raises(CassetteMiss):
+        _handle(registry, None, {"temperature": 1}).generate_content("p")
+    with pytest.raises(CassetteMiss):
+        _handle(registry, None, {"temperature": 0}).generate_content("P")
+
+
+def test_passthrough_writes_nothing(tape, tmp_path):
+    tape.configure("passthrough")
+    live = _LiveModel()
+    assert _handle(ModelRegistry(), live).generate_content("p").text == "live:p"
+    assert not (tmp_path / "llm.jsonl").exists()
+
+    with pytest.raises(ValueError):
+        tape.configure("rewind")
@@ -0,0 +1,119 @@
+"""
+Tests for the token-aware, code-aware RAG chunker.
+"""
+import pytest
+from sqlmodel import select
+
+from arcade_app import rag_helper
+from arcade_app.chunker import chunk_document, chunk_stats, detect_kind
+from arcade_app.embedder import estimate_tokens
+from arcade_app.models import KnowledgeChunk
+
+
+PY_SOURCE = '''import os
+import sys
+CONSTANT = 1
+# Helper for the thing
+@decorator
+def first(a, b):
+    x = a + b
+    return x
+class Second:
+    def method(self):
+        return 2
+def third():
+    return 3
+'''
+
+
+def test_detect_kind_from_source_ids():
+    assert detect_kind("proj::src/app.py") == "python"
+    assert detect_kind("proj::docs/README.MD") == "markdown"
+    assert detect_kind("proj::PROJECT_MAP") == "text"
+    assert detect_kind(None) == "text"
+
+
+def test_python_splits_only_at_top_level_boundaries():
+    chunks = chunk_document(PY_SOURCE, path="a.py", max_tokens=30)
+
+    # Each def/class stays whole, together with its comment and decorator
+    assert len(chunks) == 2
+    assert chunks[0].endswith("# Helper for the thing\n@decorator\ndef first(a, b):\n    x = a + b\n    return x")
+    assert chunks[1].startswith("class Second:\n    def method(self):\n        return 2\n")
+    assert all(estimate_tokens(c) <= 30 for c in chunks)
+    assert "".join(c + "\n" for c in chunks) == PY_SOURCE
+
+
+def test_small_units_are_packed():
+    # The old blank-line split would make one chunk per paragraph
+    text = "\n\n".join(f"para {i}" for i in range(50))
+    chunks = chunk_document(text, path="notes.txt", max_tokens=100)
+
+    assert len(chunks) < 10
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_markdown_splits_at_headings_outside_code_fences():
+    text = (
+        "# Title\nintro\n\n"
+        "## Setup\n```bash\n# not a heading\npip install\n```\n\n"
+        "## Usage\n" + "word " * 200 + "\n"
+    )
+    chunks = chunk_document(text, path="README.md", max_tokens=60)
+
+    assert chunks[0].startswith("# Title")
+    assert "# not a heading" in chunks[0] and "## Setup" in chunks[0]  # packed, fence kept whole
+    assert chunks[1].startswith("## Usage")
+
+
+def test_oversized_unit_uses_overlapping_windows():
+    body = "".join(f"    line_{i} = {i}\n" for i in range(200))
+    source = "def big():\n" + body
+    chunks = chunk_document(source, path="big.py", max_tokens=100, overlap_tokens=20)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 100 for c in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.splitlines()[0] in prev  # windows overlap
+    assert "line_199 = 199" in chunks[-1]
+
+
+def test_unparseable_python_falls_back_to_paragraphs():
+    chunks = chunk_document("def broken(:\n\nstill text", path="bad.py", max_tokens=3)
+    assert chunks == ["def broken(:", "still text"]
+
+
+def test_chunk_stats():
+    assert chunk_stats(["a" * 40, "b" * 8]) == {"chunks": 2, "tokens": 14, "max_tokens": 11}
+    assert chunk_stats([]) == {"chunks": 0, "tokens": 0, "max_tokens": 0}
+
+
+def test_header_is_prepended_not_parsed():
+    # "proj-3f2a9c1e" is not valid Python; as part of the text it would force the paragraph fallback
+    header = "File: a.py\nProject: proj-3f2a9c1e\n\n"
+    chunks = chunk_document(PY_SOURCE, path="a.py", max_tokens=45, header=header)
+
+    assert all(c.startswith(header) for c in chunks)
+    assert all(estimate_tokens(c) <= 45 for c in chunks)
+    bodies = [c[len(header):] for c in chunks]
+    assert bodies == chunk_document(PY_SOURCE, path="a.py", max_tokens=45 - estimate_tokens(header))
+
+
+@pytest.mark.asyncio
+async def test_index_many_chunks_python_under_a_file_header(monkeypatch, rag_db):
+    monkeypatch.setattr("arcade_app.chunker.CHUNK_MAX_TOKENS", 45)
+
+    project_id = "proj-3f2a9c1e"
+    header = f"File: pkg/a.py\nProject: {project_id}\n\n"
+    await rag_helper.index_many(
+        "repo", [(f"{project_id}::pkg/a.py", PY_SOURCE)], project_id=project_id,
+        headers={f"{project_id}::pkg/a.py": header},
+    )
+
+    rows = (await rag_db.session.execute(select(KnowledgeChunk.content).order_by(KnowledgeChunk.chunk_index))).scalars().all()
+    assert len(rows) > 1
+    for content in rows:
+        assert content.startswith(header)
+        body = content[len(header):]
+        assert not body[0].isspace()  # every chunk starts at a top-level statement
+    assert any(content[len(header):].startswith("class Second:") for content in rows)
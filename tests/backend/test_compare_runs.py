@@ -0,0 +1,114 @@
+"""
+Tests for the streaming run comparison (legacy JSON vs summary + NDJSON).
+"""
+import json
+
+from scripts import compare_runs as cr
+
+
+def _write_ndjson(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+
+def test_external_sort_keeps_last_record_per_id():
+    records = [{"id": f"c{i % 7}", "score": i} for i in range(30)]
+    out = list(cr._sorted_by_id(iter(records), chunk_size=4))
+
+    assert [r["id"] for r in out] == [f"c{i}" for i in range(7)]
+    # Last occurrence of c0 is i=28, of c6 is i=27
+    assert out[0]["score"] == 28 and out[6]["score"] == 27
+
+
+def test_legacy_json_vs_summary_and_ndjson(tmp_path, capsys):
+    legacy = tmp_path / "base.json"
+    legacy.write_text(json.dumps({
+        "summary": {"avg_score": 70.0},
+        "results": [{"id": "a", "score": 80}, {"id": "b", "score": 60}, {"id": "gone", "score": 50}],
+    }))
+
+    _write_ndjson(tmp_path / "cand.results.jsonl", [
+        {"case_id": "b", "score": 0, "error": "Judge System Offline"},
+        {"case_id": "a", "score": 70},
+        {"case_id": "new", "score": 90},
+        {"case_id": "b", "score": 65},  # resumed retry wins
+    ])
+    with open(tmp_path / "cand.results.jsonl", "a") as f:
+        f.write('{"case_id": "tor')
+    (tmp_path / "cand.json").write_text(json.dumps({
+        "summary": {"avg_score": 75.0}, "results_file": "cand.results.jsonl",
+    }))
+
+    report = cr.compare_runs(str(legacy), str(tmp_path / "cand.json"))
+    out = capsys.readouterr().out
+
+    assert report["regressions"] == 1
+    assert report["significant"] == []  # one drop of 10 on two cases is noise
+    assert "| `b` | 60 | 65 |" in out
+    assert "| `new` | *N/A* | 90 |" in out
+    assert "| `gone` | 50 | *N/A* |" in out
+    assert out.index("Top-Level Metrics") < out.index("Case-by-Case")
+
+
+def test_bare_ndjson_averages_computed_from_stream(tmp_path, capsys):
+    _write_ndjson(tmp_path / "a.jsonl", [{"case_id": "x", "score": 40}, {"case_id": "y", "score": 60}])
+    _write_ndjson(tmp_path / "b.jsonl", [{"case_id": "x", "score": 40}, {"case_id": "y", "score": 80}])
+
+    assert cr.compare_runs(str(tmp_path / "a.jsonl"), str(tmp_path / "b.jsonl"), changes_only=True)["regressions"] == 0
+    out = capsys.readouterr().out
+    assert "| 50.0 | 60.0 |" in out
+    assert "| `x` |" not in out
+
+
+def test_tail_latency_regression_is_flagged(tmp_path, capsys):
+    def _run(name, tail_ms):
+        recs = [
+            {"case_id": f"c{i}", "track": "default", "score": 80, "latency_ms": 100.0 if i < 95 else tail_ms,
+             "stages": {"model_call": 90.0 if i < 95 else tail_ms - 10, "json_parse": 0.1}}
+            for i in range(100)
+        ]
+        _write_ndjson(tmp_path / name, recs)
+        return str(tmp_path / name)
+
+    base, cand = _run("base.jsonl", 400.0), _run("cand.jsonl", 800.0)
+
+    slow = cr.compare_runs(base, cand)["latency_regressions"]
+    assert len(slow) == 3  # p99 of total, stage:model_call and track:default
+    out = capsys.readouterr().out
+    assert "🔴 total p99" in out
+    assert "🔴 stage:model_call p99" in out
+    assert "latency regression" in out
+
+    # Same latencies within threshold: nothing flagged
+    assert cr.compare_runs(base, base)["latency_regressions"] == []
+
+
+def _paired_runs(tmp_path, deltas, tracks=("python",)):
+    base, cand = [], []
+    for i, d in enumerate(deltas):
+        track = tracks[i % len(tracks)]
+        base.append({"case_id": f"c{i}", "track": track, "score": 60})
+        cand.append({"case_id": f"c{i}", "track": track, "score": 60 + d})
+    _write_ndjson(tmp_path / "base.jsonl", base)
+    _write_ndjson(tmp_path / "cand.jsonl", cand)
+    return str(tmp_path / "base.jsonl"), str(tmp_path / "cand.jsonl")
+
+
+def test_jitter_is_not_a_significant_regression(tmp_path, capsys):
+    # Symmetric +-8 grader noise: plenty of per-case drops, no real shift
+    base, cand = _paired_runs(tmp_path, [8, -8, 0, -8, 8, 0] * 50)
+
+    report = cr.compare_runs(base, cand, resamples=2000)
+    assert report["regressions"] == 100
+    assert report["significant"] == []
+    assert "Within noise" in capsys.readouterr().out
+
+
+def test_consistent_drop_in_one_track_is_significant(tmp_path, capsys):
+    # sql cases all drop by 4-8 points, python is unchanged
+    deltas = [0, -8, 0, -4] * 60
+    base, cand = _paired_runs(tmp_path, deltas, tracks=("python", "sql"))
+
+    report = cr.compare_runs(base, cand, resamples=2000)
+    assert "track:sql" in report["significant"]
+    assert "track:python" not in report["significant"]
+    assert "Significant regression" in capsys.readouterr().out
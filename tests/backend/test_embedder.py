@@ -0,0 +1,74 @@
+"""
+Tests for the batching RAG embedder.
+"""
+import random
+
+import pytest
+
+from arcade_app.embedder import BatchEmbedder, estimate_tokens, pack_batches
+from tests.backend.rag_fakes import FakeEmbeddingModel
+
+
+def _numbered_model():
+    # Vector encodes the input ("chunk-7" -> [7.0]) so order can be checked;
+    # random delays make batches finish out of order
+    return FakeEmbeddingModel(vector=lambda t: [float(t.split("-")[1])], delay=lambda: random.uniform(0.001, 0.01))
+
+
+def test_pack_respects_item_and_token_limits():
+    texts = ["x" * 40] * 25 + ["y" * 4000] + ["z"] * 3
+    batches = pack_batches(texts, max_items=10, max_tokens=200)
+
+    assert batches[0] == (0, 10)
+    assert (25, 26) in batches  # oversized text alone
+    assert batches[-1][1] == len(texts)
+    covered = [i for s, e in batches for i in range(s, e)]
+    assert covered == list(range(len(texts)))
+    for s, e in batches:
+        if e - s > 1:
+            assert e - s <= 10 and sum(estimate_tokens(t) for t in texts[s:e]) <= 200
+
+
+@pytest.mark.asyncio
+async def test_embed_batches_concurrently_and_keeps_order():
+    model = _numbered_model()
+    embedder = BatchEmbedder(model, max_items=16, concurrency=3, agent=None)
+    texts = [f"chunk-{i}" for i in range(100)]
+
+    vectors = await embedder.embed(texts)
+
+    assert [v[0] for v in vectors] == [float(i) for i in range(100)]
+    assert model.calls == [16] * 6 + [4]
+    assert 1 < model.peak <= 3
+    assert embedder.stats == {"texts": 100, "requests": 7}
+
+
+@pytest.mark.asyncio
+async def test_mock_mode_and_empty_input():
+    embedder = BatchEmbedder(None)
+    assert await embedder.embed([]) == []
+    vectors = await embedder.embed(["a", "b"])
+    assert len(vectors) == 2 and len(vectors[0]) == 768 and not any(vectors[1])
+
+
+@pytest.mark.asyncio
+async def test_queries_are_governed_as_interactive(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from arcade_app import rate_governor as rg
+
+    agents = []
+
+    @asynccontextmanager
+    async def _slot(model, agent, **kwargs):
+        agents.append(agent)
+        yield
+
+    monkeypatch.setattr(rg.rate_governor, "slot", _slot)
+    embedder = BatchEmbedder(_numbered_model())
+
+    await embedder.embed(["chunk-1", "chunk-2"])
+    assert await embedder.embed_query("query-7") == [7.0]
+
+    assert agents == ["embed", "embed_query"]
+    assert [rg.AGENT_PRIORITY[a] for a in agents] == ["background", "interactive"]
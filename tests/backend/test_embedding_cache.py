@@ -0,0 +1,79 @@
+"""
+Tests for the content-hash embedding cache in rag_helper.index_many.
+"""
+import pytest
+from sqlmodel import select
+
+from arcade_app import rag_helper
+from arcade_app.embedder import BatchEmbedder
+from arcade_app.ingestion_helper import embed_cache_stats
+from arcade_app.models import EmbeddingCache, KnowledgeChunk
+from tests.backend.rag_fakes import FakeEmbeddingModel
+
+
+pytestmark = pytest.mark.usefixtures("paragraph_chunks")
+
+
+@pytest.fixture
+def fake_db(monkeypatch, rag_db):
+    rag_db.model = FakeEmbeddingModel()
+    monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(rag_db.model, agent=None))
+    return rag_db
+
+
+async def _cache_size(session):
+    return len((await session.execute(select(EmbeddingCache))).all())
+
+
+async def _chunks(session, source_id):
+    rows = await session.execute(
+        select(KnowledgeChunk).where(KnowledgeChunk.source_id == source_id).order_by(KnowledgeChunk.chunk_index)
+    )
+    return rows.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_chunks_reuse_cached_vectors(fake_db):
+    doc_v1 = "alpha paragraph\n\nbeta paragraph\n\nalpha paragraph"
+    doc_v2 = "alpha paragraph\n\nbeta paragraph, edited"
+
+    first = await rag_helper.index_many("repo", [("p::a.md", doc_v1)])
+    assert (first["chunks"], first["cache_hits"], first["embedded"]) == (3, 0, 2)  # duplicate text embeds once
+    assert await _cache_size(fake_db.session) == 2
+
+    fake_db.model.texts.clear()
+    second = await rag_helper.index_many("repo", [("p::a.md", doc_v2)])
+    assert (second["chunks"], second["cache_hits"], second["embedded"]) == (2, 1, 1)
+    assert fake_db.model.texts == ["beta paragraph, edited"]
+
+    chunks = await _chunks(fake_db.session, "p::a.md")
+    assert [c.content_hash for c in chunks] == [rag_helper.content_hash(t) for t in ("alpha paragraph", "beta paragraph, edited")]
+    assert list(chunks[1].embedding) == [float(len("beta paragraph, edited"))]
+
+
+@pytest.mark.asyncio
+async def test_moved_text_hits_cache(fake_db):
+    await rag_helper.index_many("repo", [("p::a.md", "alpha\n\nbeta")])
+    fake_db.model.texts.clear()
+
+    # Same paragraphs at new positions: rows change, vectors come from the cache
+    stats = await rag_helper.index_many("repo", [("p::a.md", "beta\n\nalpha")])
+
+    assert stats["cache_hits"] == 2 and stats["embedded"] == 0
+    assert fake_db.model.texts == []
+
+
+@pytest.mark.asyncio
+async def test_mock_mode_skips_cache(monkeypatch, fake_db):
+    monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(None))
+
+    stats = await rag_helper.index_many("repo", [("p::b.md", "one\n\ntwo")])
+
+    assert (stats["chunks"], stats["cache_hits"], stats["embedded"]) == (2, 0, 2)
+    assert await _cache_size(fake_db.session) == 0
+    assert len(fake_db.sessions) == 1  # no lookup session in mock mode
+
+
+def test_embed_cache_stats():
+    assert embed_cache_stats({"chunks": 8, "cache_hits": 6}) == {"hits": 6, "misses": 2, "hit_rate": 0.75}
+    assert embed_cache_stats({})["hit_rate"] == 0.0
@@ -0,0 +1,114 @@
+"""
+Tests for distributed (ARQ-sharded) golden-dataset evals.
+"""
+import asyncio
+import json
+
+import fakeredis
+import pytest
+
+from arcade_app import eval_sharding, grading_helper
+from arcade_app.eval_sharding import ShardedBatchRunner
+
+
+class _FakePool(fakeredis.aioredis.FakeRedis):
+    """ArqRedis stand-in: each enqueued shard is run by one of `workers` fake workers."""
+
+    def __init__(self, workers=2, **kwargs):
+        super().__init__(**kwargs)
+        self.jobs = []
+        self._workers = asyncio.Semaphore(workers)
+        self._tasks = []
+
+    async def enqueue_job(self, name, *args, _job_id=None):
+        assert name == "grade_eval_shard"
+        self.jobs.append(_job_id)
+
+        async def _work():
+            async with self._workers:
+                await eval_sharding.grade_eval_shard(self, *args)
+
+        self._tasks.append(asyncio.ensure_future(_work()))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "golden.jsonl"
+    cases = [{"id": f"case-{i}", "track": "default", "input": "x" * i, "expected_score": i} for i in range(1, 12)]
+    path.write_text("\n".join(json.dumps(c) for c in cases) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def fake_grader(monkeypatch):
+    seen = []
+
+    async def _fake(user_input, track="default"):
+        seen.append(len(user_input))
+        await asyncio.sleep(0.01)
+        return {"weighted_score": len(user_input)}
+
+    monkeypatch.setattr(grading_helper, "grade_submission", _fake)
+    monkeypatch.setattr(eval_sharding, "POLL_INTERVAL_SEC", 0.01)
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_shards_are_merged_into_one_run_file(dataset, fake_grader, tmp_path):
+    pool = _FakePool(workers=3)
+    runner = ShardedBatchRunner(dataset, concurrency=2, runs_dir=str(tmp_path / "runs"), shard_size=4, pool=pool)
+    stats = await runner.run()
+
+    assert len(pool.jobs) == 3  # 11 cases / 4 per shard
+    assert stats.total == 11 and stats.passed == 11
+    assert sorted(r.case_id for r in runner.iter_results()) == sorted(f"case-{i}" for i in range(1, 12))
+
+    summary = json.load(open(runner.summary_path))
+    assert summary["meta"]["distributed"] is True
+    assert summary["summary"]["total_cases"] == 11
+    assert summary["results_file"] == f"{runner.run_id}.results.jsonl"
+    # Redis scratch space is cleaned up once merged
+    assert await pool.keys("evalforge:eval:*") == []
+
+
+@pytest.mark.asyncio
+async def test_retried_shard_replaces_its_results(fake_grader):
+    redis = fakeredis.aioredis.FakeRedis()
+    cases = [{"id": "a", "input": "xx", "expected_score": 2}, {"id": "b", "input": "xxx", "expected_score": 3}]
+
+    await eval_sharding.grade_eval_shard(redis, "r1", 0, cases)
+    await eval_sharding.grade_eval_shard(redis, "r1", 0, cases)
+
+    assert await redis.llen(eval_sharding.shard_key("r1", 0)) == 2
+    assert await redis.hget(eval_sharding.done_key("r1"), "0") == b"2"
+
+
+@pytest.mark.asyncio
+async def test_resume_only_shards_unfinished_cases(dataset, fake_grader, tmp_path):
+    runs_dir = str(tmp_path / "runs")
+    first = ShardedBatchRunner(dataset, runs_dir=runs_dir, shard_size=4, pool=_FakePool())
+    await first.run()
+
+    # Drop the last three results as if their shard had timed out
+    lines = open(first.results_path).read().splitlines()
+    with open(first.results_path, "w") as f:
+        f.write("\n".join(lines[:-3]) + "\n")
+
+    fake_grader.clear()
+    pool = _FakePool()
+    resumed = ShardedBatchRunner(dataset, runs_dir=runs_dir, run_id=first.run_id, shard_size=4, pool=pool)
+    stats = await resumed.run()
+
+    assert len(fake_grader) == 3 and len(pool.jobs) == 1
+    assert stats.total == 11
+
+
+def test_meta_keeps_fast_subset_info(dataset, tmp_path):
+    runner = ShardedBatchRunner(dataset, runs_dir=str(tmp_path / "runs"), shard_size=4, pool=_FakePool())
+    runner.subset = {"size": 2, "dataset_fingerprint": "abc"}
+
+    assert runner._extra_meta() == {
+        "fast_subset": {"size": 2, "dataset_fingerprint": "abc"},
+        "distributed": True,
+        "shard_size": 4,
+    }
@@ -0,0 +1,105 @@
+"""
+Tests for the stratified --fast eval subset.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+from arcade_app import grading_helper
+from arcade_app.batch_runner import BatchRunner
+from arcade_app.fast_subset import estimate_full_set, load_or_build, select_subset, stratum_of
+from arcade_app.run_store import RunStore
+
+
+def _cases():
+    cases = []
+    for i in range(200):
+        track = "debugging" if i % 10 == 0 else "default"  # rare track: 20 cases
+        cases.append({"id": f"case-{i:03d}", "track": track, "input": f"solution {i}", "expected_score": (i * 7) % 101})
+    return cases
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "golden.jsonl"
+    path.write_text("".join(json.dumps(c) + "\n" for c in _cases()))
+    return str(path)
+
+
+def test_every_stratum_is_represented_proportionally():
+    strata = select_subset(_cases(), fail_rates={"case-005": (10, 0.7)}, size=30)
+
+    assert sum(len(s["ids"]) for s in strata.values()) >= 30
+    assert sum(s["population"] for s in strata.values()) == 200
+    assert all(s["ids"] for s in strata.values())
+    # The one historically hard case is its own stratum and always picked
+    hard = [h for h in strata if h.endswith("|hard")]
+    assert len(hard) == 1 and strata[hard[0]]["ids"] == ["case-005"]
+    # Deterministic
+    assert select_subset(_cases(), {"case-005": (10, 0.7)}, size=30) == strata
+
+
+def test_subset_is_persisted_and_rebuilt_when_dataset_changes(dataset, tmp_path):
+    subset_path = str(tmp_path / "runs" / "fast_subset.json")
+    first = load_or_build(dataset, subset_path, size=25)
+    assert os.path.exists(subset_path)
+    assert load_or_build(dataset, subset_path, size=25)["created_at"] == first["created_at"]
+
+    with open(dataset, "a") as f:
+        f.write(json.dumps({"id": "case-new", "track": "sql", "input": "x", "expected_score": 50}) + "\n")
+    rebuilt = load_or_build(dataset, subset_path, size=25)
+    assert rebuilt["dataset_fingerprint"] != first["dataset_fingerprint"]
+    assert rebuilt["population"] == 201
+
+
+def test_history_from_run_store_shapes_strata(dataset, tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    results = [{"case_id": c["id"], "track": c["track"], "score": 0, "passed": c["id"] != "case-001"} for c in _cases()]
+    store.record_run("r1", {"timestamp": "1"}, results)
+    store.close()
+
+    subset = load_or_build(dataset, str(tmp_path / "fs.json"), store_path=str(tmp_path / "runs.db"), size=20)
+    assert subset["history_runs"] == 1
+    assert any(h.endswith("|hard") for h in subset["strata"])
+    assert stratum_of({"track": "t", "expected_score": 45}, (3, 0.0)) == "t|40|stable"
+
+
+def test_estimate_recovers_full_set_mean():
+    class R:
+        def __init__(self, case_id, score, passed):
+            self.case_id, self.score, self.passed = case_id, score, passed
+
+    cases = _cases()
+    truth = {c["id"]: c["expected_score"] for c in cases}
+    subset_strata = select_subset(cases, {}, size=60)
+    subset = {"population": 200, "strata": subset_strata}
+
+    picked = [cid for s in subset_strata.values() for cid in s["ids"]]
+    est = estimate_full_set([R(cid, truth[cid], truth[cid] >= 50) for cid in picked], subset)
+
+    full_mean = sum(truth.values()) / len(truth)
+    assert abs(est["avg_score"] - full_mean) <= est["avg_score_ci95"] + 1
+    assert est["graded_cases"] == len(picked)
+
+
+@pytest.mark.asyncio
+async def test_fast_run_grades_only_subset(dataset, tmp_path, monkeypatch):
+    seen = []
+
+    async def _fake(user_input, track="default"):
+        seen.append(user_input)
+        await asyncio.sleep(0)
+        return {"weighted_score": 50}
+
+    monkeypatch.setattr(grading_helper, "grade_submission", _fake)
+    runner = BatchRunner(dataset, concurrency=4, runs_dir=str(tmp_path / "runs"), fast=True, fast_size=25)
+    stats = await runner.run()
+
+    assert stats.total == len(seen) == runner.subset["size"]
+    assert stats.total < 200
+    summary = json.load(open(runner.summary_path))
+    assert summary["estimate"]["population"] == 200
+    assert summary["estimate"]["avg_score"] == 50.0
+    assert summary["meta"]["fast_subset"]["size"] == stats.total
@@ -0,0 +1,77 @@
+"""
+Unit tests for the content-addressed grade cache.
+"""
+import json
+
+import pytest
+
+from arcade_app import grade_cache as grade_cache_module
+from arcade_app.grade_cache import GradeCache, LRUTTLCache, grade_cache_key
+
+
+def test_key_ignores_trailing_whitespace():
+    a = grade_cache_key("def f():\n    return 1   \n", "default", "gemini", "v1")
+    b = grade_cache_key("  def f():\n    return 1", "default", "gemini", "v1")
+    assert a == b
+    assert a != grade_cache_key("def f():\n    return 1", "debugging", "gemini", "v1")
+    assert a != grade_cache_key("def f():\n    return 1", "default", "gemini", "v2")
+
+
+def test_lru_evicts_oldest_and_expires(monkeypatch):
+    lru = LRUTTLCache(max_entries=2, ttl_sec=10)
+    lru.set("a", {"v": 1})
+    lru.set("b", {"v": 2})
+    lru.get("a")  # touch a so b is the oldest
+    lru.set("c", {"v": 3})
+    assert lru.get("b") is None
+    assert lru.get("a") == {"v": 1}
+
+    now = grade_cache_module.time.monotonic()
+    monkeypatch.setattr(grade_cache_module.time, "monotonic", lambda: now + 60)
+    assert lru.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_track():
+    cache = GradeCache(redis_url="")
+    k1 = grade_cache_key("x", "default", "m", "v1")
+    k2 = grade_cache_key("x", "debugging", "m", "v1")
+    await cache.set(k1, {"coverage": 1})
+    await cache.set(k2, {"coverage": 2})
+
+    assert await cache.invalidate("debugging") == 1
+    assert await cache.get(k2) is None
+    assert await cache.get(k1) == {"coverage": 1}
+    assert cache.stats["lru_hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_grade_submission_reuses_cached_grade(monkeypatch):
+    from arcade_app import grading_helper, model_registry
+
+    calls = []
+    counted = []
+
+    class _Resp:
+        text = json.dumps({"coverage": 5, "correctness": 5, "clarity": 5, "comment": "ok"})
+
+    class _Model:
+        async def generate_content_async(self, *args, **kwargs):
+            calls.append(args)
+            return _Resp()
+
+    monkeypatch.delenv("EVALFORGE_MOCK_GRADING", raising=False)
+    monkeypatch.setattr(grade_cache_module, "grade_cache", GradeCache(redis_url=""))
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: _Model())
+    monkeypatch.setattr(grade_cache_module, "_count", counted.append)
+
+    first = await grading_helper.grade_submission("print('hi')", track="default")
+    second = await grading_helper.grade_submission("print('hi')   ", track="default")
+    weighted = await grading_helper.grade_submission("print('hi')", track="debugging")
+
+    assert len(calls) == 2  # second call was served from cache
+    assert counted == ["miss", "cache_lru", "miss"]
+    assert first == second
+    assert first["weighted_score"] == 100.0
+    assert weighted["rubric_used"] == "debugging"
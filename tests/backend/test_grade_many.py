@@ -0,0 +1,73 @@
+"""
+Tests for batch grading (grade_many + /api/judge/batch).
+"""
+import asyncio
+import json
+
+import pytest
+
+from arcade_app import grading_helper
+
+
+@pytest.fixture
+def fake_grader(monkeypatch):
+    state = {"active": 0, "peak": 0}
+
+    async def _fake(user_input, track="default"):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        # Later inputs finish first so completion order != input order
+        await asyncio.sleep(0.05 / (len(user_input) or 1))
+        state["active"] -= 1
+        if user_input == "boom":
+            raise RuntimeError("Judge System Offline")
+        return {"weighted_score": len(user_input), "rubric_used": track}
+
+    monkeypatch.setattr(grading_helper, "grade_submission", _fake)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_grade_many_preserves_order_and_bounds_concurrency(fake_grader):
+    inputs = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]
+    results = await grading_helper.grade_many(inputs, track="default", concurrency=2)
+
+    assert [r["index"] for r in results] == list(range(len(inputs)))
+    assert [r["grade"]["weighted_score"] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert fake_grader["peak"] == 2
+    assert all(r["latency_ms"] >= 0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_grade_many_reports_item_errors(fake_grader):
+    results = await grading_helper.grade_many(
+        ["ok", "boom", {"input": "dict-item", "id": "case-3", "track": "debugging"}],
+        concurrency=3,
+    )
+
+    assert results[0]["ok"] is True
+    assert results[1]["ok"] is False
+    assert "Offline" in results[1]["error"]
+    assert results[2]["id"] == "case-3"
+    assert results[2]["grade"]["rubric_used"] == "debugging"
+
+
+@pytest.mark.asyncio
+async def test_judge_batch_endpoint_streams_ndjson(client, fake_grader):
+    from arcade_app.agent import app
+    from arcade_app.auth_helper import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": "test_user"}
+    try:
+        resp = await client.post(
+            "/api/judge/batch",
+            json={"submissions": ["x", "yy", "boom"], "concurrency": 3},
+        )
+    finally:
+        app.dependency_overrides = {}
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert {line["index"]: line["ok"] for line in lines} == {0: True, 1: True, 2: False}
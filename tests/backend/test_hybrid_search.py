@@ -0,0 +1,90 @@
+"""
+Tests for hybrid (full-text + vector) retrieval with reciprocal rank fusion.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from arcade_app import rag_helper, vector_index
+from arcade_app.rag_helper import lexical_terms, reciprocal_rank_fusion
+from arcade_app.vector_index import LocalVectorIndex
+
+
+def test_lexical_terms_split_identifiers_and_drop_filler():
+    assert lexical_terms("Where is `ingest_project_repo` defined?") == ["ingest", "project", "repo", "defined"]
+    assert lexical_terms("what is a") == []
+
+
+def test_rrf_rewards_agreement():
+    vector = [(1, "a"), (2, "b"), (3, "c")]
+    lexical = [(3, "c"), (4, "d")]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    assert [chunk_id for chunk_id, _ in fused] == [3, 1, 2, 4]  # in both lists beats top of one
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+@pytest.mark.asyncio
+async def test_hybrid_runs_both_rankings_concurrently(monkeypatch):
+    started = []
+    both_running = asyncio.Event()
+
+    def _ranker(name, result):
+        async def _run(query, depth, *args):
+            started.append((name, depth))
+            if len(started) == 2:
+                both_running.set()
+            await asyncio.wait_for(both_running.wait(), timeout=1)  # deadlocks if run one after the other
+            return result
+        return _run
+
+    monkeypatch.setattr(rag_helper, "_vector_ranked", _ranker("vector", [(1, "semantic"), (2, "shared")]))
+    monkeypatch.setattr(rag_helper, "_lexical_ranked", _ranker("lexical", [(2, "shared"), (3, "exact")]))
+
+    results = await rag_helper.search_knowledge("ingest_project_repo", limit=2, mode="hybrid")
+
+    assert results == ["shared", "semantic"]
+    assert sorted(started) == [("lexical", 20), ("vector", 20)]
+
+
+@pytest.mark.asyncio
+async def test_postgres_lexical_query_uses_tsvector(monkeypatch):
+    sql = []
+
+    class _Session:
+        bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        async def execute(self, stmt, params=None):
+            sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(all=lambda: [(7, "def ingest_project_repo(...)")])
+
+    async def _get_session():
+        yield _Session()
+
+    monkeypatch.setattr(rag_helper, "get_session", _get_session)
+
+    ranked = await rag_helper._lexical_ranked("where is ingest_project_repo", 5, {"source_type": "repo", "project_id": None, "world_id": None})
+
+    assert ranked == [(7, "def ingest_project_repo(...)")]
+    assert "WHERE" in sql[0] and "content_tsv @@ to_tsquery(" in sql[0]
+    assert "ORDER BY ts_rank_cd(content_tsv, to_tsquery(" in sql[0]
+    assert "knowledgechunk.source_type = %(source_type_1)s" in sql[0]
+
+
+@pytest.mark.asyncio
+async def test_exact_identifier_wins_on_sqlite(monkeypatch, tmp_path, rag_db, paragraph_chunks):
+    # rag_db's mock embedder returns zero vectors: no semantic signal
+    monkeypatch.setattr(vector_index, "local_index", LocalVectorIndex(str(tmp_path / "vi")))
+
+    await rag_helper.index_many("repo", [(
+        "p1::ingestion_helper.py",
+        "def publish_progress(): ...\n\ndef ingest_project_repo(project_id, repo_url): ...\n\ndef helper(): ...",
+    )], project_id="p1")
+
+    assert await rag_helper.search_knowledge("where is `ingest_project_repo`?", limit=1) == [
+        "def ingest_project_repo(project_id, repo_url): ..."
+    ]
+    assert await rag_helper.search_knowledge("ingest_project_repo", limit=1, mode="lexical", project_id="p2") == []
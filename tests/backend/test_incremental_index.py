@@ -0,0 +1,64 @@
+"""
+Tests for the diff-based upsert in rag_helper.index_many.
+"""
+import pytest
+from sqlmodel import select
+
+from arcade_app import rag_helper
+from arcade_app.models import KnowledgeChunk
+
+
+pytestmark = pytest.mark.usefixtures("paragraph_chunks")
+
+
+@pytest.fixture
+def session(rag_db):
+    return rag_db.session
+
+
+async def _rows(session, source_id):
+    result = await session.execute(
+        select(KnowledgeChunk.id, KnowledgeChunk.chunk_index, KnowledgeChunk.content)
+        .where(KnowledgeChunk.source_id == source_id)
+        .order_by(KnowledgeChunk.chunk_index)
+    )
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_only_changed_chunks_are_written(session):
+    first = await rag_helper.index_many("repo", [("p::a.py", "one\n\ntwo\n\nthree"), ("p::b.py", "other")])
+    assert first["inserted"] == 4
+    before = {idx: row_id for row_id, idx, _ in await _rows(session, "p::a.py")}
+    other = await _rows(session, "p::b.py")
+
+    stats = await rag_helper.index_many("repo", [("p::a.py", "one\n\nTWO")])
+
+    assert (stats["unchanged"], stats["updated"], stats["inserted"], stats["deleted"]) == (1, 1, 0, 1)
+    assert stats["embedded"] == 1
+    rows = await _rows(session, "p::a.py")
+    assert [(idx, content) for _, idx, content in rows] == [(0, "one"), (1, "TWO")]
+    assert {idx: row_id for row_id, idx, _ in rows} == {0: before[0], 1: before[1]}  # rows kept in place
+    assert await _rows(session, "p::b.py") == other  # not part of this call
+
+
+@pytest.mark.asyncio
+async def test_reindex_unchanged_is_a_noop(session):
+    await rag_helper.index_many("codex", [("doc.md", "# Title\n\nBody")])
+    stats = await rag_helper.index_many("codex", [("doc.md", "# Title\n\nBody")])
+
+    assert stats["unchanged"] == 2 and stats["embedded"] == 0
+    assert stats["inserted"] == stats["updated"] == stats["deleted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_legacy_rows_are_repaired(session):
+    # Rows from the old delete-and-insert indexer: no hash, and a duplicate position
+    for content in ("old", "dupe"):
+        session.add(KnowledgeChunk(source_type="repo", source_id="p::c.py", chunk_index=0, content=content, embedding=[0.0] * 768))
+    await session.commit()
+
+    stats = await rag_helper.index_many("repo", [("p::c.py", "new")])
+
+    assert (stats["updated"], stats["deleted"]) == (1, 1)
+    assert [(idx, content) for _, idx, content in await _rows(session, "p::c.py")] == [(0, "new")]
@@ -0,0 +1,71 @@
+"""
+Tests for incremental judge streaming (grade_partial events).
+"""
+import json
+
+import pytest
+
+from arcade_app import grade_cache, grading_helper, model_registry, singleflight
+from arcade_app.grading_helper import _GradeFieldParser, stream_grade_submission
+
+GRADE_JSON = json.dumps(
+    {"coverage": 4, "correctness": 5, "clarity": 3, "comment": "Nice \"guard\" clause"}
+)
+
+
+def test_parser_emits_fields_once_complete():
+    parser = _GradeFieldParser()
+    assert parser.feed('{"coverage": 4') == []  # number may still grow
+    assert parser.feed(', "correct') == [("coverage", 4)]
+    assert parser.feed('ness": 5, "clarity": 3, "comment": "Nice \\"gu') == [
+        ("correctness", 5),
+        ("clarity", 3),
+    ]
+    assert parser.feed('ard\\" clause"}') == [("comment", 'Nice "guard" clause')]
+    assert parser.feed("") == []
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StreamingModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, *args, **kwargs):
+        self.calls += 1
+        assert kwargs.get("stream") is True
+        pieces = [GRADE_JSON[i:i + 7] for i in range(0, len(GRADE_JSON), 7)]
+
+        async def _gen():
+            for piece in pieces:
+                yield _Chunk(piece)
+
+        return _gen()
+
+
+@pytest.fixture
+def streaming_model(monkeypatch):
+    model = _StreamingModel()
+    monkeypatch.delenv("EVALFORGE_MOCK_GRADING", raising=False)
+    monkeypatch.setattr(grade_cache, "grade_cache", grade_cache.GradeCache(redis_url=""))
+    monkeypatch.setattr(singleflight, "judge_flight", singleflight.SingleFlight("judge_grade"))
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: model)
+    return model
+
+
+@pytest.mark.asyncio
+async def test_stream_grade_submission_yields_partials_then_grade(streaming_model):
+    updates = [u async for u in stream_grade_submission("code()", track="default")]
+
+    partials = [u for u in updates if u["type"] == "partial"]
+    assert [p["field"] for p in partials] == ["coverage", "correctness", "clarity", "comment"]
+    assert updates[-1]["type"] == "grade"
+    assert updates[-1]["grade"]["weighted_score"] == pytest.approx(84.0)
+
+    # Second request is a cache hit: same events, no extra model call
+    again = [u async for u in stream_grade_submission("code()", track="default")]
+    assert streaming_model.calls == 1
+    assert [u["type"] for u in again] == ["partial"] * 4 + ["grade"]
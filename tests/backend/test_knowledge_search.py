@@ -0,0 +1,79 @@
+"""
+Tests for filtered ANN search and chunk tagging in rag_helper.
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from arcade_app import rag_helper
+from arcade_app.embedder import BatchEmbedder
+from arcade_app.models import KnowledgeChunk
+
+
+pytestmark = pytest.mark.usefixtures("paragraph_chunks")
+
+
+class _Result:
+    def all(self):
+        return [(1, "hit")]
+
+
+class _PgSession:
+    """Records statements; pretends to be Postgres so the scan knobs are set."""
+
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    def __init__(self):
+        self.sql = []
+
+    async def execute(self, stmt, params=None):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return _Result()
+
+
+@pytest.fixture
+def pg_session(monkeypatch):
+    session = _PgSession()
+
+    async def _get_session():
+        yield session
+
+    monkeypatch.setattr(rag_helper, "get_session", _get_session)
+    monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(None))
+    return session
+
+
+@pytest.mark.asyncio
+async def test_search_filters_and_scan_settings(pg_session):
+    results = await rag_helper.search_knowledge(
+        "routing", limit=5, source_type="repo", project_id="p1", ef_search=200, mode="vector"
+    )
+
+    assert results == ["hit"]
+    *settings, query = pg_session.sql
+    assert "SET LOCAL hnsw.ef_search = 200" in settings
+    assert f"SET LOCAL ivfflat.probes = {rag_helper.RAG_PROBES}" in settings
+    assert "knowledgechunk.source_type = %(source_type_1)s" in query
+    assert "knowledgechunk.project_id = %(project_id_1)s" in query
+    assert "world_id =" not in query
+    assert "ORDER BY knowledgechunk.embedding <=>" in query
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_search_uses_defaults(pg_session):
+    await rag_helper.search_knowledge("routing", mode="vector")
+
+    assert f"SET LOCAL hnsw.ef_search = {rag_helper.RAG_EF_SEARCH}" in pg_session.sql
+    assert "WHERE" not in pg_session.sql[-1]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_chunks_are_retagged(rag_db):
+    await rag_helper.index_many("repo", [("p1::a.py", "one\n\ntwo")])
+    stats = await rag_helper.index_many("repo", [("p1::a.py", "one\n\ntwo")], project_id="p1")
+
+    assert stats["embedded"] == 0 and stats["unchanged"] == 2
+    rows = (await rag_db.session.execute(select(KnowledgeChunk.project_id, KnowledgeChunk.world_id))).all()
+    assert rows == [("p1", None), ("p1", None)]
@@ -0,0 +1,70 @@
+"""
+Tests for the memory-mapped mock grader index.
+"""
+import json
+import os
+import time
+
+import pytest
+
+from arcade_app.mock_grader import MockGrader, build_index
+
+
+def _write_dataset(path, cases):
+    path.write_text("".join(json.dumps(c) + "\n" for c in cases))
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_lazy_index_hit_miss_and_duplicates(tmp_path):
+    dataset = _write_dataset(tmp_path / "golden.jsonl", [
+        {"id": f"case-{i}", "input": f"def f{i}():  return {i}", "expected_score": 100} for i in range(500)
+    ] + [{"id": "dup-last", "input": "def f7(): return 7", "expected_score": 20}])
+
+    grader = MockGrader(dataset)
+    assert not os.path.exists(dataset + ".idx")  # nothing happens at construction
+
+    hit = await grader.grade("def f3():\n    return 3", "default")  # whitespace-normalized
+    assert hit["mock_lookup_hit"] and "case-3" in hit["comment"]
+    assert hit["coverage"] == 5
+
+    dup = await grader.grade("def f7(): return 7", "default")
+    assert "dup-last" in dup["comment"] and dup["coverage"] == 1
+
+    miss = await grader.grade("print('never seen')", "default")
+    assert miss["mock_lookup_hit"] is False
+
+
+@pytest.mark.asyncio
+async def test_stale_index_is_rebuilt(tmp_path):
+    path = tmp_path / "golden.jsonl"
+    dataset = _write_dataset(path, [{"id": "old", "input": "a", "expected_score": 100}])
+    build_index(dataset)
+
+    _write_dataset(path, [{"id": "new", "input": "b", "expected_score": 100}, {"id": "c2", "input": "c"}])
+    stat = os.stat(dataset)
+    os.utime(dataset, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    grader = MockGrader(dataset)
+    assert (await grader.grade("b", "default"))["mock_lookup_hit"]
+    assert not (await grader.grade("a", "default"))["mock_lookup_hit"]
+
+
+@pytest.mark.asyncio
+async def test_missing_dataset_falls_back(tmp_path):
+    grader = MockGrader(str(tmp_path / "nope.jsonl"))
+    assert (await grader.grade("x", "default"))["mock_lookup_hit"] is False
+
+
+@pytest.mark.asyncio
+async def test_lookup_is_sub_millisecond(tmp_path):
+    dataset = _write_dataset(tmp_path / "big.jsonl", [
+        {"id": f"c{i}", "input": f"solution {i}", "expected_score": 60} for i in range(50_000)
+    ])
+    grader = MockGrader(dataset)
+    await grader.grade("warm up", "default")
+
+    t0 = time.perf_counter()
+    for i in range(0, 50_000, 500):
+        assert (await grader.grade(f"solution {i}", "default"))["mock_lookup_hit"]
+    assert (time.perf_counter() - t0) / 100 < 0.001
@@ -0,0 +1,58 @@
+"""
+Unit tests for the shared Vertex model registry.
+Verifies handles are built once per key and calls are counted.
+"""
+import sys
+
+import pytest
+
+from arcade_app.model_registry import ModelRegistry
+from tests.backend.vertex_ai_mocks import install_vertex_ai_mocks
+
+
+@pytest.fixture
+def registry(mock_vertex_ai_modules):
+    install_vertex_ai_mocks()
+    init_calls = []
+    sys.modules["vertexai"].init = lambda **kw: init_calls.append(kw)
+    reg = ModelRegistry()
+    reg.init_calls = init_calls
+    return reg
+
+
+def test_handles_are_reused_per_key(registry):
+    a = registry.get("gemini-test", "us-central1")
+    b = registry.get("gemini-test", "us-central1")
+    c = registry.get("gemini-test", "us-central1", {"temperature": 0.1})
+
+    assert a is b
+    assert c is not a
+    # Same project/location -> vertexai.init runs exactly once
+    assert len(registry.init_calls) == 1
+
+
+def test_location_switch_reinitializes(registry):
+    registry.get("gemini-test", "us-central1")
+    registry.get("gemini-test", "europe-west4")
+    registry.get("gemini-test", "us-central1", {"temperature": 0.2})
+
+    assert [c["location"] for c in registry.init_calls] == [
+        "us-central1", "europe-west4", "us-central1"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_calls_are_counted(registry):
+    handle = registry.get("gemini-test")
+    handle.generate_content("hi")
+    await handle.generate_content_async("hi")
+
+    stats = registry.stats()["gemini-test"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 0
+
+
+def test_warmup_builds_default_model(registry, monkeypatch):
+    monkeypatch.setenv("EVALFORGE_MODEL_VERSION", "gemini-warm")
+    assert registry.warmup() == 1
+    assert registry.get() is registry.get("gemini-warm")
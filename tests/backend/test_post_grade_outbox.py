@@ -0,0 +1,120 @@
+"""
+Tests for the post-grade transactional outbox (enqueue -> worker -> game_events).
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from arcade_app import database, gamification, post_grade, socket_manager
+from arcade_app.models import OutboxEvent
+
+@pytest_asyncio.fixture
+async def outbox_db(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(OutboxEvent.__table__.create)
+
+    make_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def _get_session():
+        async with make_session() as session:
+            yield session
+
+    monkeypatch.setattr(database, "get_session", _get_session)
+    yield make_session
+    await engine.dispose()
+
+
+@pytest.fixture
+def side_effects(monkeypatch):
+    calls = {"xp": [], "quests": [], "emitted": [], "jobs": []}
+
+    async def _add_xp(user_id, world_id, amount):
+        calls["xp"].append(amount)
+        return {"user_id": user_id, "xp_added": amount}
+
+    async def _complete(user_id, world_id, score):
+        calls["quests"].append(score)
+
+    async def _emit(user_id, event):
+        calls["emitted"].append({"user_id": user_id, **event})
+
+    async def _no_boss(*args):
+        return None
+
+    async def _enqueue(event_id):
+        calls["jobs"].append(event_id)
+        return True
+
+    monkeypatch.setattr(gamification, "add_xp", _add_xp)
+    monkeypatch.setattr(gamification, "process_quest_completion", _complete)
+    monkeypatch.setattr(socket_manager, "emit_fx_event", _emit)
+    monkeypatch.setattr(post_grade, "_check_boss_trigger", _no_boss)
+    monkeypatch.setattr(post_grade, "_enqueue_job", _enqueue)
+    return calls
+
+
+async def _status(make_session, event_id):
+    async with make_session() as session:
+        return await session.get(OutboxEvent, event_id)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_then_process_runs_bookkeeping_once(outbox_db, side_effects):
+    event_id = await post_grade.enqueue_post_grade("u1", "world-python", "python-fundamentals", 85)
+    await post_grade.asyncio.sleep(0)  # let the background enqueue task run
+
+    assert side_effects["jobs"] == [event_id]
+    assert side_effects["xp"] == []  # nothing ran on the request path
+    assert (await _status(outbox_db, event_id)).status == "pending"
+
+    assert await post_grade.process_outbox_event(event_id) is True
+    # The cron sweep must not run it a second time
+    assert await post_grade.sweep_outbox() == 0
+
+    assert side_effects["xp"] == [85]
+    assert side_effects["quests"] == [85]
+    assert side_effects["emitted"] == [
+        {"user_id": "u1", "type": "progress", "progress": {"user_id": "u1", "xp_added": 85}}
+    ]
+    row = await _status(outbox_db, event_id)
+    assert row.status == "done"
+    assert row.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_event_is_retried_by_sweep(outbox_db, side_effects, monkeypatch):
+    event_id = await post_grade.enqueue_post_grade("u2", "world-infra", "infra", 40)
+    failures = ["db hiccup"]
+
+    async def _flaky_add_xp(user_id, world_id, amount):
+        if failures:
+            raise RuntimeError(failures.pop())
+        return {"xp_added": amount}
+
+    monkeypatch.setattr(gamification, "add_xp", _flaky_add_xp)
+    assert await post_grade.process_outbox_event(event_id) is False
+    row = await _status(outbox_db, event_id)
+    assert row.status == "pending"
+    assert "db hiccup" in row.last_error
+
+    assert await post_grade.sweep_outbox() == 1
+    row = await _status(outbox_db, event_id)
+    assert row.status == "done"
+    assert row.attempts == 2
+    assert side_effects["quests"] == []  # below the pass mark: XP only
+
+
+@pytest.mark.asyncio
+async def test_enqueue_failure_falls_back_to_inline(side_effects, monkeypatch):
+    async def _broken_session():
+        raise RuntimeError("outbox table missing")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(database, "get_session", _broken_session)
+
+    assert await post_grade.enqueue_post_grade("u3", "world-python", "python-fundamentals", 90) is None
+    assert side_effects["jobs"] == []
+    assert side_effects["xp"] == [90]  # bookkeeping still happened, just on the request path
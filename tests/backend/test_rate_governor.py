@@ -0,0 +1,71 @@
+"""
+Tests for the adaptive Vertex rate governor (local-bucket mode, no Redis).
+"""
+import pytest
+
+from arcade_app import rate_governor as rg
+from arcade_app.rate_governor import RateGovernor, RateLimitExceeded, _LocalBucket
+
+
+def test_local_bucket_aimd():
+    bucket = _LocalBucket(rate=4.0)
+    assert bucket.adjust(throttled=False) == pytest.approx(4.0 + rg.ADDITIVE_STEP)
+    assert bucket.adjust(throttled=True) == pytest.approx((4.0 + rg.ADDITIVE_STEP) * rg.DECREASE_FACTOR)
+
+    for _ in range(50):
+        bucket.adjust(throttled=True)
+    assert bucket.rate == rg.MIN_RATE
+
+
+def test_background_priority_keeps_a_reserve():
+    bucket = _LocalBucket(rate=2.0)  # capacity = rate * BURST_SEC
+    cap = int(2.0 * rg.BURST_SEC)
+
+    # Background may only take tokens down to half capacity
+    granted = sum(bucket.try_take(rg.PRIORITY_RESERVE["background"], now=0.0)[0] for _ in range(cap))
+    assert granted == cap // 2
+
+    # Interactive can still drain the rest
+    granted = sum(bucket.try_take(rg.PRIORITY_RESERVE["interactive"], now=0.0)[0] for _ in range(cap))
+    assert granted == cap - cap // 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_gives_up_after_max_wait():
+    gov = RateGovernor(redis_url="")
+    gov.enabled = True
+    gov._local["m"] = _LocalBucket(rate=0.01, tokens=0.0, ts=rg.time.monotonic())
+
+    with pytest.raises(RateLimitExceeded):
+        await gov.acquire("m", "codex", max_wait=0.05)
+    assert gov.stats["codex"]["waited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_reports_throttling():
+    gov = RateGovernor(redis_url="")
+    gov.enabled = True
+
+    class _QuotaError(Exception):
+        code = 429
+
+    with pytest.raises(_QuotaError):
+        async with gov.slot("m", "judge"):
+            raise _QuotaError("quota")
+
+    assert gov.stats["judge"] == {"granted": 1, "waited": 0, "throttled": 1}
+    assert gov._local["m"].rate == pytest.approx(rg.DEFAULT_RATE * rg.DECREASE_FACTOR)
+
+    async with gov.slot("m", "judge"):
+        pass
+    assert gov._local["m"].rate == pytest.approx(rg.DEFAULT_RATE * rg.DECREASE_FACTOR + rg.ADDITIVE_STEP)
+
+
+def test_throttle_detection_ignores_stray_digits():
+    assert rg.is_throttle_error(RuntimeError("429 Too Many Requests"))
+    assert rg.is_throttle_error(RuntimeError("503 Service Unavailable: model overloaded"))
+    assert rg.is_throttle_error(RuntimeError("grpc: RESOURCE_EXHAUSTED quota exceeded"))
+
+    assert not rg.is_throttle_error(RuntimeError("prompt has 14290 tokens, limit 8192"))
+    assert not rg.is_throttle_error(ValueError("bad JSON at line 503"))
+    assert not rg.is_throttle_error(RuntimeError("request id 7f429e03 failed: invalid argument"))
@@ -0,0 +1,97 @@
+"""
+Tests for the compiled rubric / ZERO prompt registry.
+"""
+import json
+import os
+
+import pytest
+
+from arcade_app.prompts import zero_boss_judge
+from arcade_app.rubric_registry import RUBRIC_SEPARATOR, RubricRegistry
+
+
+def _rubric(boss_slug="boss-test-warden", instructions="Be strict.", top_score=20):
+    return {
+        "schema_version": "1.0",
+        "id": "test_warden_boss",
+        "boss_slug": boss_slug,
+        "title": "Test Warden",
+        "max_score": 100,
+        "dimensions": [
+            {
+                "key": "safety",
+                "label": "Safety",
+                "weight": 1.0,
+                "description": "",
+                "bands": [
+                    {"level": 1, "label": "Ok", "score": 10, "criteria": ""},
+                    {"level": 0, "label": "Bad", "score": 0, "criteria": ""},
+                    {"level": 2, "label": "Good", "score": top_score, "criteria": ""},
+                ],
+            }
+        ],
+        "grade_bands": [{"min_score": 0, "label": "F", "description": ""}],
+        "autofail_conditions": [],
+        "llm_judge_instructions": instructions,
+    }
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data) if isinstance(data, dict) else data, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def rubric_dir(tmp_path, monkeypatch):
+    prompt = tmp_path / "zero_boss_judge_test_warden.md"
+    _write(prompt, "CUSTOM PROMPT", 1000)
+    monkeypatch.setattr(zero_boss_judge, "ZERO_BOSS_PROMPTS", {"boss-test-warden": str(prompt)})
+    _write(tmp_path / "boss-test-warden.json", _rubric(), 1000)
+    _write(tmp_path / "boss_rubric_index.world-test.json", {"world": "not a rubric"}, 1000)
+    return tmp_path
+
+
+def test_compiles_prompt_and_band_table(rubric_dir):
+    registry = RubricRegistry(rubric_dir, reload_interval=0)
+    assert registry.warmup() == 1
+
+    compiled = registry.get("test_warden_boss")
+    assert compiled is registry.get("boss-test-warden")
+    assert compiled.system_prompt == "CUSTOM PROMPT" + RUBRIC_SEPARATOR + "Be strict."
+    assert compiled.band_for("safety", 2).score == 20
+    # Unknown levels fall back to the lowest band
+    assert compiled.band_for("safety", 9).label == "Bad"
+    assert registry.compiled_for(compiled.rubric) is compiled
+
+    with pytest.raises(FileNotFoundError):
+        registry.get("missing_boss")
+
+
+def test_reloads_only_changed_files(rubric_dir):
+    registry = RubricRegistry(rubric_dir, reload_interval=0)
+    registry.warmup()
+    first = registry.get("test_warden_boss")
+
+    registry.refresh()
+    assert registry.get("test_warden_boss") is first
+    assert registry.loads == 1
+
+    # Prompt edit: rubric is not re-read, but its system prompt is rebuilt
+    _write(rubric_dir / "zero_boss_judge_test_warden.md", "NEW PROMPT", 2000)
+    registry.refresh()
+    assert registry.get("test_warden_boss").system_prompt.startswith("NEW PROMPT")
+    assert registry.loads == 1
+
+    # Rubric edit
+    _write(rubric_dir / "boss-test-warden.json", _rubric(top_score=30), 3000)
+    registry.refresh()
+    assert registry.get("test_warden_boss").band_for("safety", 2).score == 30
+    assert registry.loads == 2
+
+
+def test_boss_without_custom_prompt_uses_generic(rubric_dir):
+    _write(rubric_dir / "boss-other.json", {**_rubric(boss_slug="boss-other"), "id": "other_boss"}, 1000)
+    registry = RubricRegistry(rubric_dir, reload_interval=0)
+
+    prompt = registry.get("other_boss").system_prompt
+    assert prompt.startswith(zero_boss_judge.ZERO_BOSS_JUDGE_SYSTEM_PROMPT.strip())
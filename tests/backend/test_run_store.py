@@ -0,0 +1,83 @@
+"""
+Tests for the columnar SQLite run store.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from arcade_app.run_store import RunStore
+
+
+def _results(scores, track_of=lambda i: "python" if i % 2 else "sql", fail=()):
+    return [
+        {
+            "case_id": f"case-{i}",
+            "track": track_of(i),
+            "score": s,
+            "latency_ms": 100.0 + i,
+            "passed": i not in fail,
+            "error": None,
+        }
+        for i, s in enumerate(scores)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    yield store
+    store.close()
+
+
+def test_record_and_load_typed_columns(store):
+    results = _results([10, 20, 30]) + [{"case_id": "case-0", "track": "sql", "score": 15, "passed": True, "error": None}]
+    store.record_run("r1", {"timestamp": "2025-01-01T00:00:00"}, results)
+
+    cols = store.load("r1")
+    assert cols.score.dtype == np.float32 and cols.case_idx.dtype == np.int32
+    assert len(cols) == 3  # last record per case wins
+    assert np.all(np.diff(cols.case_idx) > 0)
+    assert store.list_runs()[0]["avg_score"] == pytest.approx((15 + 20 + 30) / 3)
+
+    with pytest.raises(KeyError):
+        store.load("missing")
+
+
+def test_case_trend_over_recent_runs(store):
+    for n in range(5):
+        results = _results([50 + n, 60, 70])
+        if n == 2:  # run without case-0
+            results = results[1:]
+        store.record_run(f"r{n}", {"timestamp": f"2025-01-0{n + 1}"}, results)
+
+    trend = store.case_trend("case-0", last=4)
+    assert [p["run_id"] for p in trend] == ["r1", "r3", "r4"]
+    assert [p["score"] for p in trend] == [51, 53, 54]
+    assert store.case_trend("nope") == []
+
+
+def test_track_regressions(store):
+    store.record_run("base", {"timestamp": "1"}, _results([80] * 6))
+    store.record_run("cand", {"timestamp": "2"}, _results([80] * 6, fail={1, 3}))
+
+    rates = store.track_pass_rates("cand")
+    assert rates["sql"]["pass_rate"] == 1.0
+    assert rates["python"]["pass_rate"] == pytest.approx(1 / 3)
+    assert rates["python"]["p50_latency_ms"] == 103.0
+
+    drops = store.track_regressions("base", "cand")
+    assert [d["track"] for d in drops] == ["python"]
+
+
+def test_import_summary_and_ndjson_run(store, tmp_path):
+    (tmp_path / "run_x.results.jsonl").write_text(
+        "".join(json.dumps(r) + "\n" for r in _results([40, 90])) + '{"case_id": "tor'
+    )
+    (tmp_path / "run_x.json").write_text(json.dumps({
+        "meta": {"run_id": "run_x", "timestamp": "2025-02-01"},
+        "results_file": "run_x.results.jsonl",
+    }))
+
+    assert store.import_run_file(str(tmp_path / "run_x.json")) == "run_x"
+    assert sorted(r["score"] for r in store.iter_results("run_x")) == [40, 90]
@@ -0,0 +1,41 @@
+"""
+Tests for the paired bootstrap / sign-flip significance tests.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from arcade_app import significance
+from arcade_app.significance import paired_test
+
+
+def test_discrete_and_fallback_paths_agree(monkeypatch):
+    rng = np.random.default_rng(7)
+    deltas = rng.choice([-8.0, -4.0, 0.0, 4.0], size=2000, p=[0.3, 0.2, 0.3, 0.2])
+
+    fast = paired_test(deltas, n_resamples=4000)
+    monkeypatch.setattr(significance, "MAX_DISTINCT", 0)
+    slow = paired_test(deltas, n_resamples=4000)
+
+    assert fast.mean_delta == slow.mean_delta
+    assert fast.ci_low == pytest.approx(slow.ci_low, abs=0.1)
+    assert fast.ci_high == pytest.approx(slow.ci_high, abs=0.1)
+    assert fast.significant_regression() and slow.significant_regression()
+
+
+def test_null_and_empty_inputs():
+    assert paired_test([]).p_value == 1.0
+    assert paired_test([0.0] * 100).significant_regression() is False
+    improvement = paired_test([4.0, 8.0, 0.0] * 100, n_resamples=2000)
+    assert improvement.ci_low > 0 and not improvement.significant_regression()
+
+
+def test_10k_resamples_over_10k_judge_cases_is_fast():
+    rng = np.random.default_rng(0)
+    scores = np.arange(0, 101, 4, dtype=np.float64)
+    deltas = rng.choice(scores, 10_000) - rng.choice(scores, 10_000)
+
+    t0 = time.perf_counter()
+    paired_test(deltas, n_resamples=10_000)
+    assert time.perf_counter() - t0 < 1.0
@@ -0,0 +1,93 @@
+"""
+Tests for singleflight coalescing of identical LLM evaluations.
+"""
+import asyncio
+import json
+
+import pytest
+
+from arcade_app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"score": 42}
+
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+    assert len(calls) == 1
+    assert all(r == {"score": 42} for r in results)
+    assert flight.stats == {"leaders": 1, "coalesced": 4}
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_release_key():
+    flight = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("vertex down")
+
+    results = await asyncio.gather(
+        flight.do("k", boom), flight.do("k", boom), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "ok"
+
+    # The failed flight is gone, so the next call runs fresh
+    assert await flight.do("k", ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.03)
+        return "done"
+
+    leader = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+
+
+@pytest.mark.asyncio
+async def test_grade_submission_coalesces_identical_inputs(monkeypatch):
+    from arcade_app import grade_cache, grading_helper, model_registry
+    from arcade_app import singleflight
+
+    calls = []
+
+    class _Resp:
+        text = json.dumps({"coverage": 4, "correctness": 4, "clarity": 4, "comment": "ok"})
+
+    class _SlowModel:
+        async def generate_content_async(self, *args, **kwargs):
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return _Resp()
+
+    monkeypatch.delenv("EVALFORGE_MOCK_GRADING", raising=False)
+    monkeypatch.setattr(grade_cache, "grade_cache", grade_cache.GradeCache(redis_url=""))
+    monkeypatch.setattr(singleflight, "judge_flight", SingleFlight("judge_grade"))
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: _SlowModel())
+
+    results = await asyncio.gather(
+        *[grading_helper.grade_submission("starter()", track="default") for _ in range(10)]
+    )
+
+    assert len(calls) == 1
+    assert {r["weighted_score"] for r in results} == {80.0}
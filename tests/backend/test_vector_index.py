@@ -0,0 +1,150 @@
+"""
+Tests for the in-process vector index used when pgvector is unavailable.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from arcade_app import rag_helper, vector_index
+from arcade_app.embedder import BatchEmbedder
+from arcade_app.vector_index import LocalVectorIndex
+from tests.backend.rag_fakes import FakeEmbeddingModel
+
+
+pytestmark = pytest.mark.usefixtures("paragraph_chunks")
+
+
+DIM = 8
+
+
+def _vec(*hot):
+    v = np.zeros(DIM, dtype=np.float32)
+    for i in hot:
+        v[i] = 1.0
+    return v
+
+
+def _chunk(chunk_id, vec, project_id="p1", source_type="repo", world_id=None):
+    return {"id": chunk_id, "embedding": vec, "project_id": project_id, "source_type": source_type, "world_id": world_id}
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = LocalVectorIndex(str(tmp_path / "vi"), dim=DIM)
+    idx.rebuild([])
+    return idx
+
+
+def test_top_k_with_filters_and_projects(index):
+    index.upsert([
+        _chunk(1, _vec(0)),
+        _chunk(2, _vec(0, 1)),
+        _chunk(3, _vec(1), source_type="codex", world_id="world-python"),
+        _chunk(4, _vec(0), project_id="p2"),
+    ])
+
+    assert [i for i, _ in index.search(_vec(0), 2)] in ([1, 4], [4, 1])
+    assert [i for i, _ in index.search(_vec(0), 3, project_id="p1")] == [1, 2, 3]
+    assert index.search(_vec(1), 5, source_type="codex") == [(3, pytest.approx(1.0))]
+    assert index.search(_vec(1), 5, world_id="world-unknown") == []
+    assert index.search(_vec(0), 5, project_id="nope") == []
+
+
+def test_updates_moves_and_removes_survive_reopen(index):
+    index.upsert([_chunk(1, _vec(0)), _chunk(2, _vec(1))])
+    index.upsert([_chunk(1, _vec(2))])                                  # vector changed
+    index.upsert([{"id": 2, "embedding": None, "project_id": "p2", "source_type": "repo"}])  # re-tag only
+    index.remove([99])
+
+    reopened = LocalVectorIndex(index.root, dim=DIM)
+    assert reopened.exists()
+    assert reopened.search(_vec(2), 1, project_id="p1") == [(1, pytest.approx(1.0))]
+    assert reopened.search(_vec(1), 5, project_id="p1") == [(1, pytest.approx(0.0))]
+    assert reopened.search(_vec(1), 1, project_id="p2") == [(2, pytest.approx(1.0))]
+
+    reopened.remove([1])
+    assert LocalVectorIndex(index.root, dim=DIM).search(_vec(2), 5, project_id="p1") == []
+
+
+def test_writers_in_other_processes_are_not_clobbered(index, monkeypatch):
+    # Two instances on one directory stand in for two uvicorn/ARQ processes
+    other = LocalVectorIndex(index.root, dim=DIM)
+    index.upsert([_chunk(1, _vec(0))])
+    other.upsert([_chunk(2, _vec(1))])      # appends after row 0, which `other` has not replayed yet
+    index.upsert([_chunk(3, _vec(2))])      # must not truncate row 1
+
+    for idx in (index, other, LocalVectorIndex(index.root, dim=DIM)):
+        assert [idx.search(_vec(d), 1)[0][0] for d in range(3)] == [1, 2, 3]
+
+    # Compaction in one process is picked up by the other
+    monkeypatch.setattr(vector_index, "COMPACT_MIN_DEAD", 1)
+    other.remove([1, 2])
+    assert index.search(_vec(2), 5) == [(3, pytest.approx(1.0))]
+    assert index._shard(vector_index.shard_name("p1")).rows == 1
+
+
+def test_rebuild_swaps_in_a_complete_index(index):
+    index.upsert([_chunk(1, _vec(0))])
+    seen_mid_rebuild = []
+
+    def _chunks():
+        yield _chunk(2, _vec(1))
+        seen_mid_rebuild.append(index.search(_vec(0), 5))  # old index still served
+        yield _chunk(3, _vec(2))
+
+    assert index.rebuild(_chunks()) == 2
+    assert seen_mid_rebuild == [[(1, pytest.approx(1.0))]]
+    assert [i for i, _ in index.search(_vec(1, 2), 5)] in ([2, 3], [3, 2])
+    assert index.exists()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_searches_build_once(monkeypatch, tmp_path):
+    builds = []
+
+    async def _rebuild(session):
+        builds.append(session)
+        await asyncio.sleep(0.01)
+        vector_index.local_index.rebuild([])
+
+    monkeypatch.setattr(vector_index, "local_index", LocalVectorIndex(str(tmp_path / "vi"), dim=DIM))
+    monkeypatch.setattr(rag_helper, "rebuild_local_index", _rebuild)
+
+    await asyncio.gather(*(rag_helper._search_local(None, list(_vec(0)), 1, {}) for _ in range(3)))
+    assert len(builds) == 1
+
+
+def test_blocked_search_and_compaction_match_brute_force(monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_index, "SEARCH_BLOCK_ROWS", 64)
+    monkeypatch.setattr(vector_index, "COMPACT_MIN_DEAD", 50)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, DIM)).astype(np.float32)
+    idx = LocalVectorIndex(str(tmp_path / "vi"), dim=DIM, dtype="float16")
+    idx.rebuild(_chunk(i, v) for i, v in enumerate(vectors))
+    idx.remove(range(0, 500, 2))  # triggers compaction
+    shard = idx._shard(vector_index.shard_name("p1"))
+    assert shard.rows == 250
+
+    queries = rng.normal(size=(3, DIM)).astype(np.float32)
+    results = idx.search_many(queries, 5)
+
+    live = vectors[1::2] / np.linalg.norm(vectors[1::2], axis=1, keepdims=True)
+    for q, hits in zip(queries, results):
+        expected = 2 * np.argsort(-(live @ (q / np.linalg.norm(q))))[:5] + 1
+        assert [i for i, _ in hits] == list(expected)
+
+
+@pytest.mark.asyncio
+async def test_search_knowledge_uses_local_index_on_sqlite(monkeypatch, tmp_path, rag_db):
+    model = FakeEmbeddingModel(vector=lambda t: [float("routing" in t), float("database" in t)] + [0.0] * 766)
+    monkeypatch.setattr(rag_helper, "embedder", BatchEmbedder(model, agent=None))
+    monkeypatch.setattr(vector_index, "local_index", LocalVectorIndex(str(tmp_path / "vi")))
+
+    await rag_helper.index_many("repo", [("p1::a.md", "routing table\n\ndatabase pool")], project_id="p1")
+    assert await rag_helper.search_knowledge("routing", limit=1) == ["routing table"]  # first search builds
+
+    # Later writes are mirrored into the built index
+    await rag_helper.index_many("repo", [("p2::b.md", "database migrations")], project_id="p2")
+    assert await rag_helper.search_knowledge("database", limit=1, project_id="p2") == ["database migrations"]
+    assert await rag_helper.search_knowledge("database", limit=5, project_id="p1") == ["database pool", "routing table"]
@@ -0,0 +1,75 @@
+"""
+Tests for the async ZERO judge path (timeout, retries, concurrency bound).
+"""
+import asyncio
+import json
+
+import pytest
+
+from arcade_app import llm, model_registry
+
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+
+
+class _SlowThenFastModel:
+    """First call hangs past the timeout, later calls answer immediately."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+        return _Resp(json.dumps({"dimensions": [], "autofail_conditions_triggered": []}))
+
+
+class _ConcurrencyProbeModel:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return _Resp("{}")
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_retried(monkeypatch):
+    model = _SlowThenFastModel()
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: model)
+
+    result = await llm.chat_completion_json_async("sys", {"x": 1}, timeout=0.05, max_attempts=2)
+
+    assert model.calls == 2
+    assert result["dimensions"] == []
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(monkeypatch):
+    class _AlwaysBadJson:
+        async def generate_content_async(self, *args, **kwargs):
+            return _Resp("not json")
+
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: _AlwaysBadJson())
+
+    with pytest.raises(json.JSONDecodeError):
+        await llm.chat_completion_json_async("sys", {}, timeout=1, max_attempts=1)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(monkeypatch):
+    model = _ConcurrencyProbeModel()
+    monkeypatch.setattr(model_registry, "get_model", lambda *a, **kw: model)
+    monkeypatch.setattr(llm, "ZERO_JUDGE_CONCURRENCY", 2)
+    llm._judge_semaphores.clear()
+
+    await asyncio.gather(*[llm.chat_completion_json_async("sys", {"i": i}) for i in range(6)])
+
+    assert model.peak == 2